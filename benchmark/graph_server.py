@@ -0,0 +1,381 @@
+"""
+A local stand-in for the Facebook Graph API, used by the benchmarks and the tests.
+
+It answers GET, POST and DELETE calls with Graph-shaped JSON over HTTP/1.1 keep-alive,
+so PyFacebook can be pointed at it through facebook_graph_url:
+
+    {id}/adgroups       AdGroups, paged with limit and an after cursor, as is any connection given rows.
+                        A filtering param with GREATER_THAN on a time field is applied.
+    {id}/adgroupstats   One large page of AdStatistic rows
+    {id}/adimages       AdImages, or the hash of the uploaded file when POSTed to
+    {id}/reportstats    Starts a report job when POSTed to with async=true, or reads its rows.
+                        Jobs of failing_* accounts end with Job Failed. Jobs of expiring_* accounts are unknown
+                        to ?ids= lookups, which then fail with code 100, as Facebook fails them for expired jobs.
+    ?ids=               Many objects, or the status of report jobs, by id
+    oauth/access_token  A long-lived token, long_lived_ followed by the token exchanged
+    batch               Every operation of a batch call, answered as if it had been sent alone.
+                        As on Facebook, operations referencing the result of a failed one aren't run and get null.
+    error_*             A Graph API error, code 100
+    unavailable_*       A 500 with an HTML body, as when Facebook is down
+
+Every call, and every operation of a batch call, is recorded in requests unless record is off.
+
+"""
+import re
+import cgi
+import json
+import urllib
+import calendar
+import time
+import socket
+import itertools
+import threading
+import BaseHTTPServer
+import SocketServer
+
+from hashlib import md5
+from StringIO import StringIO
+from urlparse import urlparse, parse_qs
+
+from benchmark import payloads
+
+REFERENCE_PATTERN = re.compile(r'\{result=([^:}]+):')
+
+
+def query_params(query):
+    return dict((key, val[0]) for key, val in parse_qs(query).items())
+
+
+def timestamp(time_text):
+    """
+    :param str time_text: A Graph API time, like 2014-03-01T00:00:00+0000
+    :rtype int: The unix timestamp of it
+
+    """
+    return calendar.timegm(time.strptime(time_text[:19], '%Y-%m-%dT%H:%M:%S'))
+
+
+class GraphRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    """
+    Answers Graph API calls with canned payloads. Keep-alive is on, as it is on graph.facebook.com.
+
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    extra_headers = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self):
+        """
+        The query and form params of the call. An uploaded file's param is a (filename, content) tuple.
+
+        """
+        params = query_params(urlparse(self.path).query)
+        if self.command == 'POST':
+            length = int(self.headers.getheader('content-length') or 0)
+            body = self.rfile.read(length)
+            content_type = self.headers.getheader('content-type', '')
+            if content_type.startswith('multipart/'):
+                form = cgi.FieldStorage(fp=StringIO(body), environ={'REQUEST_METHOD': 'POST',
+                                                                    'CONTENT_TYPE': content_type,
+                                                                    'CONTENT_LENGTH': str(length)})
+                for field in form.list:
+                    params[field.name] = (field.filename, field.value) if field.filename else field.value
+            else:
+                params.update(query_params(body))
+        return params
+
+    def _respond(self, status, body, content_type='application/json', headers=None):
+        if not isinstance(body, basestring):
+            body = json.dumps(body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        all_headers = dict(self.extra_headers)
+        all_headers.update(headers or {})
+        for key, val in all_headers.items():
+            self.send_header(key, val)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+
+    def _handle(self):
+        self.server.count_request()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        params = self._params()
+
+        self.extra_headers = {}
+        if self.server.call_limit:
+            usage = self.server.use_call()
+            self.extra_headers = {'X-App-Usage': json.dumps({'call_count': usage, 'total_cputime': 0, 'total_time': 0})}
+            if usage > 100:
+                return self._respond(400, {'error': {'message': '(#4) Application request limit reached',
+                                                     'type': 'OAuthException', 'code': 4}})
+
+        return self._respond(*self.server.answer(self.command, urlparse(self.path).path, params))
+
+    do_GET = _handle
+    do_POST = _handle
+    do_DELETE = _handle
+
+
+class GraphServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    """
+    A threaded stand-in Graph API server bound to a free local port.
+
+    :param float latency: Seconds to sleep before answering each call.
+    :param int call_limit: If set, calls over this many per window are throttled with error code 4,
+                           and X-App-Usage reports the share of the limit used.
+    :param float window: Seconds after which the call_limit count resets.
+    :param int total_rows: The number of adgroups paged through by {id}/adgroups.
+    :param dict connections: Rows to page through by connection name, e.g. {'adcreatives': [{'id': '1'}]},
+                             served instead of the canned ones.
+    :param int stats_rows: The number of rows {id}/adgroupstats answers with.
+    :param int image_rows: The number of images {id}/adimages answers with.
+    :param int report_polls: How many times a report job is polled before it's completed.
+    :param bool record: If False, calls aren't recorded in requests, so long benchmark runs don't grow the process.
+
+    """
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, call_limit=None, window=1.0, total_rows=500, stats_rows=5000, image_rows=100,
+                 report_polls=2, record=True, connections=None, handler=GraphRequestHandler):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), handler)
+        self.latency = latency
+        self.call_limit = call_limit
+        self.window = window
+        self.total_rows = total_rows
+        self.stats_rows = stats_rows
+        self.image_rows = image_rows
+        self.report_polls = report_polls
+        self.record = record
+        self.connections = connections or {}
+        self.requests = []
+        self.__rows = {}
+        self.__encoded = {}
+        self.__reports = {}
+        self.__report_ids = itertools.count(6020000000000)
+        self.request_count = 0
+        self.throttled_count = 0
+        self.__window_start = time.time()
+        self.__window_calls = 0
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__sockets = {}
+
+    @property
+    def url(self):
+        return 'http://%s:%d' % self.server_address
+
+    def requests_to(self, http_method, path):
+        """
+        :rtype list: The params of every recorded call of http_method to path
+        """
+        with self.__lock:
+            return [params for method, call_path, params in self.requests if method == http_method and call_path == path]
+
+    def answer(self, http_method, path, params):
+        """
+        Answers one Graph API call, and records it.
+
+        :param str http_method: GET, POST or DELETE
+        :param str path: The path called, e.g. /act_1/adgroups
+        :param dict params: The query and form params of the call
+        :rtype tuple: (status code, body, content type)
+
+        """
+        if self.record:
+            with self.__lock:
+                self.requests.append((http_method, path, params))
+        parts = [part for part in path.split('/') if part]
+
+        if parts and parts[0].startswith('error_'):
+            return 400, {'error': {'message': '(#100) Invalid parameter', 'type': 'OAuthException', 'code': 100}}, \
+                'application/json'
+        if parts and parts[0].startswith('unavailable_'):
+            return 500, '<html><body>Sorry, something went wrong.</body></html>', 'text/html'
+
+        if not parts and 'batch' in params:
+            return 200, self.__answer_batch(json.loads(params['batch'])), 'application/json'
+        if http_method == 'DELETE':
+            return 200, 'true', 'text/plain'
+        if http_method == 'POST':
+            return self.__answer_post(parts, params)
+        if not parts and 'ids' in params:
+            ids = params['ids'].split(',')
+            if any(self.__expired(id) for id in ids):
+                return 400, {'error': {'message': '(#100) Unknown report run id', 'type': 'OAuthException',
+                                       'code': 100}}, 'application/json'
+            return 200, dict((id, self.__object(id)) for id in ids), 'application/json'
+        if parts == ['debug_token']:
+            return 200, {'data': {'app_id': '1', 'is_valid': True, 'user_id': '1', 'application': 'benchmark',
+                                  'expires_at': 0, 'issued_at': 0, 'scopes': []}}, 'application/json'
+        if len(parts) == 2 and parts[1] in self.connections:
+            return 200, self.__page(parts, params, self.connections[parts[1]]), 'application/json'
+        if parts == ['oauth', 'access_token']:
+            return 200, 'access_token=long_lived_%s&expires=5183999' % params.get('fb_exchange_token'), 'text/plain'
+        if parts[1:] == ['adgroups']:
+            return 200, self.__page(parts, params, self.rows('adgroups', self.total_rows)), 'application/json'
+        if parts[1:] == ['adgroupstats']:
+            return 200, self.encoded('adgroupstats', self.stats_rows), 'application/json'
+        if parts[1:] == ['adimages']:
+            return 200, self.encoded('adimages', self.image_rows), 'application/json'
+        if parts[1:] == ['reportstats']:
+            return 200, {'data': self.rows('adgroupstats', 10)}, 'application/json'
+        if len(parts) == 2:
+            limit = int(params.get('limit', 25))
+            return 200, {'data': [{'id': str(6000000000000 + i), 'name': 'object %d' % i} for i in range(limit)]}, \
+                'application/json'
+        return 200, self.__object(parts[0] if parts else ''), 'application/json'
+
+    def __answer_batch(self, operations):
+        failed = set()
+        answers = []
+        for operation in operations:
+            references = REFERENCE_PATTERN.findall(
+                urllib.unquote_plus(operation['relative_url'] + operation.get('body', '')))
+            answer = None if failed.intersection(references) else self.__answer_operation(operation)
+            if operation.get('name') and (answer is None or answer['code'] >= 400):
+                failed.add(operation['name'])
+            answers.append(answer)
+        return answers
+
+    def __answer_operation(self, operation):
+        url = urlparse(operation['relative_url'].encode('utf-8'))
+        params = query_params(url.query)
+        params.update(query_params(operation.get('body', '').encode('utf-8')))
+        status, body, content_type = self.answer(operation['method'], '/' + url.path.lstrip('/'), params)
+        return {'code': status, 'headers': [{'name': 'Content-Type', 'value': content_type}],
+                'body': body if isinstance(body, basestring) else json.dumps(body)}
+
+    def __answer_post(self, parts, params):
+        if parts[1:] == ['adimages']:
+            filename, content = params.get('file') or ('benchmark.png', '')
+            image = dict(payloads.adimages(1)[0], hash=md5(content).hexdigest())
+            return 200, {'images': {filename: image}}, 'application/json'
+        if parts[1:] == ['reportstats'] and params.get('async') == 'true':
+            with self.__lock:
+                report_run_id = str(next(self.__report_ids))
+                final_status = 'Job Failed' if parts[0].startswith('failing_') else 'Job Completed'
+                if parts[0].startswith('expiring_'):
+                    final_status = None
+                self.__reports[report_run_id] = [self.report_polls, final_status]
+            # Facebook answers with the bare id of the report run
+            return 200, report_run_id, 'application/json'
+        if len(parts) == 1:
+            return 200, {'success': True}, 'application/json'
+        return 200, {'id': '6000000000001'}, 'application/json'
+
+    def __expired(self, id):
+        with self.__lock:
+            return id in self.__reports and self.__reports[id][1] is None
+
+    def __object(self, id):
+        with self.__lock:
+            if id in self.__reports:
+                report = self.__reports[id]
+                report[0] -= 1
+                done = report[0] <= 0
+                return {'id': id, 'async_status': report[1] if done else 'Job Running',
+                        'async_percent_completion': 100 if done else 50}
+        return {'id': id, 'name': 'benchmark object'}
+
+    def __page(self, parts, params, rows):
+        """
+        A page of rows, with a next link while there are rows left, as Facebook pages connections.
+
+        """
+        for rule in json.loads(params.get('filtering', '[]')):
+            if rule['operator'] == 'GREATER_THAN':
+                rows = [row for row in rows if row.get(rule['field']) and timestamp(row[rule['field']]) > rule['value']]
+        limit = int(params.get('limit', 25))
+        start = int(params.get('after', 0))
+        end = min(start + limit, len(rows))
+        response = {'data': rows[start:end], 'paging': {'cursors': {'before': str(start), 'after': str(end)}}}
+        if end < len(rows):
+            response['paging']['next'] = '%s/%s?limit=%d&after=%d' % (self.url, '/'.join(parts), limit, end)
+        return response
+
+    def rows(self, name, count):
+        """
+        :rtype list: count rows of the named payload, built once and kept
+
+        """
+        key = (name, count)
+        with self.__lock:
+            if key not in self.__rows:
+                self.__rows[key] = getattr(payloads, name)(count)
+            return self.__rows[key]
+
+    def encoded(self, name, count):
+        """
+        :rtype str: A response holding count rows of the named payload, encoded once and kept,
+                    so the server's own JSON encoding doesn't weigh on what is measured
+
+        """
+        key = (name, count)
+        data = self.rows(name, count)
+        with self.__lock:
+            if key not in self.__encoded:
+                self.__encoded[key] = json.dumps({'data': data})
+            return self.__encoded[key]
+
+    def count_request(self):
+        with self.__lock:
+            self.request_count += 1
+
+    def use_call(self):
+        """
+        Counts a call against call_limit, which resets every `window` seconds.
+
+        :rtype int: The percentage of the limit used, over 100 if this call is throttled
+
+        """
+        with self.__lock:
+            now = time.time()
+            if now - self.__window_start >= self.window:
+                self.__window_start = now
+                self.__window_calls = 0
+            self.__window_calls += 1
+            usage = 100 * self.__window_calls // self.call_limit
+            if usage > 100:
+                self.throttled_count += 1
+            return usage
+
+    def process_request_thread(self, request, client_address):
+        with self.__lock:
+            self.__sockets[request] = threading.current_thread()
+        try:
+            SocketServer.ThreadingMixIn.process_request_thread(self, request, client_address)
+        finally:
+            with self.__lock:
+                self.__sockets.pop(request, None)
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving, closes the connections clients are keeping alive, and waits for the threads serving them.
+
+        """
+        self.shutdown()
+        self.server_close()
+        with self.__lock:
+            sockets = self.__sockets.items()
+        for request, thread in sockets:
+            try:
+                # the thread serving the connection reads the end of it, and closes it
+                request.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+            thread.join(1.0)
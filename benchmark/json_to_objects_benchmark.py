@@ -0,0 +1,48 @@
+"""
+Compares building TinyModels from decoded Graph responses directly against the old dump-and-parse path.
+
+Run from the repository root:
+
+    python -m benchmark.json_to_objects_benchmark --rows 5000
+
+"""
+import copy
+import json
+import time
+import argparse
+
+from pyfacebook import models
+from pyfacebook.utils import json_to_objects
+from benchmark import payloads
+
+
+def dump_and_parse(data, model):
+    """ The json_to_objects path before dicts were handed to models directly. """
+    return [model(from_json=json.dumps(obj)) for obj in data]
+
+
+def best_of(repeat, func, data, model):
+    timings = []
+    for _ in range(repeat):
+        rows = copy.deepcopy(data)
+        start = time.time()
+        func(rows, model)
+        timings.append(time.time() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for name, model, data in (('adgroupstats', models.AdStatistic, payloads.adgroupstats(args.rows)),
+                              ('adgroups', models.AdGroup, payloads.adgroups(args.rows))):
+        before = best_of(args.repeat, dump_and_parse, data, model)
+        after = best_of(args.repeat, json_to_objects, data, model)
+        print "%-14s %6d rows  dump+parse %8.3fs  direct %8.3fs  speedup %.2fx" % (name, args.rows, before, after, before / after)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Graph API payloads shaped like the responses recorded for the test account.
+
+"""
+import random
+
+
+def adgroupstats(rows, account_id=106929496119713, seed=0):
+    """
+    Rows of an adgroupstats response.
+
+    :param int rows: The number of AdStatistic rows
+    :rtype list: A list of dicts
+
+    """
+    rand = random.Random(seed)
+    data = []
+    for index in range(rows):
+        impressions = rand.randint(0, 100000)
+        clicks = rand.randint(0, impressions // 50 + 1)
+        data.append({
+            'id': '%d/stats/0/%d' % (6010000000000 + index, 1393632000 + index % 24 * 3600),
+            'account_id': account_id,
+            'adcampaign_id': 6000000000000 + index % 100,
+            'adgroup_id': 6010000000000 + index,
+            'impressions': impressions,
+            'clicks': clicks,
+            'spent': rand.randint(0, 50000),
+            'social_impressions': impressions // 3,
+            'social_clicks': clicks // 3,
+            'social_spent': rand.randint(0, 10000),
+            'unique_impressions': impressions // 2,
+            'unique_clicks': clicks // 2,
+            'social_unique_impressions': impressions // 6,
+            'social_unique_clicks': clicks // 6,
+            'start_time': '2014-03-01T%02d:00:00+0000' % (index % 24),
+            'end_time': '2014-03-01T%02d:59:59+0000' % (index % 24),
+        })
+    return data
+
+
+def adgroups(rows, account_id=106929496119713, seed=0):
+    """
+    Rows of an adgroups response.
+
+    :param int rows: The number of AdGroup rows
+    :rtype list: A list of dicts
+
+    """
+    rand = random.Random(seed)
+    data = []
+    for index in range(rows):
+        data.append({
+            'id': str(6010000000000 + index),
+            'name': 'Disco Test-%02d' % (index % 100),
+            'account_id': account_id,
+            'campaign_id': 6000000000000 + index % 100,
+            'adgroup_status': rand.choice(['ACTIVE', 'PAUSED', 'DELETED']),
+            'bid_type': 'CPC',
+            'bid_info': {'CLICKS': rand.randint(1, 500)},
+            'creative_ids': [6015666284951],
+            'targeting': {'genders': [1], 'age_min': 18, 'age_max': 50, 'geo_locations': {'countries': ['GB']}},
+            'last_updated_by_app_id': 1,
+            'created_time': '2014-03-01T00:00:00+0000',
+            'updated_time': '2014-03-%02dT00:00:00+0000' % (1 + index % 28),
+        })
+    return data
+
+
+def adimages(rows, seed=0):
+    """
+    Rows of an adimages response.
+
+    :param int rows: The number of AdImage rows
+    :rtype list: A list of dicts
+
+    """
+    rand = random.Random(seed)
+    data = []
+    for index in range(rows):
+        image_hash = '%032x' % rand.getrandbits(128)
+        data.append({
+            'hash': image_hash,
+            'url': 'https://fbcdn-creative-a.akamaihd.net/hads-ak-prn2/t45.1600-4/%s.png' % image_hash,
+        })
+    return data
@@ -0,0 +1,58 @@
+"""
+Compares Graph calls per second with and without the pooled session.
+
+Run from the repository root:
+
+    python -m benchmark.session_benchmark --calls 2000 --threads 8
+
+"""
+import time
+import argparse
+import threading
+
+from pyfacebook import models, PyFacebook
+from benchmark.graph_server import GraphServer
+
+
+def run(pyfb, calls, threads):
+    """
+    GETs an AdAccount `calls` times, split across `threads` threads sharing one PyFacebook.
+
+    :rtype float: Calls per second
+
+    """
+    per_thread = calls // threads
+
+    def worker():
+        for _ in range(per_thread):
+            pyfb.get(model=models.AdAccount, id='act_1', return_json=True)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.time()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return (per_thread * threads) / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--pool-maxsize', type=int, default=10)
+    args = parser.parse_args()
+
+    server = GraphServer(latency=args.latency).start()
+    try:
+        for use_session in (False, True):
+            pyfb = PyFacebook(token_text='benchmark', call_token_debug=False, facebook_graph_url=server.url,
+                              use_session=use_session, pool_maxsize=args.pool_maxsize)
+            print "session %-3s %10.1f calls/s" % ('on' if use_session else 'off', run(pyfb, args.calls, args.threads))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
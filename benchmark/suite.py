@@ -0,0 +1,246 @@
+"""
+Measures PyFacebook against a local stand-in for the Graph API, and stores the results so versions can be compared.
+
+Each scenario is run for a number of iterations, and reports throughput, latency percentiles,
+the CPU time it used and how much the process grew. Results are written to benchmark/results
+as JSON, one file per run. Pass an earlier file to --compare to see what got slower.
+
+Run from the repository root:
+
+    python -m benchmark.suite
+    python -m benchmark.suite --latency 0.05 --only get_adgroupstats get_adgroups_paged
+    python -m benchmark.suite --compare benchmark/results/1.1.12-20140301T000000.json
+
+"""
+import os
+import gc
+import json
+import time
+import copy
+import argparse
+import datetime
+import platform
+import resource
+import threading
+import subprocess
+
+from collections import OrderedDict
+
+from pyfacebook import models, PyFacebook
+from pyfacebook.ratelimit import RateLimiter
+from pyfacebook.utils import FacebookException, json_to_objects, percentile
+from benchmark import payloads
+from benchmark.graph_server import GraphServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# Measures where a higher number is better. For every other measure, lower is better.
+HIGHER_IS_BETTER = ('throughput',)
+COMPARED = ('throughput', 'latency_p50', 'latency_p90', 'latency_p99', 'cpu_seconds', 'rss_growth_kb')
+
+
+def max_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def cpu_seconds():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def measure(call, iterations, threads=1):
+    """
+    Runs call `iterations` times, split across `threads` threads, timing each run.
+
+    :param function call: What to measure. Takes no arguments.
+    :param int iterations: How many times to run call
+    :param int threads: How many threads to run call on at once
+    :rtype dict: Throughput in runs per second, latency percentiles in seconds, CPU seconds and RSS growth in KB
+
+    """
+    latencies = []
+    lock = threading.Lock()
+    per_thread = max(1, iterations // threads)
+
+    def worker():
+        mine = []
+        for _ in range(per_thread):
+            start = time.time()
+            call()
+            mine.append(time.time() - start)
+        with lock:
+            latencies.extend(mine)
+
+    gc.collect()
+    rss_before = max_rss_kb()
+    cpu_before = cpu_seconds()
+    start = time.time()
+    if threads == 1:
+        worker()
+    else:
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    elapsed = time.time() - start
+
+    latencies.sort()
+    return OrderedDict([
+        ('iterations', len(latencies)),
+        ('threads', threads),
+        ('elapsed', elapsed),
+        ('throughput', len(latencies) / elapsed if elapsed else 0.0),
+        ('latency_p50', percentile(latencies, 50)),
+        ('latency_p90', percentile(latencies, 90)),
+        ('latency_p99', percentile(latencies, 99)),
+        ('latency_max', latencies[-1] if latencies else 0.0),
+        ('cpu_seconds', cpu_seconds() - cpu_before),
+        ('rss_growth_kb', max_rss_kb() - rss_before),
+        ('rss_peak_kb', max_rss_kb()),
+    ])
+
+
+def expect_error(call, *args, **kwargs):
+    try:
+        call(*args, **kwargs)
+    except FacebookException:
+        return
+    raise AssertionError('Expected a FacebookException')
+
+
+def scenarios(pyfb, throttled_pyfb, args):
+    """
+    :rtype OrderedDict: Scenario names, and the calls they measure
+
+    """
+    stats_rows = payloads.adgroupstats(args.rows)
+    adgroup_rows = payloads.adgroups(args.rows)
+    stats_objects = json_to_objects(copy.deepcopy(stats_rows), models.AdStatistic)
+    adgroup_objects = json_to_objects(copy.deepcopy(adgroup_rows), models.AdGroup)
+
+    return OrderedDict([
+        ('get_object', lambda: pyfb.get(model=models.AdAccount, id='act_1')),
+        ('get_adgroups_paged', lambda: list(pyfb.iter_connection(models.AdGroup, 'act_1', 'adgroups',
+                                                                 limit=args.page_size))),
+        ('get_adgroupstats', lambda: pyfb.get(model=models.AdStatistic, id='act_1', connection='adgroupstats')),
+        ('get_adimages', lambda: pyfb.get(model=models.AdImage, id='act_1', connection='adimages')),
+        ('get_error', lambda: expect_error(pyfb.get, model=models.AdAccount, id='error_1')),
+        ('get_unavailable', lambda: expect_error(pyfb.get, model=models.AdAccount, id='unavailable_1')),
+        ('get_throttled', lambda: throttled_pyfb.get(model=models.AdAccount, id='act_1', return_json=True)),
+        ('post', lambda: pyfb.post(model=models.AdSet, id='act_1', connection='adcampaigns',
+                                   name='benchmark', campaign_status='PAUSED', return_json=True)),
+        ('delete', lambda: pyfb.delete('6010000000001')),
+        ('json_to_objects_adgroupstats', lambda: json_to_objects(copy.deepcopy(stats_rows), models.AdStatistic)),
+        ('json_to_objects_adgroups', lambda: json_to_objects(copy.deepcopy(adgroup_rows), models.AdGroup)),
+        ('to_json_adgroupstats', lambda: [obj.to_json(return_dict=True) for obj in stats_objects]),
+        ('to_json_adgroups', lambda: [obj.to_json(return_dict=True) for obj in adgroup_objects]),
+    ])
+
+
+def version():
+    """
+    :rtype str: The git description of the checked out tree, or 'unknown' outside a git checkout
+
+    """
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'],
+                                       stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline, tolerance):
+    """
+    Lists what changed by more than tolerance percent from a baseline run.
+
+    :param dict results: The scenario results of this run
+    :param dict baseline: The scenario results of an earlier run
+    :param float tolerance: The percentage change under which a measure counts as unchanged
+    :rtype list: (scenario, measure, baseline value, value, percent change, is a regression) tuples
+
+    """
+    changes = []
+    for name, measures in results.items():
+        if name not in baseline:
+            continue
+        for measure_name in COMPARED:
+            before, after = baseline[name].get(measure_name), measures.get(measure_name)
+            if not before or after is None:
+                continue
+            change = 100.0 * (after - before) / before
+            if abs(change) < tolerance:
+                continue
+            worse = change < 0 if measure_name in HIGHER_IS_BETTER else change > 0
+            changes.append((name, measure_name, before, after, change, worse))
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the stand-in waits before each answer')
+    parser.add_argument('--rows', type=int, default=2000, help='Rows in large responses and conversions')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--only', nargs='+', help='Scenarios to run, all of them by default')
+    parser.add_argument('--label', help='Names the results file. Defaults to the git description of the tree.')
+    parser.add_argument('--compare', help='A results file to compare this run against')
+    parser.add_argument('--tolerance', type=float, default=10.0, help='Percent change reported by --compare')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    server = GraphServer(latency=args.latency, total_rows=args.rows, stats_rows=args.rows, record=False).start()
+    throttled_server = GraphServer(latency=args.latency, call_limit=50, window=1.0, record=False).start()
+    try:
+        pyfb = PyFacebook(token_text='benchmark', call_token_debug=False, facebook_graph_url=server.url)
+        throttled_pyfb = PyFacebook(token_text='benchmark', call_token_debug=False,
+                                    facebook_graph_url=throttled_server.url,
+                                    rate_limiter=RateLimiter(rate=40, burst=10, base_backoff=0.1))
+        results = OrderedDict()
+        for name, call in scenarios(pyfb, throttled_pyfb, args).items():
+            if args.only and name not in args.only:
+                continue
+            call()  # warm up connections and caches
+            results[name] = measure(call, args.iterations, args.threads)
+            print "%-30s %10.1f/s  p50 %8.4fs  p90 %8.4fs  p99 %8.4fs  cpu %7.3fs  rss +%dKB" % (
+                name, results[name]['throughput'], results[name]['latency_p50'], results[name]['latency_p90'],
+                results[name]['latency_p99'], results[name]['cpu_seconds'], results[name]['rss_growth_kb'])
+        throttled = throttled_server.throttled_count
+    finally:
+        server.stop()
+        throttled_server.stop()
+    print "calls throttled by the stand-in: %d" % throttled
+
+    run = OrderedDict([
+        ('version', version()),
+        ('label', args.label),
+        ('created_time', datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('options', vars(args)),
+        ('results', results),
+    ])
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        print "\ncompared with %s (%s):" % (args.compare, baseline.get('version'))
+        changes = compare(results, baseline['results'], args.tolerance)
+        for name, measure_name, before, after, change, worse in changes:
+            print "%-30s %-14s %12.4f -> %12.4f  %+7.1f%%  %s" % (name, measure_name, before, after, change,
+                                                                 'REGRESSION' if worse else 'improved')
+        if not changes:
+            print "no change over %.0f%%" % args.tolerance
+
+    if not args.no_save:
+        if not os.path.isdir(RESULTS_DIR):
+            os.makedirs(RESULTS_DIR)
+        filename = os.path.join(RESULTS_DIR, '%s-%s.json' % (args.label or run['version'],
+                                                             run['created_time'].replace('-', '').replace(':', '')))
+        with open(filename, 'w') as results_file:
+            json.dump(run, results_file, indent=2)
+        print "\nresults saved to %s" % filename
+
+
+if __name__ == '__main__':
+    main()
@@ -3,16 +3,35 @@ import pytz
 import requests
 import datetime
 import warnings
+import threading
+import urllib
 import inflection
 
 from urlparse import parse_qs
 from pyfacebook import models
+from pyfacebook.batch import GraphBatch
+from pyfacebook.instrumentation import CallInfo
+from pyfacebook.coalesce import SingleFlight
+from pyfacebook.paging import ConnectionIterator
+from pyfacebook import fanout
+from pyfacebook import changes
+from pyfacebook import cleanup
+from pyfacebook import reports
+from pyfacebook.lazy import json_to_lazy_objects
+from pyfacebook.stats import StatisticSet
+from pyfacebook.streaming import StreamedResponse
+from pyfacebook.uploads import MultipartStream, upload_image, upload_images
+from pyfacebook.profiles import get_request_profile
 from simplejson.decoder import JSONDecodeError
 from pprint import pprint
 
 from pyfacebook.utils import(
     FacebookException,
+    chunk_ids,
     json_to_objects,
+    make_session,
+    standardize_response,
+    utf8_params,
 )
 
 
@@ -25,7 +44,11 @@ class PyFacebook(object):
 
     def __init__(self, app_id=None, app_secret=None, token_text=None,
                  use_long_lived_tokens=True, call_token_debug=True,
-                 facebook_graph_url='https://graph.facebook.com'):
+                 facebook_graph_url='https://graph.facebook.com',
+                 use_session=True, session=None, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, timeout=None, token_cache=None, response_cache=None,
+                 rate_limiter=None, mirror=None, coalesce_requests=False, retry_policy=None,
+                 instrumentation=None, image_index=None, track_changes=False):
         """
         Initializes an object of the Facebook class. Sets local vars and establishes a connection.
 
@@ -33,16 +56,60 @@ class PyFacebook(object):
         :param str app_secret: Facebook app_secret
         :param str token_text: Facebook access_token
         :param bool call_token_debug: wether to validate or not the token_text.
+        :param bool use_session: If True, Graph calls go through a pooled keep-alive session instead of one connection per call.
+        :param requests.Session session: An existing session to share between PyFacebook instances. Overrides the pool settings.
+        :param int pool_connections: The number of per-host connection pools to keep.
+        :param int pool_maxsize: The maximum number of connections kept alive per host.
+        :param bool pool_block: If True, callers wait for a free connection instead of opening more than pool_maxsize per host.
+        :param float timeout: Seconds to wait for Facebook to respond before giving up. None waits forever.
+        :param tokens.TokenCache token_cache: A cache of validated tokens. If given, known tokens aren't validated again,
+                                              and tokens about to expire are exchanged on a background thread.
+        :param cache.ResponseCache response_cache: A cache GET responses are served from until they expire.
+        :param ratelimit.RateLimiter rate_limiter: Paces calls to stay under Facebook's rate limits and retries throttled ones.
+        :param mirror.ObjectMirror mirror: A local copy every object returned by a GET, batched or not, is stored in.
+        :param < bool | coalesce.SingleFlight > coalesce_requests: If True, identical GETs made at the same time from
+                                                                   several threads share one call. Pass a SingleFlight
+                                                                   to share calls between PyFacebook instances too.
+        :param retry.RetryPolicy retry_policy: Retries transient failures and fails fast while an endpoint is down.
+        :param instrumentation.Instrumentation instrumentation: Hooks called around every Graph API call.
+        :param uploads.ImageIndex image_index: Remembers uploaded images, so an image isn't uploaded to an account twice.
+        :param bool track_changes: If True, objects returned by a GET remember the values they were loaded with,
+                                   so update only sends the fields changed since.
 
         """
         self.__use_long_lived_tokens = use_long_lived_tokens
         self.__facebook_graph_url = facebook_graph_url
 
+        self.timeout = timeout
+        if session is not None:
+            self.session = session
+        elif use_session:
+            self.session = make_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        else:
+            self.session = None
+
+        self.token_cache = token_cache
+        self.response_cache = response_cache
+        self.rate_limiter = rate_limiter
+        self.mirror = mirror
+        self.retry_policy = retry_policy
+        self.instrumentation = instrumentation
+        self.image_index = image_index
+        self.track_changes = track_changes
+        if isinstance(coalesce_requests, SingleFlight):
+            self.single_flight = coalesce_requests
+        else:
+            self.single_flight = SingleFlight() if coalesce_requests else None
         self.app_id = app_id
         self.app_secret = app_secret
         self.call_token_debug = call_token_debug
+        self.__token_lock = threading.Lock()
         if self.call_token_debug:
-            self.access_token = self.validate_access_token(token_text=token_text)
+            my_token = self.validate_access_token(token_text=token_text)
+            with self.__token_lock:
+                # a background refresh may already have swapped in a new token
+                if getattr(self, 'access_token', None) is None:
+                    self.access_token = my_token
         else:
             self.access_token = models.Token(text=token_text)
 
@@ -63,9 +130,12 @@ class PyFacebook(object):
         if token_dict.get('error'):
             raise FacebookException(message=token_dict['error']['message'], code=token_dict['error']['code'])
         token_dict['text'] = input_token_text
-        return models.Token(from_json=json.dumps(token_dict))
+        if self.token_cache is not None:
+            self.token_cache.set(input_token_text, token_dict)
+        return models.Token(from_json=token_dict, preprocessed=True)
 
-    def __call_endpoint(self, model, id, connection, http_method, params, return_json):
+    def __call_endpoint(self, model, id, connection, http_method, params, return_json, lazy=False, columnar=False,
+                        idempotent=None):
         """
         Creates a properly-formatted Facebook Graph API endpoint from id and connection parameters.
         Performs an endpoint call and returns the result.
@@ -76,16 +146,28 @@ class PyFacebook(object):
         :param str http_method: The type of call to make
         :param dict params: The params to send in the call
         :param bool return_json: If True, the call returns a dict instead of TinyModel objects
+        :param bool lazy: If True, the call returns LazyModels that decode fields as they're read
+        :param bool columnar: If True, the call returns AdStatistic rows as a StatisticSet
+        :param bool idempotent: Whether the call may be retried. See call_graph_api.
 
         """
-        endpoint = str(id or model.endpoint or model.__name__.lower())
-
+        endpoint = str(id) if id else get_request_profile(model).endpoint
         if connection:
             endpoint += ('/' + connection)
 
-        fb_response = self.call_graph_api(endpoint=endpoint, http_method=http_method, params=params)
-        if not return_json:
+        fb_response = self.call_graph_api(endpoint=endpoint, http_method=http_method, params=params, model=model,
+                                          idempotent=idempotent)
+        if self.mirror is not None and http_method == 'GET' and isinstance(fb_response['data'], list):
+            account_id = id if str(id).startswith('act_') else None
+            self.mirror.put(model, fb_response['data'], account_id=account_id)
+        if columnar:
+            fb_response['data'] = StatisticSet.from_rows(fb_response['data'])
+        elif lazy:
+            fb_response['data'] = json_to_lazy_objects(fb_response['data'], model)
+        elif not return_json:
             fb_response['data'] = json_to_objects(fb_response['data'], model)
+            if self.track_changes and http_method == 'GET':
+                changes.remember_all(fb_response['data'])
 
         return fb_response
 
@@ -124,24 +206,15 @@ class PyFacebook(object):
         This is obviously an extremely destructive method so USE CAUTION!!!
 
         """
-        adgroups = self.get(model=models.AdGroup, id=account_id, connection='adgroups')['data']
-        for adgroup in adgroups:
-            self.delete(id=adgroup.id)
-        print "DELETED", len(adgroups), "ADGROUPS"
-
-        adcreatives = self.get(model=models.AdCreative, id=account_id, connection='adcreatives')['data']
-        for adcreative in adcreatives:
-            self.delete(id=adcreative.id)
-        print "DELETED", len(adcreatives), "ADCREATIVES"
-
-        adcampaigns = self.get(model=models.AdSet, id=account_id, connection='adcampaigns')['data']
-        for adcampaign in adcampaigns:
-            self.delete(id=adcampaign.id)
-        print "DELETED", len(adcampaigns), "ADCAMPAIGNS"
+        result = self.bulk_delete(account_id, connections=['adgroups', 'adcreatives', 'adcampaigns'])
+        for connection, stats in result.stats.items():
+            print "DELETED", stats['deleted'], connection.upper()
 
     def validate_access_token(self, token_text, input_token_text=None):
         """
         Calls the Facebook token debug endpoint, to validate the access token and provide token info.
+        With a token_cache, cached tokens are returned without a call, and a token about to expire is
+        returned as-is while it is exchanged for a long-lived one in the background.
 
         :param str token_text: The oauth token used to access your Facebook app
         :param str input_token_text: The token you wish to validate. This will default to token_text if not provided.
@@ -150,12 +223,22 @@ class PyFacebook(object):
         """
         if not input_token_text:
             input_token_text = token_text
-        my_token = self.__call_token_debug(token_text, input_token_text)
+        my_token = None
+        if self.token_cache is not None:
+            my_token = self.token_cache.get(input_token_text)
+        if my_token is None:
+            my_token = self.__call_token_debug(token_text, input_token_text)
 
         token_expires_soon = my_token.expires_at and \
             my_token.expires_at > datetime.datetime(1970, 1, 1, 0, 0) and \
             (my_token.expires_at - datetime.datetime.utcnow()).days < 1
-        if self.__use_long_lived_tokens and token_expires_soon:
+        if self.__use_long_lived_tokens and token_expires_soon and self.token_cache is not None:
+            if self.token_cache.start_refresh(input_token_text):
+                refresh = threading.Thread(target=self.__refresh_access_token, args=(input_token_text, my_token))
+                refresh.daemon = True
+                refresh.start()
+            return my_token
+        elif self.__use_long_lived_tokens and token_expires_soon:
             my_new_token = self.exchange_access_token(current_token=my_token, app_id=self.app_id, app_secret=self.app_secret)
             warnings.warn("WARNING: Your current Facebook API token is about to expire.\n"
                           "Replace your stored token with this new one:\n" + my_new_token.text)
@@ -163,6 +246,29 @@ class PyFacebook(object):
         else:
             return my_token
 
+    def __refresh_access_token(self, token_text, current_token):
+        """
+        Exchanges a token that is about to expire for a long-lived one, on a background thread.
+        The new token replaces this instance's access_token, and is cached under the old token text too,
+        so clients built with the old text pick it up without another exchange.
+
+        :param str token_text: The token text the token was looked up by
+        :param models.Token current_token: The token about to expire
+
+        """
+        try:
+            my_new_token = self.exchange_access_token(current_token=current_token, app_id=self.app_id, app_secret=self.app_secret)
+            if isinstance(my_new_token, basestring):
+                my_new_token = models.Token(text=my_new_token)
+            self.token_cache.alias(token_text, my_new_token.text)
+            with self.__token_lock:
+                if getattr(self, 'access_token', None) is None or self.access_token.text == current_token.text:
+                    self.access_token = my_new_token
+            warnings.warn("WARNING: Your current Facebook API token is about to expire.\n"
+                          "Replace your stored token with this new one:\n" + my_new_token.text)
+        finally:
+            self.token_cache.finish_refresh(token_text)
+
     def exchange_access_token(self, current_token=None, app_id='', app_secret=''):
         """
         Exchange an existing token for a new long-term token.
@@ -186,59 +292,202 @@ class PyFacebook(object):
         else:
             return new_token_text
 
-    def call_graph_api(self, endpoint, http_method='GET', expect_json=True, params={}):
+    def encode_params(self, params):
+        """
+        Encodes params in place the way Facebook expects them.
+        Iterables are dumped to JSON where possible and dates are converted to UTC strings.
+
+        :param dict params: A dict of params to attach to a graph API call.
+        :rtype dict: The same dict, encoded
+
+        """
+        for key, val in params.items():
+            if isinstance(val, (list, dict, tuple, set)):
+                try:
+                    params[key] = json.dumps(val)
+                except (TypeError, ValueError):
+                    pass
+            elif isinstance(val, (datetime.date, datetime.datetime)):
+                params[key] = self.__convert_datetime_to_facebook(key, val)
+        return params
+
+    def batch(self):
+        """
+        Starts a batch of GET, POST and DELETE operations, sent together through the Graph API batch parameter.
+
+        :rtype GraphBatch: An empty batch bound to this PyFacebook instance
+
+        """
+        return GraphBatch(self)
+
+    def call_graph_api(self, endpoint, http_method='GET', expect_json=True, params={}, model=None, idempotent=None,
+                       cache=True):
         """
         This method calls the Facebook graph api, given an endpoint and a set of params.
 
         :param str endpoint: The endpoint to call.
         :param str http_method: The http method to use. Currently supports only GET, POST and DELETE
         :param dict params: A dict of params to attach to the graph API call.
+        :param tinymodel.TinyModel model: The class the response will be read as, if any. Picks the cache TTL.
+        :param bool idempotent: Whether the call may be retried. Defaults to True for GET and DELETE, False for POST.
+        :param bool cache: If False, a GET is neither answered from nor kept in the response cache,
+                           e.g. when polling something that changes between calls.
 
         :rtype dict: A dict representing the json-decoded result from Facebook.
 
+        """
+        return self.__instrument(endpoint, http_method, model, lambda info: self.__call_graph_api(
+            endpoint, http_method, expect_json, params, model, idempotent, info, cache))
+
+    def __instrument(self, endpoint, http_method, model, call):
+        """
+        Runs a call between the before and after hooks of the instrumentation, if there are any.
+
+        :param function call: Makes the call. Takes the CallInfo to fill in, or None if the call isn't instrumented.
+        :rtype: Whatever call returns
+
+        """
+        if not self.instrumentation:
+            return call(None)
+
+        info = CallInfo(endpoint, http_method, model)
+        self.instrumentation.before(info)
+        try:
+            result = call(info)
+        except Exception, e:
+            if info.status is None:
+                info.status = getattr(e, 'status_code', None)
+            info.finish(error=e)
+            self.instrumentation.error(info, e)
+            raise
+        info.finish()
+        self.instrumentation.after(info)
+        return result
+
+    def __call_graph_api(self, endpoint, http_method, expect_json, params, model, idempotent, info=None, cache=True):
+        """
+        Does the work of call_graph_api, filling in info as it goes if the call is instrumented.
+
         """
         # Append access_token if not sent in params
         if not (params.get('access_token') or params.get('fb_exchange_token')) and hasattr(self, 'access_token'):
             params['access_token'] = self.access_token.text
 
-        # Dump iterable params to JSON if possible
-        for key, val in params.items():
-            if isinstance(val, (list, dict, tuple, set)):
-                try:
-                    params[key] = json.dumps(val)
-                except (TypeError, ValueError):
-                    pass
-            elif isinstance(val, (datetime.date, datetime.datetime)):
-                params[key] = self.__convert_datetime_to_facebook(key, val)
+        self.encode_params(params)
+
+        if http_method != 'GET':
+            try:
+                return self.__send(endpoint, http_method, expect_json, params, idempotent, info, model=model)
+            finally:
+                if self.response_cache is not None:
+                    self.response_cache.invalidate(endpoint, params)
+
+        response_cache = self.response_cache if cache else None
+        if response_cache is not None:
+            json_response = response_cache.get(endpoint, params)
+            if json_response is not None:
+                if info is not None:
+                    info.cache_hit = True
+                return json_response
+
+        if self.single_flight is not None:
+            # The call is made once for every thread waiting on it, so what it records is shared with all of them
+            def send_shared():
+                flight_info = CallInfo(endpoint, http_method, model)
+                return self.__send(endpoint, http_method, expect_json, params, idempotent, flight_info,
+                                   model=model), flight_info
+
+            json_response, flight_info = self.single_flight.do(self.single_flight.key(endpoint, params), send_shared)
+            if info is not None:
+                info.status, info.bytes, info.attempts = flight_info.status, flight_info.bytes, flight_info.attempts
+        else:
+            json_response = self.__send(endpoint, http_method, expect_json, params, idempotent, info, model=model)
+
+        if response_cache is not None and isinstance(json_response, dict):
+            response_cache.set(endpoint, params, json_response, model)
+        return json_response
+
+    def __send(self, endpoint, http_method, expect_json, params, idempotent=None, info=None, request=None, model=None):
+        """
+        Sends a call to the Facebook graph api, through the rate limiter and the retry policy if there are any.
+
+        :param function request: Makes one attempt at the call. Takes the same arguments as __request, its default.
+        :param tinymodel.TinyModel model: The class associated with the objects called. It names the breaker of a bare id.
+
+        """
+        request = request or self.__request
+
+        def send():
+            return request(endpoint, http_method, expect_json, params, info)
+
+        def send_limited():
+            return self.rate_limiter.call(endpoint, params, send)
+
+        call = send if self.rate_limiter is None else send_limited
+        if self.retry_policy is None:
+            return call()
+        result, retries = self.retry_policy.call(endpoint, http_method, call, idempotent=idempotent, model=model)
+        return result
+
+    def __request(self, endpoint, http_method, expect_json, params, info=None):
+        """
+        Sends a call to the Facebook graph api and parses its response.
+
+        :param str endpoint: The endpoint to call.
+        :param str http_method: The http method to use.
+        :param bool expect_json: If False, a response that isn't JSON is returned as text instead of raising.
+        :param dict params: The encoded params to send.
+        :param instrumentation.CallInfo info: Where to record the status and size of the response, if anywhere.
+
+        :rtype dict: A dict representing the json-decoded result from Facebook.
+
+        """
+        if info is not None:
+            info.attempts += 1
 
         # MAKE THE CALL
         url = self.__facebook_graph_url
+        http = self.session or requests
         if http_method == 'GET':
-            response = requests.get(url + '/' + endpoint, params=params)
+            response = http.get(url + '/' + endpoint, params=params, timeout=self.timeout)
         elif http_method == 'POST':
-            post_file = params.pop('file', None)
-            if post_file:
-                response = requests.post(url + '/' + endpoint, files=post_file, data=params)
+            post_file = params.get('file')
+            if isinstance(post_file, MultipartStream):
+                # Other params go in the query string, so the body is only the streamed file
+                post_file.rewind()
+                params = dict((key, val) for key, val in params.items() if key != 'file')
+                response = http.post(url + '/' + endpoint, params=params, data=post_file,
+                                     headers={'Content-Type': post_file.content_type}, timeout=self.timeout)
+            elif post_file:
+                params = dict((key, val) for key, val in params.items() if key != 'file')
+                response = http.post(url + '/' + endpoint, files=post_file, data=params, timeout=self.timeout)
             else:
-                response = requests.post(url + '/' + endpoint, data=params)
+                response = http.post(url + '/' + endpoint, data=params, timeout=self.timeout)
         elif http_method == 'DELETE':
-            response = requests.delete(url + '/' + endpoint, params=params)
+            response = http.delete(url + '/' + endpoint, params=params, timeout=self.timeout)
         else:
             raise Exception("Called Facebook Graph API with unsupported method: " + http_method)
 
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(endpoint, response.headers)
+        if info is not None:
+            info.status = response.status_code
+            info.bytes += len(response.content)
+
         # Parse response and standardize for edge cases, raising Facebook errors if they exist
         try:
             json_response = response.json()
-            if not isinstance(json_response, dict):
-                raise ValueError
-            elif json_response.get('error'):
-                raise FacebookException(message=json_response['error']['message'], code=json_response['error']['code'])
-            elif json_response.get('images'):
-                json_response = {'data': json_response['images']}
-            elif not json_response.get('data'):
-                json_response = {'data': [json_response]}
-            return json_response
+            if isinstance(json_response, list):
+                # Only batch calls answer with a top-level list
+                return json_response
+            return standardize_response(json_response)
+        except FacebookException, e:
+            e.status_code = response.status_code
+            raise
         except ValueError, JSONDecodeError:
+            if response.status_code >= 500:
+                raise FacebookException(message='Facebook is unavailable, got this instead of a response: %s' % response.text,
+                                        status_code=response.status_code)
             if expect_json:
                 print "ERROR CALLING FB URL: %s" % (url + '/' + endpoint)
                 print "WITH PARAMS:"
@@ -246,7 +495,7 @@ class PyFacebook(object):
                 raise Exception('Expected Valid JSON response, got this instead: %s' % response.text)
             return response.text
 
-    def get(self, model, id, connection=None, return_json=False, **kwargs):
+    def get(self, model, id, connection=None, return_json=False, lazy=False, columnar=False, **kwargs):
         """
         Sends an Ads API GET call to Facebook and retrieves a JSON response
 
@@ -254,6 +503,10 @@ class PyFacebook(object):
         :param str id: The Facebook id of the object we're getting.
         :param str connection: The name of the connection, if we're getting connected objects.
         :param bool return_json: Should return a json string
+        :param bool lazy: If True, data holds lazy.LazyModels, which decode fields only when they're read.
+                          Call materialize or validate on one to get the full TinyModel.
+        :param bool columnar: If True, data is a stats.StatisticSet holding AdStatistic rows in typed arrays.
+                              Only for stats connections, e.g. AdAccount adgroupstats.
 
         :rtype dict: A dict with results. Typical keys are data, errors and paging.
                      If return_json is False, data is an iterable of TinyModels.
@@ -261,31 +514,280 @@ class PyFacebook(object):
         """
         if not id:
             raise Exception("Need an ID in order to make a GET request to the Facebook API.")
+        if columnar and model is not models.AdStatistic:
+            raise Exception("Only AdStatistic results can be returned as columns, not " + model.__name__)
 
         params = {}
         if not kwargs.get('fields'):
-            fields_to_get = [f.title for f in model.FIELD_DEFS
-                             if f.title not in getattr(model, 'CONNECTIONS', []) and
-                             f.title not in getattr(model, 'CREATE_ONLY', [])]
-            params = {'fields': fields_to_get}
+            params = {'fields': get_request_profile(model).encoded_fields}
 
         params.update(kwargs)
-        return self.__call_endpoint(model=model, id=id, connection=connection, http_method='GET', params=params, return_json=return_json)
+        return self.__call_endpoint(model=model, id=id, connection=connection, http_method='GET', params=params,
+                                    return_json=return_json, lazy=lazy, columnar=columnar)
 
-    def post(self, model, id=None, connection=None, return_json=False, **kwargs):
+    def stream(self, model, id, connection=None, return_json=False, chunk_size=65536, **kwargs):
+        """
+        Sends an Ads API GET call and parses the response as it arrives, instead of loading it whole.
+        Memory stays bounded by chunk_size and the size of one object, however large the page is.
+        Takes the same keyword args as get. Responses are neither cached nor mirrored.
+        The call goes through the rate limiter, retry policy and instrumentation like any other,
+        and a Facebook error or unavailability raises FacebookException before anything is streamed.
+
+            response = pyfb.stream(models.AdStatistic, id=account_id, connection='adgroupstats', limit=10000)
+            for stat in response:
+                ...
+            next_page = response.paging
+
+        :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+        :param str id: The Facebook id of the object we're getting.
+        :param str connection: The name of the connection, if we're getting connected objects.
+        :param bool return_json: If True, yields dicts instead of TinyModels.
+        :param int chunk_size: The number of bytes read from the network at a time.
+
+        :rtype streaming.StreamedResponse: An iterator over the objects of data, with paging set once it's read
+
+        """
+        if not id:
+            raise Exception("Need an ID in order to make a GET request to the Facebook API.")
+        params = {}
+        if not kwargs.get('fields'):
+            params = {'fields': get_request_profile(model).encoded_fields}
+        params.update(kwargs)
+        if not params.get('access_token') and hasattr(self, 'access_token'):
+            params['access_token'] = self.access_token.text
+        self.encode_params(params)
+
+        endpoint = str(id) + ('/' + connection if connection else '')
+        response = self.__instrument(endpoint, 'GET', model, lambda info: self.__send(
+            endpoint, 'GET', True, params, info=info, request=self.__open_stream, model=model))
+        return StreamedResponse(response.iter_content(chunk_size), model=model, return_json=return_json, close=response.close)
+
+    def __open_stream(self, endpoint, http_method, expect_json, params, info=None):
+        """
+        Sends a GET call without reading its response, unless it failed. Takes the same arguments as __request.
+
+        :rtype requests.Response: The response, with its body still to be read
+
+        """
+        if info is not None:
+            info.attempts += 1
+        http = self.session or requests
+        response = http.get(self.__facebook_graph_url + '/' + endpoint, params=params, stream=True, timeout=self.timeout)
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(endpoint, response.headers)
+        if info is not None:
+            info.status = response.status_code
+            info.bytes += int(response.headers.get('content-length') or 0)
+        if response.status_code < 400:
+            return response
+
+        # Errors are small, so they're read whole and raised the way __request raises them
+        try:
+            standardize_response(response.json())
+        except FacebookException, e:
+            e.status_code = response.status_code
+            raise
+        except ValueError:
+            pass
+        finally:
+            response.close()
+        raise FacebookException(message='Facebook answered with status %d: %s' % (response.status_code, response.text),
+                                status_code=response.status_code)
+
+    def get_by_ids(self, model, ids, return_json=False, max_ids=50, max_url_length=2000, **kwargs):
+        """
+        Gets many objects of a model with as few calls as possible, using the Graph API ids param.
+        Ids are split into calls of at most max_ids ids whose URLs stay under max_url_length characters.
+
+        :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+        :param list ids: The Facebook ids of the objects we're getting.
+        :param bool return_json: If True, values are dicts instead of TinyModels.
+        :param int max_ids: The most ids sent in one call. Facebook allows 50.
+        :param int max_url_length: The longest URL sent, counting the ids and every other param.
+
+        :rtype dict: A dict of objects by id
+
+        """
+        params = {}
+        if not kwargs.get('fields'):
+            params = {'fields': get_request_profile(model).encoded_fields}
+        params.update(kwargs)
+        self.encode_params(params)
+        params_length = len(self.__facebook_graph_url) + 2 + len(urllib.urlencode(utf8_params(params))) + len('&ids=') + \
+            len(getattr(getattr(self, 'access_token', None), 'text', None) or '') + len('&access_token=')
+
+        objects = {}
+        for ids_param in chunk_ids(ids, max_ids=max_ids, max_length=max(1, max_url_length - params_length)):
+            chunk_params = dict(params)
+            chunk_params['ids'] = ids_param
+            fb_response = self.call_graph_api(endpoint='', params=chunk_params, model=model)
+            chunk_objects = fb_response['data'][0] if fb_response['data'] else {}
+            if self.mirror is not None:
+                self.mirror.put(model, chunk_objects.values())
+            if not return_json:
+                chunk_objects = json_to_objects(chunk_objects, model)
+                if self.track_changes:
+                    changes.remember_all(chunk_objects)
+            objects.update(chunk_objects)
+        return objects
+
+    def iter_connection(self, model, id, connection, cursor=None, prefetch=True, return_json=False, **kwargs):
+        """
+        Iterates over every object of a connection, following Facebook's paging page by page.
+        Takes the same keyword args as get.
+
+        :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+        :param str id: The Facebook id of the parent object.
+        :param str connection: The name of the connection.
+        :param dict cursor: The cursor attribute saved from a previous iterator, to resume from.
+        :param bool prefetch: If True, the next page is fetched in the background while the current one is read.
+        :param bool return_json: If True, yields dicts instead of TinyModels.
+
+        :rtype ConnectionIterator: An iterator over the objects of the connection
+
+        """
+        return ConnectionIterator(self, model=model, id=id, connection=connection, cursor=cursor,
+                                  prefetch=prefetch, return_json=return_json, **kwargs)
+
+    def get_many(self, model, ids, connection=None, max_workers=10, ordered=True, return_json=False, **kwargs):
+        """
+        Sends GET calls for many ids at once on a thread pool sharing this instance's session.
+        A failed id is recorded and doesn't stop the others. Takes the same keyword args as get.
+
+        :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+        :param list ids: The Facebook ids to get.
+        :param str connection: The name of the connection, if we're getting connected objects of each id.
+        :param int max_workers: The maximum number of calls in flight at once.
+        :param bool ordered: If True, results are in the order of ids. Otherwise they're in completion order.
+        :param bool return_json: If True, data holds dicts instead of TinyModels.
+
+        :rtype fanout.FanOutResult: The get result or exception of each id, and throughput and latency stats
+
+        """
+        return fanout.get_many(self, model, ids, connection=connection, max_workers=max_workers, ordered=ordered,
+                               return_json=return_json, **kwargs)
+
+    def iter_many(self, model, ids, connection=None, max_workers=10, return_json=False, **kwargs):
+        """
+        Like get_many, but yields each id as soon as its call completes.
+
+        :rtype generator: (id, get result or exception, latency in seconds) tuples
+
+        """
+        return fanout.iter_many(self, model, ids, connection=connection, max_workers=max_workers,
+                                return_json=return_json, **kwargs)
+
+    def upload_image(self, account_id, image, filename=None):
+        """
+        Uploads an image to an account, streaming it so it's never all in memory.
+        If an image_index was given and the image is in the account already, it isn't uploaded again.
+
+        :param str account_id: The ad account to upload to, e.g. act_123.
+        :param < str | file > image: A file path, or a seekable file object opened in binary mode.
+        :param str filename: The filename sent to Facebook. Defaults to the name of the image file.
+
+        :rtype dict: The image's hash, url and filename, and whether it was uploaded
+
+        """
+        return upload_image(self, account_id, image, filename=filename, index=self.image_index)
+
+    def upload_images(self, account_id, images, max_workers=4):
+        """
+        Uploads many images to an account in parallel, like upload_image. A failed upload doesn't stop the others.
+
+        :param str account_id: The ad account to upload to, e.g. act_123.
+        :param list images: File paths or seekable file objects.
+        :param int max_workers: The most uploads in flight at once.
+
+        :rtype OrderedDict: The upload_image result, or the exception raised, of each image, in order
+
+        """
+        return upload_images(self, account_id, images, index=self.image_index, max_workers=max_workers)
+
+    def submit_report(self, account_id, scheduler=None, return_json=False, timeout=None, **kwargs):
+        """
+        Starts an asynchronous stats report, for date ranges too large to GET at once.
+        The report is polled in the background, together with every other report of the scheduler.
+        Report params, e.g. data_columns and time_ranges, are received as keyword args.
+
+        :param str account_id: The ad account to report on, e.g. act_123.
+        :param reports.ReportScheduler scheduler: The scheduler polling the report. Defaults to one shared by every instance.
+        :param bool return_json: If True, the report's results are dicts instead of AdStatistics.
+        :param float timeout: Seconds after which the report fails if it isn't done.
+
+        :rtype reports.ReportJob: The report job, whose results() are read once it's done
+
+        """
+        scheduler = scheduler or reports.default_scheduler()
+        return scheduler.submit(self, account_id, return_json=return_json, timeout=timeout, **kwargs)
+
+    def post(self, model, id=None, connection=None, return_json=False, idempotent=False, **kwargs):
         """
         Sends an Ads API POST call to Facebook and retrieves a JSON response
         POST params are recevied as keyword args.
 
         :param tinymodel.TinyModel model: The class associated with the object we're POSTing.
         :param bool return_json: Should return a json string
+        :param bool idempotent: Set to True if sending this POST twice is harmless, e.g. an update of fixed values,
+                                so the retry policy may retry it.
 
         :rtype dict: A dict with the POST response. JSON models are translated to TinyModels where appropriate.
 
         """
         if not connection:
             connection = inflection.pluralize(model.__name__.lower())
-        return self.__call_endpoint(model=model, id=id, connection=connection, http_method='POST', params=kwargs, return_json=return_json)
+        return self.__call_endpoint(model=model, id=id, connection=connection, http_method='POST', params=kwargs,
+                                    return_json=return_json, idempotent=idempotent)
+
+    def update(self, obj, **kwargs):
+        """
+        Sends an Ads API POST call updating an existing object with only the fields changed since it was loaded.
+        Every field counts as changed if the object wasn't loaded with track_changes on.
+        Extra POST params are received as keyword args and always sent.
+
+        :param tinymodel.TinyModel obj: The object to update, with its id set.
+
+        :rtype dict: A dict with the POST response, or None if nothing changed and no call was made
+
+        """
+        params = changes.changed_fields(obj)
+        params.update(kwargs)
+        if not params:
+            return None
+        fb_response = self.call_graph_api(endpoint=str(obj.id), http_method='POST', params=params, model=type(obj),
+                                          idempotent=True)
+        changes.remember(obj)
+        return fb_response
+
+    def update_many(self, objects, max_workers=4):
+        """
+        Updates many objects like update, skipping the ones that didn't change.
+        Changed objects are sent in batched calls, several at once.
+
+        :param list objects: The objects to update, with their ids set.
+        :param int max_workers: The most calls in flight at once.
+
+        :rtype OrderedDict: The POST response, or the exception raised, by id, of each object that changed
+
+        """
+        return changes.update_many(self, objects, max_workers=max_workers)
+
+    def bulk_delete(self, account_id, connections=('adgroups', 'adcreatives', 'adcampaigns'), dry_run=False,
+                    max_workers=4):
+        """
+        Deletes every object of some connections of an account, e.g. to clean up a test account.
+        Adgroups are deleted before the creatives and campaigns they use, in batched calls sent in parallel.
+        This is obviously an extremely destructive method so USE CAUTION, and try it with dry_run first.
+
+        :param str account_id: The ad account to clean up, e.g. act_123.
+        :param list connections: The connections to empty: adgroups, adcreatives, adcampaigns or adcampaign_groups.
+        :param bool dry_run: If True, nothing is deleted; the result only lists the ids found.
+        :param int max_workers: The most calls in flight at once.
+
+        :rtype cleanup.BulkDeleteResult: The ids found in each connection, and whether each one was deleted
+
+        """
+        return cleanup.bulk_delete(self, account_id, connections=connections, dry_run=dry_run, max_workers=max_workers)
 
     def delete(self, id, **kwargs):
         """
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from pyfacebook import PyFacebook
+
+
+class AsyncPyFacebook(object):
+
+    """
+    A non-blocking PyFacebook. Every Graph call returns a concurrent.futures.Future right away,
+    and up to max_concurrency calls run at the same time over one pooled session.
+
+    Calls go through a wrapped PyFacebook, so model conversion and param encoding are the same as the blocking client's.
+
+        with AsyncPyFacebook(token_text=token, max_concurrency=100) as pyfb:
+            futures = [pyfb.get(models.AdAccount, id=account_id) for account_id in account_ids]
+            accounts = [f.result()['data'][0] for f in futures]
+
+    """
+
+    def __init__(self, pyfb=None, max_concurrency=10, **kwargs):
+        """
+        :param PyFacebook pyfb: An existing PyFacebook to send calls through. If not given, one is built from kwargs.
+        :param int max_concurrency: The maximum number of Graph calls in flight at once.
+
+        Other keyword args are passed to PyFacebook.
+
+        """
+        if pyfb is None:
+            kwargs.setdefault('pool_maxsize', max_concurrency)
+            pyfb = PyFacebook(**kwargs)
+        self.pyfb = pyfb
+        self.max_concurrency = max_concurrency
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        """
+        Stops accepting calls. If wait is True, waits for the calls in flight to finish.
+
+        """
+        self.__executor.shutdown(wait=wait)
+
+    @property
+    def access_token(self):
+        return self.pyfb.access_token
+
+    def call_graph_api(self, endpoint, http_method='GET', expect_json=True, params={}):
+        """
+        Calls the Facebook graph api in the background. See PyFacebook.call_graph_api.
+
+        :rtype concurrent.futures.Future: A future for the json-decoded result
+
+        """
+        return self.__executor.submit(self.pyfb.call_graph_api, endpoint, http_method=http_method,
+                                      expect_json=expect_json, params=dict(params))
+
+    def validate_access_token(self, token_text, input_token_text=None):
+        """
+        Validates an access token in the background. See PyFacebook.validate_access_token.
+
+        :rtype concurrent.futures.Future: A future for a models.Token
+
+        """
+        return self.__executor.submit(self.pyfb.validate_access_token, token_text, input_token_text=input_token_text)
+
+    def get(self, model, id, connection=None, return_json=False, **kwargs):
+        """
+        Sends an Ads API GET call in the background. See PyFacebook.get.
+
+        :rtype concurrent.futures.Future: A future for the dict PyFacebook.get returns
+
+        """
+        return self.__executor.submit(self.pyfb.get, model, id, connection=connection, return_json=return_json, **kwargs)
+
+    def post(self, model, id=None, connection=None, return_json=False, **kwargs):
+        """
+        Sends an Ads API POST call in the background. See PyFacebook.post.
+
+        :rtype concurrent.futures.Future: A future for the dict PyFacebook.post returns
+
+        """
+        return self.__executor.submit(self.pyfb.post, model, id=id, connection=connection, return_json=return_json, **kwargs)
+
+    def delete(self, id, **kwargs):
+        """
+        Sends an Ads API DELETE call in the background. See PyFacebook.delete.
+
+        :rtype concurrent.futures.Future: A future for the flag PyFacebook.delete returns
+
+        """
+        return self.__executor.submit(self.pyfb.delete, id, **kwargs)
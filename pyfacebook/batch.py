@@ -0,0 +1,265 @@
+import re
+import json
+import urllib
+import inflection
+
+from pyfacebook.profiles import get_request_profile
+from pyfacebook.utils import (
+    FacebookException,
+    json_to_objects,
+    make_endpoint,
+    standardize_response,
+    utf8_params,
+)
+
+REFERENCE_PATTERN = re.compile(r'\{result=([^:}]+):')
+# A whole reference, kept unescaped when params are URL-encoded
+REFERENCE_SPLIT = re.compile(r'(\{result=[^}]*\})')
+
+
+def encode_query(params):
+    """
+    URL-encodes params as UTF-8, leaving references to other operations unescaped, as the batch API expects them.
+
+    :param dict params: Params already encoded by PyFacebook.encode_params
+    :rtype str: A query string
+
+    """
+    pairs = []
+    for key, val in utf8_params(params).items():
+        parts = REFERENCE_SPLIT.split(val if isinstance(val, str) else str(val))
+        # split puts the references at odd indexes
+        pairs.append(urllib.quote_plus(str(key)) + '=' +
+                     ''.join(part if index % 2 else urllib.quote_plus(part) for index, part in enumerate(parts)))
+    return '&'.join(pairs)
+
+
+class BatchOperation(object):
+
+    """
+    A single queued operation in a GraphBatch.
+
+    """
+
+    def __init__(self, http_method, relative_url, model=None, body=None, name=None):
+        self.http_method = http_method
+        self.relative_url = relative_url
+        self.model = model
+        self.body = body
+        self.name = name
+
+    @property
+    def references(self):
+        """
+        The names of the operations whose results this operation depends on.
+
+        :rtype set: A set of operation names
+
+        """
+        return set(REFERENCE_PATTERN.findall(urllib.unquote_plus(self.relative_url + (self.body or ''))))
+
+    def to_json(self):
+        request = {'method': self.http_method, 'relative_url': self.relative_url}
+        if self.body:
+            request['body'] = self.body
+        if self.name:
+            request['name'] = self.name
+            request['omit_response_on_success'] = False
+        return request
+
+
+class GraphBatch(object):
+
+    """
+    Queues GET, POST and DELETE operations and sends them through the Graph API batch parameter,
+    up to MAX_BATCH_SIZE operations per HTTP call. See documentation at:
+    https://developers.facebook.com/docs/graph-api/making-multiple-requests/
+
+    Operations can depend on each other's results. Name an operation with batch_name and pass
+    GraphBatch.reference(batch_name) as a param of a later one. Dependent operations are always sent in the same call.
+
+    """
+    MAX_BATCH_SIZE = 50
+
+    def __init__(self, pyfb):
+        """
+        :param PyFacebook pyfb: The PyFacebook instance used to send the batch.
+
+        """
+        self.__pyfb = pyfb
+        self.operations = []
+
+    def __len__(self):
+        return len(self.operations)
+
+    @staticmethod
+    def reference(name, path='$.id'):
+        """
+        Refers to a field of the result of a named operation in the same batch.
+
+        :param str name: The name given to the operation we depend on
+        :param str path: A JSONPath expression into that operation's result
+        :rtype str: A reference to send as a param value
+
+        """
+        return '{result=%s:%s}' % (name, path)
+
+    def __queue(self, http_method, endpoint, model, params, name):
+        if 'file' in params:
+            raise Exception("File uploads can't be sent in a batch. POST them with PyFacebook.post instead.")
+        query = encode_query(self.__pyfb.encode_params(params))
+        if http_method == 'POST':
+            operation = BatchOperation(http_method, endpoint, model=model, body=query, name=name)
+        else:
+            operation = BatchOperation(http_method, endpoint + ('?' + query if query else ''), model=model, name=name)
+        self.operations.append(operation)
+        return len(self.operations) - 1
+
+    def get(self, model, id, connection=None, batch_name=None, **kwargs):
+        """
+        Queues a GET call. Takes the same arguments as PyFacebook.get.
+
+        :param str batch_name: A name other operations can reference this one's result by.
+        :rtype int: The index of this operation's result in the list returned by execute
+
+        """
+        if not id:
+            raise Exception("Need an ID in order to make a GET request to the Facebook API.")
+        params = {}
+        if not kwargs.get('fields'):
+            params = {'fields': get_request_profile(model).encoded_fields}
+        params.update(kwargs)
+        return self.__queue('GET', make_endpoint(model, id, connection), model, params, batch_name)
+
+    def post(self, model, id=None, connection=None, batch_name=None, **kwargs):
+        """
+        Queues a POST call. Takes the same arguments as PyFacebook.post.
+
+        :param str batch_name: A name other operations can reference this one's result by.
+        :rtype int: The index of this operation's result in the list returned by execute
+
+        """
+        if not connection:
+            connection = inflection.pluralize(model.__name__.lower())
+        return self.__queue('POST', make_endpoint(model, id, connection), model, kwargs, batch_name)
+
+    def update(self, id, batch_name=None, **kwargs):
+        """
+        Queues a POST of new field values to an existing object.
+
+        :param str id: The Facebook id of the object to update
+        :param str batch_name: A name other operations can reference this one's result by.
+        :rtype int: The index of this operation's result in the list returned by execute
+
+        """
+        return self.__queue('POST', str(id), None, kwargs, batch_name)
+
+    def delete(self, id, batch_name=None):
+        """
+        Queues a DELETE call.
+
+        :param str id: The Facebook id of the object to delete
+        :param str batch_name: A name other operations can reference this one's result by.
+        :rtype int: The index of this operation's result in the list returned by execute
+
+        """
+        return self.__queue('DELETE', str(id), None, {}, batch_name)
+
+    def chunks(self):
+        """
+        Splits the queued operations into chunks of at most MAX_BATCH_SIZE,
+        never separating an operation from the named operations it depends on.
+
+        :rtype list: A list of lists of operations
+
+        """
+        names = {}
+        group_start = []
+        for index, operation in enumerate(self.operations):
+            start = index
+            for name in operation.references:
+                if name not in names:
+                    raise Exception("Batch operation " + str(index) + " references unknown operation " + name)
+                start = min(start, group_start[names[name]])
+            group_start.append(start)
+            if operation.name:
+                names[operation.name] = index
+
+        # a chunk may only end before index i if nothing from i onwards depends on anything before i
+        count = len(self.operations)
+        can_split = [True] * (count + 1)
+        earliest = count
+        for index in reversed(range(count)):
+            earliest = min(earliest, group_start[index])
+            can_split[index] = earliest >= index
+
+        chunks = []
+        start = 0
+        while start < count:
+            end = min(start + self.MAX_BATCH_SIZE, count)
+            while end > start and not can_split[end]:
+                end -= 1
+            if end == start:
+                raise Exception("More than " + str(self.MAX_BATCH_SIZE) + " batch operations depend on each other, "
+                                "starting at operation " + str(start))
+            chunks.append(self.operations[start:end])
+            start = end
+        return chunks
+
+    def __parse_result(self, operation, result, return_json):
+        """
+        Translates one entry of a batch response into a result, or into the FacebookException it represents.
+
+        """
+        if result is None:
+            return FacebookException(message="Batch operation " + operation.http_method + " " + operation.relative_url +
+                                     " was not run, most likely because an operation it depends on failed.")
+        try:
+            body = json.loads(result.get('body') or 'null')
+        except ValueError:
+            body = result.get('body')
+
+        if operation.http_method == 'DELETE' and not isinstance(body, dict):
+            return body in (True, 'true')
+        try:
+            fb_response = standardize_response(body)
+        except FacebookException, e:
+            return e
+        except ValueError:
+            return FacebookException(message="Batch operation " + operation.http_method + " " + operation.relative_url +
+                                     " returned an unexpected response: " + str(body), code=result.get('code'))
+        if self.__pyfb.mirror is not None and operation.model and operation.http_method == 'GET' and \
+                isinstance(fb_response['data'], list):
+            parent = operation.relative_url.split('?')[0].split('/')[0]
+            self.__pyfb.mirror.put(operation.model, fb_response['data'],
+                                   account_id=parent if parent.startswith('act_') else None)
+        if operation.model and not return_json:
+            fb_response['data'] = json_to_objects(fb_response['data'], operation.model)
+        return fb_response
+
+    def execute(self, return_json=False):
+        """
+        Sends all queued operations and empties the queue.
+
+        Operations are removed from the queue as each call returns. If a call fails, the operations it and later
+        calls would have sent stay queued, so executing again doesn't repeat the ones that already ran.
+        The results of the calls that did return are attached to the raised exception as its results attribute.
+
+        :param bool return_json: If True, data holds dicts instead of TinyModel objects
+        :rtype list: One result per operation, in the order they were queued.
+                     GET and POST results are dicts like the ones PyFacebook.get and PyFacebook.post return,
+                     DELETE results are booleans, and failed operations are FacebookException instances.
+
+        """
+        results = []
+        for chunk in self.chunks():
+            batch_json = [operation.to_json() for operation in chunk]
+            try:
+                response = self.__pyfb.call_graph_api(endpoint='', http_method='POST', params={'batch': batch_json})
+            except Exception, e:
+                e.results = results
+                raise
+            del self.operations[:len(chunk)]
+            for operation, result in zip(chunk, response):
+                results.append(self.__parse_result(operation, result, return_json))
+        return results
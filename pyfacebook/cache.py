@@ -0,0 +1,288 @@
+import copy
+import json
+import time
+import uuid
+import shelve
+import threading
+
+from urlparse import urlparse
+from collections import OrderedDict
+
+from pyfacebook.utils import request_key
+
+# Response keys always have a / after the id, so none looks like this
+GENERATION_KEY = 'generation %s'
+
+class CacheBackend(object):
+
+    """
+    The interface a ResponseCache stores responses through.
+    Implement it to put responses in a cache shared between processes, e.g. memcached or redis.
+
+    Values are (expires_at, response) tuples, or (None, generation) tuples under GENERATION_KEY keys.
+    Backends may evict entries whenever they like, so get, set and delete are all a backend needs,
+    as memcached offers.
+
+    """
+
+    def get(self, key):
+        """
+        :rtype tuple: The (expires_at, response) tuple stored under key, or None
+
+        """
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    evictions = 0
+
+
+class MemoryBackend(CacheBackend):
+
+    """
+    Keeps up to max_entries responses in memory, evicting the least recently used.
+
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key):
+        with self.__lock:
+            value = self.__entries.pop(key, None)
+            if value is not None:
+                self.__entries[key] = value
+            return value
+
+    def set(self, key, value):
+        with self.__lock:
+            self.__entries.pop(key, None)
+            self.__entries[key] = value
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+
+class ShelfBackend(CacheBackend):
+
+    """
+    Keeps up to max_entries responses in a shelf file, so they outlive the process, evicting the least recently used.
+
+    """
+
+    def __init__(self, filename, max_entries=10000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self.__shelf = shelve.open(filename)
+        self.__lock = threading.Lock()
+        # Recency is tracked in memory; entries found on disk start out as least recently used
+        self.__order = OrderedDict((key, None) for key in self.__shelf.keys())
+
+    def __len__(self):
+        return len(self.__order)
+
+    def get(self, key):
+        with self.__lock:
+            if key not in self.__order:
+                return None
+            self.__order.pop(key)
+            self.__order[key] = None
+            return self.__shelf.get(key)
+
+    def set(self, key, value):
+        with self.__lock:
+            self.__order.pop(key, None)
+            self.__order[key] = None
+            self.__shelf[key] = value
+            while len(self.__order) > self.max_entries:
+                oldest, _ = self.__order.popitem(last=False)
+                del self.__shelf[oldest]
+                self.evictions += 1
+
+    def delete(self, key):
+        with self.__lock:
+            if key in self.__order:
+                del self.__order[key]
+                del self.__shelf[key]
+
+    def close(self):
+        with self.__lock:
+            self.__shelf.close()
+
+
+class ResponseCache(object):
+
+    """
+    A read-through cache of Graph API GET responses, keyed on the endpoint and params without the access token.
+
+    Responses expire after the TTL of the model they were read as. A POST or DELETE on an id drops every cached
+    response that mentions it: responses under the id, e.g. DELETE 123 drops 123 and 123/adcreatives,
+    ids= lookups that asked for it, and listings it was returned in, like the adcreatives of its account.
+    Each operation of a batch call drops the responses its own id is mentioned in.
+
+    Responses under an id are keyed with a generation of the id kept in the backend, and writing the id starts
+    a new generation, so they're dropped even in a backend shared with other processes.
+    The other mentions are indexed in memory, so only the process that cached a response drops it for them.
+
+    """
+
+    def __init__(self, backend=None, ttl=300, model_ttls=None):
+        """
+        :param CacheBackend backend: Where responses are stored. Defaults to a MemoryBackend.
+        :param int ttl: Seconds a response is served for, unless its model has its own TTL.
+        :param dict model_ttls: TTLs by model class, e.g. {models.AdAccount: 3600}
+
+        """
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.model_ttls = model_ttls or {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # The keys of cached responses by each id they mention, and the expiry and ids of each key
+        self.__keys_by_id = {}
+        self.__index = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def encode(text):
+        return text.encode('utf-8') if isinstance(text, unicode) else str(text)
+
+    def key(self, endpoint, params):
+        """
+        Prefixes the request key with the id the endpoint starts with and the id's current generation.
+
+        """
+        id = self.encode(endpoint.split('/')[0])
+        return id + '/' + self.__generation(id) + '/' + self.encode(request_key(endpoint, params))
+
+    def __generation(self, id):
+        """
+        A generation evicted from the backend is replaced by a new one, so responses of an older one
+        are never found again.
+
+        """
+        value = self.backend.get(GENERATION_KEY % id)
+        if value is None:
+            value = (None, uuid.uuid4().hex)
+            self.backend.set(GENERATION_KEY % id, value)
+        return value[1]
+
+    @classmethod
+    def mentioned_ids(cls, endpoint, params, response):
+        """
+        :rtype set: The ids a response is about: the one its endpoint starts with, the ones it asked for with ids=,
+                    and the ones of the objects it lists
+
+        """
+        ids = set([endpoint.split('/')[0]]) if endpoint else set()
+        if params.get('ids'):
+            ids.update(params['ids'].split(','))
+        data = response.get('data')
+        for obj in data if isinstance(data, list) else []:
+            if isinstance(obj, dict) and obj.get('id'):
+                ids.add(obj['id'])
+        return set(cls.encode(id) for id in ids)
+
+    @classmethod
+    def written_ids(cls, endpoint, params=None):
+        """
+        :rtype set: The ids a POST or DELETE changes: the one its endpoint starts with,
+                    or for a batch call, the one each POST and DELETE operation starts with
+
+        """
+        if endpoint or not (params and params.get('batch')):
+            return set([cls.encode(endpoint.split('/')[0])])
+        operations = params['batch']
+        if isinstance(operations, basestring):
+            operations = json.loads(operations)
+        return set(cls.encode(urlparse(operation['relative_url']).path.lstrip('/').split('/')[0])
+                   for operation in operations if operation.get('method', 'GET').upper() != 'GET')
+
+    def get(self, endpoint, params):
+        """
+        :rtype dict: A copy of the cached response, or None
+
+        """
+        value = self.backend.get(self.key(endpoint, params))
+        hit = value is not None and value[0] >= time.time()
+        with self.__lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return copy.deepcopy(value[1]) if hit else None
+
+    def set(self, endpoint, params, response, model=None):
+        ttl = self.model_ttls.get(model, self.ttl)
+        if ttl > 0:
+            key = self.key(endpoint, params)
+            expires_at = time.time() + ttl
+            self.backend.set(key, (expires_at, copy.deepcopy(response)))
+            self.__add_to_index(key, expires_at, self.mentioned_ids(endpoint, params, response))
+
+    def __add_to_index(self, key, expires_at, ids):
+        with self.__lock:
+            self.__remove_from_index(key)
+            self.__index[key] = (expires_at, ids)
+            for id in ids:
+                self.__keys_by_id.setdefault(id, set()).add(key)
+            # expired responses are never served, so they don't need to be found any more
+            if len(self.__index) > 2 * getattr(self.backend, 'max_entries', 1000):
+                now = time.time()
+                for expired in [key for key, (expires_at, ids) in self.__index.items() if expires_at < now]:
+                    self.__remove_from_index(expired)
+
+    def __remove_from_index(self, key):
+        expires_at, ids = self.__index.pop(key, (None, ()))
+        for id in ids:
+            keys = self.__keys_by_id.get(id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.__keys_by_id[id]
+
+    def invalidate(self, endpoint, params=None):
+        """
+        Drops every cached response that mentions an id a POST or DELETE changes.
+
+        :param str endpoint: The endpoint written to
+        :param dict params: The encoded params of the write, needed to invalidate batch calls
+
+        """
+        ids = self.written_ids(endpoint, params)
+        with self.__lock:
+            keys = set()
+            for id in ids:
+                keys.update(self.__keys_by_id.get(id, ()))
+            for key in keys:
+                self.__remove_from_index(key)
+            self.invalidations += len(keys)
+
+        for id in ids:
+            self.backend.set(GENERATION_KEY % id, (None, uuid.uuid4().hex))
+        for key in keys:
+            self.backend.delete(key)
+
+    def stats(self):
+        """
+        :rtype dict: Hit, miss, invalidation and eviction counters
+
+        """
+        with self.__lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'invalidations': self.invalidations, 'evictions': self.backend.evictions}
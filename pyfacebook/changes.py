@@ -0,0 +1,110 @@
+import copy
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pyfacebook.batch import GraphBatch
+
+# The attribute a tracked object keeps its loaded values in
+LOADED_ATTR = '_pyfacebook_loaded'
+
+
+def updatable_json(obj):
+    """
+    :rtype dict: The json values of an object's fields that can be sent in an update:
+                 not its id, connections, create-only or read-only fields, and not fields without a value
+
+    """
+    model = type(obj)
+    skipped = set(['id'])
+    for attr in ('CONNECTIONS', 'CREATE_ONLY', 'READ_ONLY'):
+        skipped.update(getattr(model, attr, []))
+    return dict((key, val) for key, val in obj.to_json(return_dict=True).items()
+                if key not in skipped and val is not None)
+
+
+def remember(obj):
+    """
+    Remembers the current values of an object, as the values it was loaded with.
+
+    """
+    # Set through object so models that guard their attributes still take it
+    object.__setattr__(obj, LOADED_ATTR, copy.deepcopy(updatable_json(obj)))
+    return obj
+
+
+def remember_all(list_or_dict):
+    """
+    Remembers the values of every object in a list, or of every value of a dict.
+
+    """
+    objects = list_or_dict.values() if isinstance(list_or_dict, dict) else list_or_dict
+    for obj in objects:
+        remember(obj)
+    return list_or_dict
+
+
+def is_tracked(obj):
+    return LOADED_ATTR in getattr(obj, '__dict__', {})
+
+
+def changed_fields(obj):
+    """
+    Compares an object with the values it was loaded with. Nested values, like targeting, are compared whole
+    and sent whole, since Facebook replaces them whole. An object that isn't tracked counts as entirely changed.
+
+    :rtype dict: The json values of the fields that changed, empty if none did
+
+    """
+    current = updatable_json(obj)
+    if not is_tracked(obj):
+        return current
+    loaded = obj.__dict__[LOADED_ATTR]
+    return dict((key, val) for key, val in current.items() if loaded.get(key) != val)
+
+
+def update_chunk(pyfb, objects_and_changes):
+    """
+    POSTs the changes of some objects in one batch call, and remembers the new values of the ones that succeeded.
+
+    :rtype list: (object, update response or exception) tuples
+
+    """
+    batch = GraphBatch(pyfb)
+    for obj, changes in objects_and_changes:
+        batch.update(obj.id, **changes)
+    objects = [obj for obj, changes in objects_and_changes]
+    try:
+        results = batch.execute(return_json=True)
+    except Exception, e:
+        return [(obj, e) for obj in objects]
+    for obj, result in zip(objects, results):
+        if not isinstance(result, Exception):
+            remember(obj)
+    return zip(objects, results)
+
+
+def update_many(pyfb, objects, max_workers=4):
+    """
+    Updates many objects, sending only what changed in each. Unchanged objects aren't sent at all.
+    Changed objects are POSTed in batches of GraphBatch.MAX_BATCH_SIZE, with up to max_workers batches in flight.
+
+    :rtype OrderedDict: The update response, or the exception raised, by id, of each object that changed
+
+    """
+    changed = [(obj, changed_fields(obj)) for obj in objects]
+    changed = [(obj, changes) for obj, changes in changed if changes]
+    results = OrderedDict()
+    if not changed:
+        return results
+    size = GraphBatch.MAX_BATCH_SIZE
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = [executor.submit(update_chunk, pyfb, changed[start:start + size])
+                   for start in range(0, len(changed), size)]
+        for future in futures:
+            for obj, result in future.result():
+                results[obj.id] = result
+    finally:
+        executor.shutdown(wait=True)
+    return results
@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pyfacebook import models
+from pyfacebook.batch import GraphBatch
+from pyfacebook.sync import DELETED_STATUSES, STATUS_FIELDS
+
+# The model of each connection bulk_delete knows how to list
+CONNECTION_MODELS = OrderedDict([
+    ('adgroups', models.AdGroup),
+    ('adcreatives', models.AdCreative),
+    ('adcampaigns', models.AdSet),
+    ('adcampaign_groups', models.AdCampaignGroup),
+])
+# Connections are deleted stage by stage, so objects go before the objects they depend on
+DELETE_STAGES = [['adgroups'], ['adcreatives', 'adcampaigns'], ['adcampaign_groups']]
+
+
+class BulkDeleteResult(object):
+
+    """
+    The outcome of a bulk_delete call.
+
+    found holds the ids listed in each connection, in deletion order. outcomes holds, for each id,
+    True if it was deleted, False if Facebook declined, or the exception raised. A dry run has no outcomes.
+
+    """
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.found = OrderedDict()
+        self.outcomes = OrderedDict()
+
+    @property
+    def deleted(self):
+        return [id for id, outcome in self.outcomes.items() if outcome is True]
+
+    @property
+    def failed(self):
+        """
+        :rtype OrderedDict: False or the exception raised, by id, for every id that wasn't deleted
+
+        """
+        return OrderedDict((id, outcome) for id, outcome in self.outcomes.items() if outcome is not True)
+
+    @property
+    def stats(self):
+        """
+        :rtype dict: The number of ids found, deleted and failed in each connection
+
+        """
+        stats = {}
+        for connection, ids in self.found.items():
+            outcomes = [self.outcomes.get(id) for id in ids]
+            stats[connection] = {
+                'found': len(ids),
+                'deleted': len([outcome for outcome in outcomes if outcome is True]),
+                'failed': len([outcome for outcome in outcomes if outcome is not None and outcome is not True]),
+            }
+        return stats
+
+
+def list_ids(pyfb, account_id, connection, page_size=500):
+    """
+    Pages through every object of a connection, leaving out objects already deleted.
+
+    :rtype list: The ids of the objects
+
+    """
+    model = CONNECTION_MODELS[connection]
+    status_field = STATUS_FIELDS.get(model)
+    fields = 'id,' + status_field if status_field else 'id'
+    return [obj['id'] for obj in pyfb.iter_connection(model, account_id, connection, return_json=True,
+                                                      fields=fields, limit=page_size)
+            if obj.get(status_field) not in DELETED_STATUSES]
+
+
+def delete_chunk(pyfb, ids):
+    """
+    DELETEs ids in one batch call.
+
+    :rtype list: (id, True, False or exception) tuples
+
+    """
+    batch = GraphBatch(pyfb)
+    for id in ids:
+        batch.delete(id)
+    try:
+        return zip(ids, batch.execute())
+    except Exception, e:
+        return [(id, e) for id in ids]
+
+
+def bulk_delete(pyfb, account_id, connections=('adgroups', 'adcreatives', 'adcampaigns'), dry_run=False,
+                max_workers=4, page_size=500):
+    """
+    Deletes every object of some connections of an account, dependents first.
+    Objects are DELETEd in batches of GraphBatch.MAX_BATCH_SIZE, with up to max_workers batches in flight.
+
+    :param PyFacebook pyfb: The client to delete with
+    :param str account_id: The ad account to clean up, e.g. act_123
+    :param list connections: The connections to empty, out of CONNECTION_MODELS
+    :param bool dry_run: If True, only list what would be deleted
+    :param int max_workers: The most batch calls in flight at once
+    :param int page_size: The number of objects listed per page
+    :rtype BulkDeleteResult: The ids found and what happened to each
+
+    """
+    unknown = set(connections) - set(CONNECTION_MODELS)
+    if unknown:
+        raise Exception("Can't bulk delete connections: " + ', '.join(sorted(unknown)))
+
+    result = BulkDeleteResult(dry_run=dry_run)
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        for stage in DELETE_STAGES:
+            stage = [connection for connection in stage if connection in connections]
+            listings = [(connection, executor.submit(list_ids, pyfb, account_id, connection, page_size))
+                        for connection in stage]
+            stage_ids = []
+            for connection, listing in listings:
+                result.found[connection] = listing.result()
+                stage_ids.extend(result.found[connection])
+            if dry_run:
+                continue
+
+            size = GraphBatch.MAX_BATCH_SIZE
+            futures = [executor.submit(delete_chunk, pyfb, stage_ids[start:start + size])
+                       for start in range(0, len(stage_ids), size)]
+            for future in futures:
+                result.outcomes.update(future.result())
+    finally:
+        executor.shutdown(wait=True)
+    return result
@@ -0,0 +1,83 @@
+import copy
+import threading
+
+from pyfacebook.utils import request_key
+
+
+class InFlightCall(object):
+
+    """
+    A call being made on behalf of every thread that asked for it.
+
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+
+    """
+    Coalesces identical concurrent calls: while a call is in flight, threads making the same call wait for it
+    and all get its result, or its exception, instead of calling again.
+
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self.__in_flight = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint, params):
+        """
+        Identifies a GET by its endpoint and normalized params, including the token, since tokens may see different data.
+
+        """
+        return (params.get('access_token'), request_key(endpoint, params))
+
+    def do(self, key, call):
+        """
+        Runs call, unless an identical one is in flight, in which case its outcome is shared.
+        Every caller gets its own copy of the result, so callers can mutate it.
+
+        :param tuple key: Identifies the call
+        :param function call: Makes the call
+        :rtype: What call returns
+
+        """
+        with self.__lock:
+            in_flight = self.__in_flight.get(key)
+            if in_flight is None:
+                in_flight = self.__in_flight[key] = InFlightCall()
+                leader = True
+                self.calls += 1
+            else:
+                in_flight.waiters += 1
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return copy.deepcopy(in_flight.result)
+
+        result = None
+        try:
+            result = call()
+        except Exception, e:
+            in_flight.error = e
+            raise
+        finally:
+            with self.__lock:
+                # no one can join once the call is removed, so a copy is only needed if someone already has
+                self.__in_flight.pop(key, None)
+                if in_flight.error is None and in_flight.waiters:
+                    in_flight.result = copy.deepcopy(result)
+            in_flight.done.set()
+        return result
@@ -0,0 +1,108 @@
+import time
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pyfacebook.utils import percentile
+
+
+class FanOutResult(object):
+
+    """
+    The outcome of a get_many call.
+
+    results holds the response of each id that succeeded, errors the exception of each id that failed.
+    Both are ordered by input order, or by completion order if the call wasn't ordered.
+
+    """
+
+    def __init__(self):
+        self.results = OrderedDict()
+        self.errors = OrderedDict()
+        self.latencies = []
+        self.elapsed = 0.0
+
+    def add(self, id, result, latency):
+        if isinstance(result, Exception):
+            self.errors[id] = result
+        else:
+            self.results[id] = result
+        self.latencies.append(latency)
+
+    @property
+    def stats(self):
+        """
+        :rtype dict: Call counts, throughput in calls per second and latency percentiles in seconds
+
+        """
+        latencies = sorted(self.latencies)
+        calls = len(latencies)
+        return {
+            'calls': calls,
+            'succeeded': len(self.results),
+            'failed': len(self.errors),
+            'elapsed': self.elapsed,
+            'calls_per_second': calls / self.elapsed if self.elapsed else 0.0,
+            'latency_mean': sum(latencies) / calls if calls else 0.0,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p95': percentile(latencies, 95),
+            'latency_max': latencies[-1] if latencies else 0.0,
+        }
+
+
+def timed_get(pyfb, model, id, connection, return_json, kwargs):
+    """
+    GETs one id, returning the exception instead of raising it.
+
+    :rtype tuple: (response or exception, latency in seconds)
+
+    """
+    start = time.time()
+    try:
+        result = pyfb.get(model=model, id=id, connection=connection, return_json=return_json, **kwargs)
+    except Exception, e:
+        result = e
+    return result, time.time() - start
+
+
+def iter_many(pyfb, model, ids, connection=None, max_workers=10, return_json=False, **kwargs):
+    """
+    GETs many ids on a thread pool, yielding each one as soon as it completes.
+
+    :rtype generator: (id, response or exception, latency in seconds) tuples
+
+    """
+    unique_ids = list(OrderedDict.fromkeys(ids))
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_ids))))
+    try:
+        futures = dict((executor.submit(timed_get, pyfb, model, id, connection, return_json, kwargs), id)
+                       for id in unique_ids)
+        for future in as_completed(futures):
+            result, latency = future.result()
+            yield futures[future], result, latency
+    finally:
+        executor.shutdown(wait=False)
+
+
+def get_many(pyfb, model, ids, connection=None, max_workers=10, ordered=True, return_json=False, **kwargs):
+    """
+    GETs many ids on a thread pool. A failed id doesn't stop the others.
+
+    :rtype FanOutResult: The responses and errors by id, and throughput and latency stats
+
+    """
+    ids = list(ids)
+    fan_out = FanOutResult()
+    start = time.time()
+    completed = {}
+    for id, result, latency in iter_many(pyfb, model, ids, connection=connection, max_workers=max_workers,
+                                         return_json=return_json, **kwargs):
+        if ordered:
+            completed[id] = (result, latency)
+        else:
+            fan_out.add(id, result, latency)
+    if ordered:
+        for id in OrderedDict.fromkeys(ids):
+            fan_out.add(id, *completed[id])
+    fan_out.elapsed = time.time() - start
+    return fan_out
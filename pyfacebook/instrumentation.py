@@ -0,0 +1,255 @@
+import json
+import time
+import bisect
+import logging
+import threading
+
+from pyfacebook.utils import endpoint_name
+
+logger = logging.getLogger('pyfacebook')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class CallInfo(object):
+
+    """
+    What is known about one call_graph_api call. Hooks get it before the call, and again once it's over.
+
+    """
+
+    def __init__(self, endpoint, http_method, model=None):
+        self.endpoint = endpoint
+        self.endpoint_name = endpoint_name(endpoint, model)
+        self.http_method = http_method
+        self.model = model.__name__ if model is not None else None
+        self.status = None
+        self.bytes = 0
+        self.attempts = 0
+        self.cache_hit = False
+        self.error = None
+        self.started_at = time.time()
+        self.latency = None
+
+    @property
+    def retries(self):
+        return max(self.attempts - 1, 0)
+
+    def finish(self, error=None):
+        self.latency = time.time() - self.started_at
+        self.error = error
+
+    def to_json(self):
+        return {
+            'endpoint': self.endpoint,
+            'endpoint_name': self.endpoint_name,
+            'method': self.http_method,
+            'model': self.model,
+            'status': self.status,
+            'bytes': self.bytes,
+            'retries': self.retries,
+            'cache_hit': self.cache_hit,
+            'latency': self.latency,
+            'error': str(self.error) if self.error is not None else None,
+        }
+
+
+class Hook(object):
+
+    """
+    Base class for call hooks. Override any of before, after and error.
+
+    """
+
+    def before(self, info):
+        pass
+
+    def after(self, info):
+        pass
+
+    def error(self, info, exception):
+        pass
+
+
+class Instrumentation(object):
+
+    """
+    Runs hooks around every call_graph_api and stream call. An exception in a hook is logged, never raised into the call.
+
+        metrics = MetricsCollector()
+        pyfb = PyFacebook(token_text=token, instrumentation=Instrumentation([metrics, LoggingCollector()]))
+        print metrics.to_prometheus()
+
+    """
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+
+    def __nonzero__(self):
+        return bool(self.hooks)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def __dispatch(self, method, *args):
+        for hook in self.hooks:
+            try:
+                getattr(hook, method)(*args)
+            except Exception:
+                logger.exception("pyfacebook instrumentation hook %r failed in %s", hook, method)
+
+    def before(self, info):
+        self.__dispatch('before', info)
+
+    def after(self, info):
+        self.__dispatch('after', info)
+
+    def error(self, info, exception):
+        self.__dispatch('error', info, exception)
+
+
+class LatencyHistogram(object):
+
+    """
+    Counts latencies into cumulative buckets, the way Prometheus histograms do.
+
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """
+        :rtype list: (upper bound, count of observations at or under it) pairs, ending with +Inf
+
+        """
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class CallStats(object):
+
+    def __init__(self, buckets):
+        self.latency = LatencyHistogram(buckets)
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.bytes = 0
+
+
+def format_labels(labels):
+    return '{' + ','.join('%s="%s"' % (key, str(val).replace('\\', '\\\\').replace('"', '\\"'))
+                          for key, val in labels) + '}'
+
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class MetricsCollector(Hook):
+
+    """
+    Keeps a latency histogram and call, error, cache hit, retry and byte counters per endpoint and method.
+    Endpoints are grouped with their ids left out, e.g. {id}/adgroups,
+    and reads of single objects by model, e.g. {AdGroup}.
+
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='pyfacebook_graph'):
+        self.buckets = buckets
+        self.prefix = prefix
+        self.started_at = time.time()
+        self.stats = {}
+        self.__lock = threading.Lock()
+
+    def __record(self, info):
+        key = (info.endpoint_name, info.http_method)
+        with self.__lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = CallStats(self.buckets)
+            stats.calls += 1
+            stats.errors += info.error is not None
+            stats.cache_hits += info.cache_hit
+            stats.retries += info.retries
+            stats.bytes += info.bytes
+            stats.latency.observe(info.latency)
+
+    def after(self, info):
+        self.__record(info)
+
+    def error(self, info, exception):
+        self.__record(info)
+
+    def throughput(self):
+        """
+        :rtype dict: Calls per second since the collector was created, per (endpoint, method)
+
+        """
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        with self.__lock:
+            return dict((key, stats.calls / elapsed) for key, stats in self.stats.items())
+
+    def to_prometheus(self):
+        """
+        :rtype str: Every metric, in the Prometheus text exposition format
+
+        """
+        p = self.prefix
+        lines = [
+            '# HELP %s_call_duration_seconds Latency of Graph API calls.' % p,
+            '# TYPE %s_call_duration_seconds histogram' % p,
+        ]
+        with self.__lock:
+            items = sorted(self.stats.items())
+            for (endpoint, method), stats in items:
+                labels = [('endpoint', endpoint), ('method', method)]
+                for bound, count in stats.latency.cumulative():
+                    lines.append('%s_call_duration_seconds_bucket%s %d' % (p, format_labels(labels + [('le', format_bound(bound))]), count))
+                lines.append('%s_call_duration_seconds_sum%s %r' % (p, format_labels(labels), stats.latency.sum))
+                lines.append('%s_call_duration_seconds_count%s %d' % (p, format_labels(labels), stats.latency.count))
+            for name, attr, help in (('calls_total', 'calls', 'Graph API calls made.'),
+                                     ('errors_total', 'errors', 'Graph API calls that raised.'),
+                                     ('cache_hits_total', 'cache_hits', 'Graph API calls served from the response cache.'),
+                                     ('retries_total', 'retries', 'Graph API call retries.'),
+                                     ('response_bytes_total', 'bytes', 'Bytes received from the Graph API.')):
+                lines.append('# HELP %s_%s %s' % (p, name, help))
+                lines.append('# TYPE %s_%s counter' % (p, name))
+                for (endpoint, method), stats in items:
+                    lines.append('%s_%s%s %d' % (p, name, format_labels([('endpoint', endpoint), ('method', method)]),
+                                                 getattr(stats, attr)))
+        return '\n'.join(lines) + '\n'
+
+
+class LoggingCollector(Hook):
+
+    """
+    Logs one JSON line per call to the pyfacebook logger, at INFO, or WARNING for calls that raised.
+
+    """
+
+    def __init__(self, logger=logger):
+        self.logger = logger
+
+    def after(self, info):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(json.dumps(info.to_json(), sort_keys=True))
+
+    def error(self, info, exception):
+        self.logger.warning(json.dumps(info.to_json(), sort_keys=True))
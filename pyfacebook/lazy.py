@@ -0,0 +1,134 @@
+import datetime
+
+from dateutil import parser as date_parser
+from tinymodel import TinyModel
+
+from pyfacebook.profiles import model_signature
+
+# (model signature, field decoders) by model
+_decoders = {}
+
+
+def is_model(allowed_type):
+    return isinstance(allowed_type, type) and issubclass(allowed_type, TinyModel)
+
+
+def field_decoder(field_def):
+    """
+    Builds a function turning the json value of a field into its Python value.
+
+    :param tinymodel.FieldDef field_def: The definition of the field
+    :rtype function: The decoder
+
+    """
+    from_json = (getattr(field_def, 'custom_translators', None) or {}).get('from_json')
+    if from_json:
+        return lambda value: from_json(value) if value is not None else None
+
+    allowed_types = field_def.allowed_types
+    if datetime.datetime in allowed_types:
+        return lambda value: date_parser.parse(value) if isinstance(value, basestring) else value
+    if long in allowed_types:
+        return lambda value: long(value) if isinstance(value, (basestring, int)) else value
+    if int in allowed_types:
+        return lambda value: int(value) if isinstance(value, basestring) else value
+
+    for allowed_type in allowed_types:
+        if is_model(allowed_type):
+            return lambda value: allowed_type(from_json=value, preprocessed=True) if isinstance(value, dict) else value
+        if isinstance(allowed_type, list) and allowed_type and is_model(allowed_type[0]):
+            child_model = allowed_type[0]
+            return lambda value: [child_model(from_json=obj, preprocessed=True) for obj in value] \
+                if isinstance(value, list) else value
+    return lambda value: value
+
+
+def model_decoders(model):
+    """
+    :rtype dict: The field decoders of a model by field name, built on first use and again if its fields change
+
+    """
+    signature = model_signature(model)
+    cached = _decoders.get(model)
+    if cached is None or cached[0] != signature:
+        cached = _decoders[model] = (signature, dict((field_def.title, field_decoder(field_def))
+                                                     for field_def in model.FIELD_DEFS))
+    return cached[1]
+
+
+class LazyModel(object):
+
+    """
+    A lightweight stand-in for a TinyModel, over the raw dict Facebook returned.
+    A field is decoded the first time it's read. Nothing is validated until materialize or validate is called.
+
+    """
+    __slots__ = ('model', 'raw', '_values')
+
+    def __init__(self, model, raw):
+        """
+        :param tinymodel.TinyModel model: The model the dict represents
+        :param dict raw: The json-decoded object from Facebook
+
+        """
+        self.model = model
+        self.raw = raw
+        self._values = {}
+
+    def __getattr__(self, name):
+        # Only fields are looked up here. Internal names get here when they aren't set yet,
+        # e.g. while copy or pickle build a new instance, and must not recurse.
+        if name.startswith('_') or name in LazyModel.__slots__:
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        decoder = model_decoders(self.model).get(name)
+        if decoder is None or name not in self.raw:
+            raise AttributeError("'%s' object has no attribute '%s'" % (self.model.__name__, name))
+        value = self._values[name] = decoder(self.raw[name])
+        return value
+
+    def __getstate__(self):
+        return self.model, self.raw
+
+    def __setstate__(self, state):
+        self.model, self.raw = state
+        self._values = {}
+
+    def __repr__(self):
+        return '<Lazy %s %s>' % (self.model.__name__, self.raw.get('id', ''))
+
+    def materialize(self):
+        """
+        :rtype tinymodel.TinyModel: The full model object
+
+        """
+        return self.model(from_json=self.raw, preprocessed=True)
+
+    def validate(self):
+        """
+        Materializes and validates the model, raising if it's invalid.
+
+        :rtype tinymodel.TinyModel: The validated model object
+
+        """
+        obj = self.materialize()
+        obj.validate()
+        return obj
+
+
+def json_to_lazy_objects(list_or_dict, model):
+    """
+    Wraps a list or a dict of json objects in LazyModels, like json_to_objects does with TinyModels.
+
+    :param < list | dict > list_or_dict: A list or a dict of JSON objects
+    :rtype < list | dict >: A list or a dict of LazyModels
+
+    """
+    if isinstance(list_or_dict, list):
+        return [LazyModel(model, obj) for obj in list_or_dict]
+    elif isinstance(list_or_dict, dict):
+        return dict((key, LazyModel(model, val)) for key, val in list_or_dict.items())
+    raise Exception("Facebook data returned in an unrecognized type: " + str(type(list_or_dict)))
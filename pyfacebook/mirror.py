@@ -0,0 +1,215 @@
+import json
+import sqlite3
+import threading
+
+from pyfacebook import models
+from pyfacebook.profiles import get_request_profile
+from pyfacebook.stats import to_timestamp
+
+# Indexed columns, and the model fields they're read from
+INDEXED_FIELDS = {
+    'account_id': ('account_id',),
+    'campaign_id': ('campaign_id',),
+    'campaign_group_id': ('campaign_group_id',),
+    'image_hash': ('image_hash', 'hash'),
+    'status': ('adgroup_status', 'campaign_status', 'campaign_group_status', 'account_status'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    model TEXT NOT NULL,
+    id TEXT NOT NULL,
+    account_id TEXT,
+    campaign_id TEXT,
+    campaign_group_id TEXT,
+    image_hash TEXT,
+    status TEXT,
+    updated_time REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (model, id)
+);
+CREATE INDEX IF NOT EXISTS objects_account_id ON objects (model, account_id);
+CREATE INDEX IF NOT EXISTS objects_campaign_id ON objects (model, campaign_id);
+CREATE INDEX IF NOT EXISTS objects_campaign_group_id ON objects (model, campaign_group_id);
+CREATE INDEX IF NOT EXISTS objects_image_hash ON objects (model, image_hash);
+CREATE INDEX IF NOT EXISTS objects_status ON objects (model, status);
+CREATE TABLE IF NOT EXISTS watermarks (
+    account_id TEXT NOT NULL,
+    connection TEXT NOT NULL,
+    watermark REAL,
+    PRIMARY KEY (account_id, connection)
+);
+"""
+
+
+def account_number(account_id):
+    """
+    Facebook writes account ids as act_123 in endpoints but 123 in fields. The mirror stores 123.
+
+    """
+    account_id = str(account_id)
+    return account_id[4:] if account_id.startswith('act_') else account_id
+
+
+class ObjectMirror(object):
+
+    """
+    A local SQLite copy of Facebook objects, indexed on id, account_id, campaign_id, campaign_group_id,
+    image_hash and status, so lookups don't need a Graph API call.
+
+    Pass one to PyFacebook as mirror to store every GET result, batched or not, or to IncrementalSync as its store.
+    It is safe to share between threads.
+
+        mirror = ObjectMirror('objects.db')
+        adgroups = mirror.query(models.AdGroup, campaign_id=6000000000001, status='ACTIVE')
+
+    """
+
+    def __init__(self, filename=':memory:'):
+        """
+        :param str filename: The SQLite database file. Defaults to an in-memory database.
+
+        """
+        self.__db = sqlite3.connect(filename, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock:
+            self.__db.executescript(SCHEMA)
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
+
+    @staticmethod
+    def __json(obj):
+        if not isinstance(obj, dict):
+            obj = obj.to_json(return_dict=True)
+        id = obj.get('id', obj.get('hash'))
+        return (str(id), obj) if id is not None else (None, None)
+
+    @staticmethod
+    def __row(model, id, obj, account_id=None):
+        row = [model.__name__, id]
+        for column, fields in sorted(INDEXED_FIELDS.items()):
+            value = next((obj[field] for field in fields if obj.get(field) is not None), None)
+            if column == 'account_id':
+                value = value if value is not None else account_id
+                value = account_number(value) if value is not None else None
+            row.append(None if value is None else unicode(value))
+        row.append(to_timestamp(obj.get('updated_time')) if obj.get('updated_time') else None)
+        row.append(json.dumps(obj))
+        return row
+
+    def __stored(self, model, ids):
+        """
+        :rtype dict: The stored account_id column and json of the objects with these ids, by id
+
+        """
+        stored = {}
+        ids = list(ids)
+        # SQLite takes at most 999 variables per statement
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            rows = self.__db.execute('SELECT id, account_id, data FROM objects WHERE model = ? AND id IN (' +
+                                     ', '.join('?' * len(chunk)) + ')', [model.__name__] + chunk).fetchall()
+            stored.update((id, (stored_account_id, json.loads(data))) for id, stored_account_id, data in rows)
+        return stored
+
+    def put(self, model, objects, account_id=None):
+        """
+        Adds objects to the mirror, or updates the ones already in it.
+        Only the fields the objects have are updated, so objects read with a few fields
+        don't wipe out the other fields of their mirrored copy. A field a dict holds as None was set to null
+        by Facebook, and is stored as null. A TinyModel's None fields are fields it wasn't read with, and are skipped.
+
+        :param tinymodel.TinyModel model: The model of the objects
+        :param iterable objects: TinyModels, or dicts as returned by Facebook
+        :param str account_id: The account the objects belong to, for objects without an account_id field
+
+        """
+        updates = {}
+        for obj in objects:
+            keep_nulls = isinstance(obj, dict)
+            id, obj = self.__json(obj)
+            if id is not None:
+                updates.setdefault(id, {}).update((key, val) for key, val in obj.items()
+                                                  if keep_nulls or val is not None)
+        columns = ', '.join(['model', 'id'] + sorted(INDEXED_FIELDS) + ['updated_time', 'data'])
+        with self.__lock:
+            with self.__db:
+                stored = self.__stored(model, updates)
+                rows = []
+                for id, obj in updates.items():
+                    stored_account_id, merged = stored.get(id, (None, {}))
+                    merged.update(obj)
+                    rows.append(self.__row(model, id, merged, account_id or stored_account_id))
+                self.__db.executemany('INSERT OR REPLACE INTO objects (' + columns + ') VALUES (' +
+                                      ', '.join('?' * (len(INDEXED_FIELDS) + 4)) + ')', rows)
+
+    def delete(self, model, ids):
+        with self.__lock:
+            with self.__db:
+                self.__db.executemany('DELETE FROM objects WHERE model = ? AND id = ?',
+                                      [(model.__name__, str(id)) for id in ids])
+
+    def query(self, model, return_json=False, **filters):
+        """
+        Finds mirrored objects of a model by indexed columns.
+
+            mirror.query(models.AdCreative, image_hash='68e07662e829b8330cc740b523ff7847')
+
+        :param tinymodel.TinyModel model: The model of the objects
+        :param bool return_json: If True, returns dicts instead of TinyModels
+        :param filters: Values of id, account_id, campaign_id, campaign_group_id, image_hash or status to match.
+                        A list or tuple value matches any of its items.
+        :rtype list: The matching objects
+
+        """
+        where = ['model = ?']
+        args = [model.__name__]
+        for column, value in sorted(filters.items()):
+            if column != 'id' and column not in INDEXED_FIELDS:
+                raise Exception("Can't query the mirror by " + column + ". Indexed columns are: id, " +
+                                ", ".join(sorted(INDEXED_FIELDS)))
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            if column == 'account_id':
+                values = [account_number(val) for val in values]
+            where.append(column + ' IN (' + ', '.join('?' * len(values)) + ')')
+            args.extend(unicode(val) for val in values)
+        with self.__lock:
+            rows = self.__db.execute('SELECT data FROM objects WHERE ' + ' AND '.join(where), args).fetchall()
+        objects = [json.loads(row[0]) for row in rows]
+        if return_json:
+            return objects
+        return [model(from_json=obj, preprocessed=True) for obj in objects]
+
+    def get(self, model, id, return_json=False):
+        """
+        :rtype tinymodel.TinyModel: The mirrored object with this id, or None
+
+        """
+        return next(iter(self.query(model, return_json=return_json, id=id)), None)
+
+    # The store interface of IncrementalSync
+
+    def get_watermark(self, account_id, connection):
+        with self.__lock:
+            row = self.__db.execute('SELECT watermark FROM watermarks WHERE account_id = ? AND connection = ?',
+                                    (account_number(account_id), connection)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, account_id, connection, watermark):
+        with self.__lock:
+            with self.__db:
+                self.__db.execute('INSERT OR REPLACE INTO watermarks (account_id, connection, watermark) VALUES (?, ?, ?)',
+                                  (account_number(account_id), connection, watermark))
+
+    def objects(self, account_id, connection):
+        model = get_request_profile(models.AdAccount).connection_models[connection]
+        return dict((str(obj.get('id', obj.get('hash'))), obj)
+                    for obj in self.query(model, return_json=True, account_id=account_id))
+
+    def upsert(self, account_id, connection, objects):
+        self.put(get_request_profile(models.AdAccount).connection_models[connection], objects, account_id=account_id)
+
+    def remove(self, account_id, connection, ids):
+        self.delete(get_request_profile(models.AdAccount).connection_models[connection], ids)
@@ -20,8 +20,12 @@ class FacebookModel(TinyModel):
     There should be a 1-to-1 correspondence to the Facebook model definitions,
     with the notable exception of "connections" which we defined as model fields but Facebook does not.
 
+    READ_ONLY lists the fields Facebook sets itself, or doesn't let us change once an object exists.
+    They are never sent in updates.
+
     """
     endpoint = None
+    READ_ONLY = []
 
 
 class SupportModel(TinyModel):
@@ -69,6 +73,7 @@ class AdImage(FacebookModel):
     ]
 
     CREATE_ONLY = ['file']
+    READ_ONLY = ['hash', 'url']
 
 
 class AdUser(FacebookModel):
@@ -217,6 +222,8 @@ class CustomAudience(FacebookModel):
         FieldDef(title='approximate_count', allowed_types=[int]),
     ]
 
+    READ_ONLY = ['approximate_count']
+
 
 class Targeting(SupportModel):
 
@@ -351,6 +358,7 @@ class AdCreative(FacebookModel):
     ]
 
     CREATE_ONLY = ['follow_redirect']
+    READ_ONLY = ['preview_url']
     CONNECTIONS = ['previews']
 
 
@@ -383,6 +391,8 @@ class AdGroup(FacebookModel):
     ]
 
     CREATE_ONLY = ['creative']
+    READ_ONLY = ['account_id', 'campaign_id', 'adgroup_review_feedback', 'creative_ids', 'last_updated_by_app_id',
+                 'created_time', 'updated_time']
     CONNECTIONS = ['stats', 'adcreatives', 'previews']
 
 
@@ -423,6 +433,7 @@ class AdSet(FacebookModel):
         FieldDef(title='stats', allowed_types=[[AdStatistic]]),
     ]
 
+    READ_ONLY = ['account_id', 'campaign_group_id', 'created_time', 'updated_time', 'budget_remaining']
     CONNECTIONS = ['adcreatives', 'adgroups', 'stats']
 
 
@@ -455,6 +466,8 @@ class AdAccount(FacebookModel):
         FieldDef(title='adpreviewscss', allowed_types=[[AdPreviewCss]]),
     ]
 
+    READ_ONLY = ['account_id', 'account_status', 'currency', 'timezone_id', 'timezone_name', 'timezone_offset_hours_utc',
+                 'amount_spent']
     CONNECTIONS = ['users', 'adcampaigns', 'adimages', 'adcreatives',
                    'adgroups', 'stats', 'adgroupstats', 'adpreviewscss', 'customaudiences']
 
@@ -0,0 +1,114 @@
+import threading
+
+from urlparse import urlparse, parse_qs
+
+# Query params Facebook uses to point at a page of a connection
+PAGING_PARAMS = ('after', 'before', 'offset', 'until', 'since', '__paging_token')
+
+
+def next_page_params(fb_response):
+    """
+    Reads the params needed to get the page after this one from a Graph API response.
+
+    :param dict fb_response: A dict returned by PyFacebook.get
+    :rtype dict: The paging params of the next page, or None if this is the last page
+
+    """
+    next_url = (fb_response.get('paging') or {}).get('next')
+    if not next_url or not fb_response.get('data'):
+        return None
+    query = parse_qs(urlparse(next_url).query)
+    return dict((key, val[0]) for key, val in query.items() if key in PAGING_PARAMS)
+
+
+class PageFetch(threading.Thread):
+
+    """
+    Gets one page of a connection on a background thread.
+
+    """
+
+    def __init__(self, fetch, params):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.__fetch = fetch
+        self.__params = params
+        self.__result = None
+        self.__error = None
+
+    def run(self):
+        try:
+            self.__result = self.__fetch(self.__params)
+        except Exception, e:
+            self.__error = e
+
+    def result(self):
+        """
+        Waits for the page and returns it, re-raising any error from the background thread.
+
+        """
+        self.join()
+        if self.__error:
+            raise self.__error
+        return self.__result
+
+
+class ConnectionIterator(object):
+
+    """
+    Iterates over every object of a connection, one page at a time.
+
+    Only the current page is held in memory, plus the next one while it is prefetched in the background.
+    The cursor attribute holds the paging params of the page being read. Pass it back as the cursor
+    argument to resume after a crash; at most one page is read twice.
+
+    """
+
+    def __init__(self, pyfb, model, id, connection, cursor=None, prefetch=True, return_json=False, **kwargs):
+        """
+        :param PyFacebook pyfb: The PyFacebook instance used to get pages.
+        :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+        :param str id: The Facebook id of the parent object.
+        :param str connection: The name of the connection.
+        :param dict cursor: Paging params saved from a previous iteration, to resume from.
+        :param bool prefetch: If True, get the next page while the current one is being read.
+        :param bool return_json: If True, yield dicts instead of TinyModels.
+
+        """
+        self.__pyfb = pyfb
+        self.__model = model
+        self.__id = id
+        self.__connection = connection
+        self.__prefetch = prefetch
+        self.__return_json = return_json
+        self.__kwargs = kwargs
+        self.cursor = dict(cursor or {})
+        self.pages = 0
+
+    def __fetch(self, paging_params):
+        params = dict(self.__kwargs)
+        params.update(paging_params)
+        return self.__pyfb.get(model=self.__model, id=self.__id, connection=self.__connection,
+                               return_json=self.__return_json, **params)
+
+    def __iter__(self):
+        page = self.__fetch(self.cursor)
+        while page is not None:
+            self.pages += 1
+            next_params = next_page_params(page)
+            next_fetch = None
+            if next_params is not None and self.__prefetch:
+                next_fetch = PageFetch(self.__fetch, next_params)
+                next_fetch.start()
+
+            for obj in page['data']:
+                yield obj
+
+            if next_params is None:
+                page = None
+            elif next_fetch:
+                page = next_fetch.result()
+            else:
+                page = self.__fetch(next_params)
+            if next_params is not None:
+                self.cursor = next_params
@@ -0,0 +1,63 @@
+import json
+import threading
+
+from pyfacebook.utils import (
+    default_fields,
+    first_item,
+    make_endpoint,
+)
+
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+
+def model_signature(model):
+    """
+    A fingerprint of the model attributes a RequestProfile is built from: the title and types of each field,
+    and the CONNECTIONS and CREATE_ONLY names. Changing any of them, in place or not, changes it.
+
+    :param tinymodel.TinyModel model: A model class
+    :rtype int: The fingerprint
+
+    """
+    return hash((tuple((field_def.title, repr(field_def.allowed_types)) for field_def in model.FIELD_DEFS),
+                 tuple(getattr(model, 'CONNECTIONS', None) or ()), tuple(getattr(model, 'CREATE_ONLY', None) or ())))
+
+
+class RequestProfile(object):
+
+    """
+    Everything PyFacebook needs to know about a model to call the Graph API with it, computed once.
+
+    """
+
+    def __init__(self, model):
+        """
+        :param tinymodel.TinyModel model: The model class to profile
+
+        """
+        self.model = model
+        self.signature = model_signature(model)
+        self.default_fields = default_fields(model)
+        self.encoded_fields = json.dumps(self.default_fields)
+        self.endpoint = make_endpoint(model)
+        self.connection_models = {}
+        for field_def in model.FIELD_DEFS:
+            if field_def.title in getattr(model, 'CONNECTIONS', []):
+                self.connection_models[field_def.title] = first_item(field_def.allowed_types[0])
+
+
+def get_request_profile(model):
+    """
+    Returns the RequestProfile of a model, building it on first use or when the model's fields have changed.
+
+    :param tinymodel.TinyModel model: A model class
+    :rtype RequestProfile: The model's profile
+
+    """
+    profile = _profiles.get(model)
+    if profile is None or profile.signature != model_signature(model):
+        with _profiles_lock:
+            profile = RequestProfile(model)
+            _profiles[model] = profile
+    return profile
@@ -0,0 +1,231 @@
+import re
+import json
+import time
+import random
+import threading
+
+from pyfacebook.utils import FacebookException
+
+# Graph API error codes meaning a call was throttled
+THROTTLE_CODES = (4, 17, 613)
+APP_THROTTLE_CODES = (4,)
+
+ACCOUNT_PATTERN = re.compile(r'^(act_\d+)')
+
+
+class TokenBucket(object):
+
+    """
+    Paces calls to `rate` per second, allowing bursts of up to `capacity` calls. Safe to share between threads.
+
+    """
+
+    def __init__(self, rate, capacity, clock=time.time, sleep=time.sleep):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.paused_until = 0.0
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__last = clock()
+        self.__lock = threading.Lock()
+
+    def __refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.__last) * self.rate)
+        self.__last = now
+
+    def acquire(self, tokens=1):
+        """
+        Takes tokens from the bucket, sleeping until they're available.
+
+        :rtype float: The number of seconds slept
+
+        """
+        with self.__lock:
+            now = self.__clock()
+            self.__refill(now)
+            self.tokens -= tokens
+            wait = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+        if wait:
+            self.__sleep(wait)
+        return wait
+
+    def set_rate(self, rate):
+        with self.__lock:
+            self.__refill(self.__clock())
+            self.rate = float(rate)
+
+    def pause(self, seconds):
+        """
+        Holds back every caller of this bucket for the given number of seconds.
+
+        """
+        with self.__lock:
+            self.paused_until = max(self.paused_until, self.__clock() + seconds)
+
+
+class RateLimiter(object):
+
+    """
+    Paces Graph API calls to stay under Facebook's rate limits. See documentation at:
+    https://developers.facebook.com/docs/reference/ads-api/api-rate-limiting/
+
+    Calls take a token from an app-wide bucket and from a bucket for the ad account they target.
+    The usage percentages Facebook reports in the X-App-Usage and X-Ad-Account-Usage headers slow
+    a bucket down once they pass target_usage. Throttled calls pause the bucket they hit and are retried
+    after an exponential backoff with full jitter.
+
+    Share one RateLimiter between every PyFacebook instance using the same app, including across threads.
+
+    """
+
+    def __init__(self, rate=20, burst=40, target_usage=75, max_retries=5, base_backoff=1.0, max_backoff=300.0,
+                 clock=time.time, sleep=time.sleep):
+        """
+        :param float rate: Calls per second allowed per bucket while usage is under target_usage.
+        :param int burst: Calls a bucket allows back to back after being idle.
+        :param int target_usage: The usage percentage above which calls are slowed down.
+        :param int max_retries: How many times a throttled call is retried before its FacebookException is raised.
+        :param float base_backoff: Seconds the first retry waits at most. Each retry doubles it.
+        :param float max_backoff: The most seconds a retry ever waits.
+
+        """
+        self.rate = rate
+        self.burst = burst
+        self.target_usage = target_usage
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.throttled = 0
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__buckets = {}
+        self.__lock = threading.Lock()
+
+    def bucket(self, name):
+        """
+        :param str name: app, or an ad account id like act_123
+        :rtype TokenBucket: The bucket pacing calls for that name
+
+        """
+        bucket = self.__buckets.get(name)
+        if bucket is None:
+            with self.__lock:
+                bucket = self.__buckets.setdefault(name, TokenBucket(self.rate, self.burst, self.__clock, self.__sleep))
+        return bucket
+
+    @staticmethod
+    def account_for(endpoint):
+        """
+        :rtype str: The ad account id an endpoint belongs to, or None if it can't be told from the endpoint
+
+        """
+        match = ACCOUNT_PATTERN.match(endpoint)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def cost(params):
+        """
+        :rtype int: The number of calls Facebook counts for a request, i.e. one per operation of a batch
+
+        """
+        batch = params.get('batch')
+        if batch:
+            try:
+                return max(1, len(json.loads(batch)))
+            except (TypeError, ValueError):
+                pass
+        return 1
+
+    def acquire(self, endpoint, params):
+        """
+        Waits until a call to the endpoint is allowed.
+
+        :rtype float: The number of seconds waited
+
+        """
+        cost = self.cost(params)
+        waited = self.bucket('app').acquire(cost)
+        account = self.account_for(endpoint)
+        if account:
+            waited += self.bucket(account).acquire(cost)
+        return waited
+
+    def __usage(self, header):
+        """
+        :rtype float: The highest percentage in a usage header, or None if there is no header
+
+        """
+        if not header:
+            return None
+        try:
+            usage = json.loads(header)
+        except ValueError:
+            return None
+        values = [val for val in usage.values() if isinstance(val, (int, long, float))]
+        return max(values) if values else None
+
+    def __adjust(self, bucket, usage):
+        if usage is None:
+            return
+        if usage >= 100:
+            bucket.set_rate(bucket.base_rate * 0.01)
+            bucket.pause(self.base_backoff)
+        elif usage > self.target_usage:
+            headroom = (100.0 - usage) / (100.0 - self.target_usage)
+            bucket.set_rate(bucket.base_rate * max(0.01, headroom))
+        else:
+            bucket.set_rate(bucket.base_rate)
+
+    def update(self, endpoint, headers):
+        """
+        Adjusts the pace of calls from the usage headers of a Graph API response.
+
+        :param str endpoint: The endpoint that was called
+        :param dict headers: The response headers
+
+        """
+        self.__adjust(self.bucket('app'), self.__usage(headers.get('x-app-usage')))
+        account = self.account_for(endpoint)
+        if account:
+            self.__adjust(self.bucket(account), self.__usage(headers.get('x-ad-account-usage')))
+
+    def backoff(self, endpoint, code, attempt):
+        """
+        Handles a throttled call: pauses the bucket it hit and waits before it's retried.
+
+        :param str endpoint: The endpoint that was called
+        :param int code: The Facebook error code
+        :param int attempt: How many times the call has been retried so far
+        :rtype float: The number of seconds waited
+
+        """
+        self.throttled += 1
+        account = self.account_for(endpoint)
+        name = account if account and code not in APP_THROTTLE_CODES else 'app'
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+        self.bucket(name).pause(delay)
+        self.__sleep(delay)
+        return delay
+
+    def call(self, endpoint, params, send):
+        """
+        Sends a call through the limiter, retrying it while it's throttled.
+
+        :param str endpoint: The endpoint to call
+        :param dict params: The encoded params of the call
+        :param function send: Sends the call and returns its result
+        :rtype: Whatever send returns
+
+        """
+        attempt = 0
+        while True:
+            self.acquire(endpoint, params)
+            try:
+                return send()
+            except FacebookException, e:
+                if e.code not in THROTTLE_CODES or attempt >= self.max_retries:
+                    raise
+                self.backoff(endpoint, e.code, attempt)
+                attempt += 1
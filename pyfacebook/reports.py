@@ -0,0 +1,295 @@
+import json
+import time
+import heapq
+import logging
+import itertools
+import threading
+
+from pyfacebook import models
+from pyfacebook.retry import is_transient
+from pyfacebook.utils import FacebookException, chunk_ids
+
+logger = logging.getLogger('pyfacebook')
+COMPLETED = 'Job Completed'
+FAILED_STATUSES = ('Job Failed', 'Job Skipped')
+STATUS_FIELDS = 'id,async_status,async_percent_completion'
+
+
+class ReportJob(object):
+
+    """
+    An asynchronous stats report, running on Facebook's side while a ReportScheduler polls it.
+
+        job = pyfb.submit_report('act_123', data_columns=['adgroup_id', 'impressions'], date_preset='last_90_days')
+        for stat in job.results():
+            ...
+
+    """
+
+    def __init__(self, pyfb, account_id, report_run_id, interval, return_json=False, timeout=None):
+        self.pyfb = pyfb
+        self.account_id = account_id
+        self.id = str(report_run_id)
+        self.return_json = return_json
+        self.status = None
+        self.percent = 0
+        self.polls = 0
+        self.poll_errors = 0
+        self.error = None
+        self.interval = interval
+        self.submitted_at = time.time()
+        self.polled_at = self.submitted_at
+        self.next_poll_at = self.submitted_at + interval
+        self.completed_at = None
+        self.deadline = self.submitted_at + timeout if timeout else None
+        self.__done = threading.Event()
+
+    def __repr__(self):
+        return '<ReportJob %s %s %s%%>' % (self.id, self.status, self.percent)
+
+    def done(self):
+        return self.__done.is_set()
+
+    def finish(self, error=None):
+        self.error = error
+        self.completed_at = time.time()
+        self.__done.set()
+
+    def wait(self, timeout=None):
+        """
+        Waits for the report to complete or fail.
+
+        :param float timeout: The most seconds to wait. None waits until it's done.
+        :rtype bool: True if the report is done
+
+        """
+        self.__done.wait(timeout)
+        return self.done()
+
+    def results(self, timeout=None, **kwargs):
+        """
+        Waits for the report, then iterates over its rows page by page. Takes the same keyword args as get.
+
+        :param float timeout: The most seconds to wait for the report.
+        :rtype ConnectionIterator: AdStatistic objects, or dicts if the job was submitted with return_json
+
+        """
+        if not self.wait(timeout):
+            raise Exception("Report %s isn't done after %s seconds" % (self.id, timeout))
+        if self.error is not None:
+            raise self.error
+        return self.pyfb.iter_connection(models.AdStatistic, self.account_id, 'reportstats',
+                                         report_run_id=self.id, return_json=self.return_json, **kwargs)
+
+
+class ReportScheduler(object):
+
+    """
+    Polls many report jobs from one background thread.
+
+    Jobs due at the same time are polled together, up to max_ids per call through the ids param,
+    and no socket is held open between polls. A job that progresses is polled about when it should
+    be done, and a job that doesn't is polled less and less often.
+
+    :param float min_interval: The fewest seconds between two polls of a job.
+    :param float max_interval: The most seconds between two polls of a job.
+    :param float backoff: How much longer to wait after a poll that shows no progress.
+    :param int max_ids: The most jobs polled in one call. Facebook allows 50.
+    :param int max_poll_errors: How many polls of a job may fail in a row before the job fails.
+
+    """
+
+    def __init__(self, min_interval=1.0, max_interval=60.0, backoff=1.5, max_ids=50, max_poll_errors=5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_ids = max_ids
+        self.max_poll_errors = max_poll_errors
+        self.__queue = []
+        self.__sequence = itertools.count()
+        self.__condition = threading.Condition()
+        self.__thread = None
+        self.__stopped = False
+
+    @property
+    def pending(self):
+        with self.__condition:
+            return len(self.__queue)
+
+    def submit(self, pyfb, account_id, return_json=False, timeout=None, **kwargs):
+        """
+        Starts a report job on Facebook and schedules it to be polled.
+
+        :param PyFacebook pyfb: The client the job is submitted, polled and read with.
+        :param str account_id: The ad account to report on, e.g. act_123.
+        :param bool return_json: If True, the job's results are dicts instead of AdStatistics.
+        :param float timeout: Seconds after which the job fails if it isn't done.
+        :rtype ReportJob: The submitted job
+
+        """
+        params = dict(kwargs)
+        params['async'] = 'true'
+        fb_response = pyfb.call_graph_api(endpoint='%s/reportstats' % account_id, http_method='POST',
+                                          expect_json=False, params=params)
+        job = ReportJob(pyfb, account_id, self.__report_run_id(fb_response), self.min_interval,
+                        return_json=return_json, timeout=timeout)
+        self.__schedule(job)
+        return job
+
+    @staticmethod
+    def __report_run_id(fb_response):
+        # Facebook answers with the bare id of the report run, which call_graph_api hands back as text
+        if isinstance(fb_response, dict):
+            obj = fb_response['data'][0]
+            return obj.get('report_run_id') or obj['id']
+        return json.loads(fb_response)
+
+    def __schedule(self, job):
+        with self.__condition:
+            heapq.heappush(self.__queue, (job.next_poll_at, next(self.__sequence), job))
+            if self.__thread is None or not self.__thread.is_alive():
+                self.__stopped = False
+                self.__thread = threading.Thread(target=self.__run)
+                self.__thread.daemon = True
+                self.__thread.start()
+            self.__condition.notify()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while not self.__stopped and (not self.__queue or self.__queue[0][0] > time.time()):
+                    self.__condition.wait(self.__queue[0][0] - time.time() if self.__queue else None)
+                if self.__stopped:
+                    return
+            try:
+                self.poll()
+            except Exception:
+                # poll has failed the jobs it was polling, and the others still need this thread
+                logger.exception("pyfacebook report scheduler failed to poll")
+
+    def stop(self):
+        """
+        Stops polling. Jobs already submitted are left as they are.
+
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+
+    def poll(self):
+        """
+        Polls every job that is due, and reschedules the ones still running.
+        If polling raises unexpectedly, the due jobs fail with the exception, so nothing waits on them forever.
+
+        :rtype int: The number of jobs polled
+
+        """
+        # Jobs due a little later are polled now too, so jobs submitted together keep sharing calls
+        polled_until = time.time() + self.min_interval / 2
+        due = []
+        with self.__condition:
+            while self.__queue and self.__queue[0][0] <= polled_until:
+                due.append(heapq.heappop(self.__queue)[2])
+
+        try:
+            by_client = {}
+            for job in due:
+                by_client.setdefault(id(job.pyfb), []).append(job)
+            for jobs in by_client.values():
+                jobs_by_id = dict((job.id, job) for job in jobs)
+                for ids_param in chunk_ids(jobs_by_id.keys(), max_ids=self.max_ids):
+                    self.__poll_chunk(jobs[0].pyfb, [jobs_by_id[job_id] for job_id in ids_param.split(',')])
+        except Exception, e:
+            for job in due:
+                if not job.done():
+                    job.finish(e)
+            raise
+
+        for job in due:
+            if not job.done():
+                self.__schedule(job)
+        return len(due)
+
+    def __poll_chunk(self, pyfb, chunk):
+        """
+        Polls jobs in one call. If the call fails for a reason other than Facebook being unavailable,
+        such as a bad or expired report id, each job is polled alone, so only that id's job fails.
+
+        """
+        try:
+            # a cached status would never change, so polls always go to Facebook
+            fb_response = pyfb.call_graph_api(endpoint='', params={'ids': ','.join(job.id for job in chunk),
+                                                                   'fields': STATUS_FIELDS}, cache=False)
+        except Exception, e:
+            if len(chunk) > 1 and not is_transient(e):
+                for job in chunk:
+                    self.__poll_chunk(pyfb, [job])
+            else:
+                for job in chunk:
+                    self.__poll_failed(job, e)
+            return
+        statuses = fb_response['data'][0] if fb_response['data'] else {}
+        for job in chunk:
+            self.__update(job, statuses.get(job.id) or {})
+
+    def __update(self, job, status):
+        now = time.time()
+        previous_percent = job.percent
+        job.polls += 1
+        job.poll_errors = 0
+        job.status = status.get('async_status', job.status)
+        job.percent = status.get('async_percent_completion', job.percent)
+
+        if job.status == COMPLETED:
+            job.finish()
+        elif job.status in FAILED_STATUSES:
+            job.finish(FacebookException(message='Report %s ended with status %s' % (job.id, job.status)))
+        elif job.deadline is not None and now >= job.deadline:
+            job.finish(FacebookException(message='Report %s timed out at %s%%' % (job.id, job.percent)))
+        else:
+            job.interval = self.next_interval(job.interval, previous_percent, job.percent, now - job.polled_at)
+            job.next_poll_at = now + job.interval
+        job.polled_at = now
+
+    def __poll_failed(self, job, error):
+        job.poll_errors += 1
+        if not is_transient(error) or job.poll_errors >= self.max_poll_errors:
+            job.finish(error)
+        else:
+            job.interval = min(job.interval * self.backoff, self.max_interval)
+            job.next_poll_at = time.time() + job.interval
+
+    def next_interval(self, interval, previous_percent, percent, elapsed):
+        """
+        Picks how long to wait before polling a job again.
+
+        :param float interval: The seconds waited before the last poll
+        :param float previous_percent: How complete the job was at the poll before
+        :param float percent: How complete the job is now
+        :param float elapsed: Seconds between the two polls
+        :rtype float: Seconds to wait
+
+        """
+        if percent > previous_percent and elapsed > 0:
+            # Poll around halfway to when the job should be done at its current pace
+            remaining = (100 - percent) * elapsed / (percent - previous_percent)
+            interval = remaining / 2
+        else:
+            interval *= self.backoff
+        return max(self.min_interval, min(self.max_interval, interval))
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def default_scheduler():
+    """
+    :rtype ReportScheduler: The scheduler shared by every PyFacebook that isn't given its own
+
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = ReportScheduler()
+        return _default_scheduler
@@ -0,0 +1,176 @@
+import time
+import random
+import threading
+
+from requests.exceptions import ConnectionError, Timeout
+
+from pyfacebook.utils import CircuitOpenException, FacebookException, endpoint_name
+
+# Graph API error codes meaning Facebook had a transient problem
+TRANSIENT_CODES = (1, 2)
+
+
+def is_transient(error):
+    """
+    :rtype bool: True if the error is worth retrying: a timeout, a dropped connection, a 5xx or error code 1 or 2
+
+    """
+    if isinstance(error, (Timeout, ConnectionError)):
+        return True
+    if isinstance(error, FacebookException):
+        return error.code in TRANSIENT_CODES or (getattr(error, 'status_code', None) or 0) >= 500
+    return False
+
+
+class CircuitBreaker(object):
+
+    """
+    Fails calls fast while an endpoint keeps failing, instead of letting them pile up.
+
+    After failure_threshold consecutive transient failures the circuit opens and calls raise CircuitOpenException
+    right away. After reset_timeout seconds one trial call is let through: if it succeeds the circuit closes,
+    otherwise it opens again.
+
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.time):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.__trial_running = False
+        self.__clock = clock
+        self.__lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'open' if self.__clock() - self.opened_at < self.reset_timeout else 'half-open'
+
+    def before_call(self, name):
+        with self.__lock:
+            state = self.state
+            if state == 'open' or (state == 'half-open' and self.__trial_running):
+                raise CircuitOpenException(message="Calls to " + name + " are failing. Not calling Facebook for " +
+                                           str(int(self.reset_timeout - (self.__clock() - self.opened_at))) + " more seconds.")
+            if state == 'half-open':
+                self.__trial_running = True
+
+    def record_success(self):
+        with self.__lock:
+            self.failures = 0
+            self.opened_at = None
+            self.__trial_running = False
+
+    def record_failure(self):
+        with self.__lock:
+            self.failures += 1
+            if self.__trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.__clock()
+            self.__trial_running = False
+
+
+class RetryPolicy(object):
+
+    """
+    Retries transient Graph API failures with exponential backoff and full jitter.
+
+    GET and DELETE calls are retried. POST calls are retried only if marked idempotent, since a POST that reached
+    Facebook before failing may already have created its object.
+
+    Retries are drawn from a budget, refilled by budget_ratio per call, so an outage can't multiply traffic.
+    Each endpoint has a CircuitBreaker; ids are ignored, so act_1/adgroups and act_2/adgroups share one.
+
+    Share one RetryPolicy between threads and PyFacebook instances to share its budget and breakers.
+
+    """
+
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=30.0, budget_ratio=0.1, budget_burst=10,
+                 failure_threshold=5, reset_timeout=30.0, sleep=time.sleep, clock=time.time):
+        """
+        :param int max_attempts: The most times a call is made, counting the first.
+        :param float base_delay: Seconds the first retry waits at most. Each retry doubles it.
+        :param float max_delay: The most seconds a retry ever waits.
+        :param float budget_ratio: Retries earned by each call.
+        :param int budget_burst: The most retries that can be saved up.
+        :param int failure_threshold: Consecutive failures that open an endpoint's circuit.
+        :param float reset_timeout: Seconds an open circuit waits before letting a trial call through.
+
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.retries = 0
+        self.budget = float(budget_burst)
+        self.__sleep = sleep
+        self.__clock = clock
+        self.__breakers = {}
+        self.__lock = threading.Lock()
+
+    def breaker(self, endpoint, model=None):
+        """
+        :param str endpoint: The endpoint called
+        :param tinymodel.TinyModel model: The class associated with the objects called, if known
+        :rtype CircuitBreaker: The circuit breaker of an endpoint
+
+        """
+        name = endpoint_name(endpoint, model)
+        with self.__lock:
+            if name not in self.__breakers:
+                self.__breakers[name] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.__clock)
+            return self.__breakers[name]
+
+    def __earn(self):
+        with self.__lock:
+            self.budget = min(self.budget_burst, self.budget + self.budget_ratio)
+
+    def __spend(self):
+        with self.__lock:
+            if self.budget < 1:
+                return False
+            self.budget -= 1
+            self.retries += 1
+            return True
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, endpoint, http_method, send, idempotent=None, model=None):
+        """
+        Makes a call, retrying transient failures.
+
+        :param str endpoint: The endpoint called
+        :param str http_method: GET, POST or DELETE
+        :param function send: Makes the call
+        :param bool idempotent: Whether the call may be repeated. Defaults to True for GET and DELETE.
+        :param tinymodel.TinyModel model: The class associated with the objects called, if known
+        :rtype tuple: (what send returns, the number of retries made)
+
+        """
+        if idempotent is None:
+            idempotent = http_method in ('GET', 'DELETE')
+        name = endpoint_name(endpoint, model)
+        breaker = self.breaker(endpoint, model)
+        self.__earn()
+        attempt = 0
+        while True:
+            breaker.before_call(name)
+            try:
+                result = send()
+            except Exception, e:
+                if not is_transient(e):
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if not idempotent or attempt + 1 >= self.max_attempts or not self.__spend():
+                    raise
+                self.__sleep(self.delay(attempt))
+                attempt += 1
+            else:
+                breaker.record_success()
+                return result, attempt
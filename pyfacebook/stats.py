@@ -0,0 +1,318 @@
+import math
+import calendar
+import datetime
+
+from array import array
+from dateutil import parser as date_parser
+
+from pyfacebook import models
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Columns of AdStatistic, by the typed array they're stored in
+ID_FIELDS = ['account_id', 'adcampaign_id', 'adgroup_id']
+COUNTER_FIELDS = [f.title for f in models.AdStatistic.FIELD_DEFS if f.allowed_types == [int]]
+TIME_FIELDS = ['start_time', 'end_time']
+INTEGER_FIELDS = ID_FIELDS + COUNTER_FIELDS
+NAN = float('nan')
+
+
+def integer_typecode():
+    """
+    Picks the typecode of 64-bit integer arrays: q where array has it, l where longs are 64 bits, as on Linux
+    and macOS, and d otherwise, as on Windows with Python 2. Doubles hold integers exactly up to 2 ** 53.
+
+    """
+    for typecode in ('q', 'l'):
+        try:
+            if array(typecode).itemsize >= 8:
+                return typecode
+        except ValueError:
+            pass
+    return 'd'
+
+INTEGER_TYPECODE = integer_typecode()
+
+
+def to_timestamp(value):
+    """
+    Converts a Facebook time, a datetime or None to a unix timestamp, NaN standing for None.
+
+    """
+    if value is None:
+        return NAN
+    if isinstance(value, basestring):
+        if value.isdigit():
+            return float(value)
+        value = date_parser.parse(value)
+    if isinstance(value, datetime.datetime):
+        return float(calendar.timegm(value.utctimetuple()))
+    return float(value)
+
+
+def from_timestamp(value):
+    return None if math.isnan(value) else datetime.datetime.utcfromtimestamp(value)
+
+
+class StatisticSet(object):
+
+    """
+    A columnar set of AdStatistic rows. Each id and counter column is a typed array of 64-bit integers and each
+    time column an array of unix timestamps, so millions of rows take a few dozen bytes each.
+
+    Slicing, filtering and sums work on the columns without building a row object.
+
+    """
+
+    def __init__(self, columns=None):
+        """
+        :param dict columns: Column arrays by field name. Empty columns are created if not given.
+
+        """
+        self.ids = []
+        self.columns = {}
+        for field in INTEGER_FIELDS:
+            self.columns[field] = array(INTEGER_TYPECODE)
+        for field in TIME_FIELDS:
+            self.columns[field] = array('d')
+        if columns:
+            self.ids = list(columns.pop('id', []))
+            self.columns.update(columns)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Builds a set from AdStatistic dicts, e.g. the data of a stats connection fetched with return_json=True.
+
+        :param iterable rows: Dicts with AdStatistic fields
+        :rtype StatisticSet: The set
+
+        """
+        stats = cls()
+        stats.extend(rows)
+        return stats
+
+    def extend(self, rows):
+        """
+        Appends AdStatistic dicts or objects to the set.
+
+        """
+        ids = self.ids
+        columns = [(field, self.columns[field].append) for field in INTEGER_FIELDS]
+        times = [(field, self.columns[field].append) for field in TIME_FIELDS]
+        for row in rows:
+            if not isinstance(row, dict):
+                row = dict((field, getattr(row, field, None)) for field in ['id'] + INTEGER_FIELDS + TIME_FIELDS)
+            ids.append(row.get('id'))
+            for field, append in columns:
+                append(int(row.get(field) or 0))
+            for field, append in times:
+                append(to_timestamp(row.get(field)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, field):
+        """
+        :rtype array.array: The column of a field. ids are a list.
+
+        """
+        return self.ids if field == 'id' else self.columns[field]
+
+    def __take(self, indexes):
+        columns = dict((field, array(column.typecode, (column[i] for i in indexes)))
+                       for field, column in self.columns.items())
+        columns['id'] = [self.ids[i] for i in indexes]
+        return StatisticSet(columns)
+
+    def __getitem__(self, index):
+        """
+        An int index returns the row as a dict, a slice returns a new StatisticSet.
+
+        """
+        if isinstance(index, slice):
+            columns = dict((field, column[index]) for field, column in self.columns.items())
+            columns['id'] = self.ids[index]
+            return StatisticSet(columns)
+        row = {'id': self.ids[index]}
+        for field in ID_FIELDS:
+            row[field] = long(self.columns[field][index])
+        for field in COUNTER_FIELDS:
+            row[field] = int(self.columns[field][index])
+        for field in TIME_FIELDS:
+            row[field] = from_timestamp(self.columns[field][index])
+        return row
+
+    def rows(self):
+        """
+        :rtype generator: Every row, as a dict
+
+        """
+        for index in xrange(len(self)):
+            yield self[index]
+
+    def to_objects(self):
+        """
+        :rtype list: Every row, as an AdStatistic
+
+        """
+        return [models.AdStatistic(**row) for row in self.rows()]
+
+    def filter(self, mask=None, **equals):
+        """
+        Keeps the rows selected by a mask and whose columns equal the given values.
+
+            stats.filter(adcampaign_id=6000000000001)
+            stats.filter([clicks > 0 for clicks in stats.column('clicks')])
+
+        :param iterable mask: A boolean per row
+        :rtype StatisticSet: The selected rows
+
+        """
+        indexes = xrange(len(self)) if mask is None else [i for i, keep in enumerate(mask) if keep]
+        for field, value in equals.items():
+            column = self.column(field)
+            indexes = [i for i in indexes if column[i] == value]
+        return self.__take(list(indexes))
+
+    def sum(self, field):
+        return long(sum(self.columns[field]))
+
+    def totals(self):
+        """
+        :rtype dict: The sum of every counter column
+
+        """
+        return dict((field, self.sum(field)) for field in COUNTER_FIELDS)
+
+    def rollup(self, by=(), time_bucket=None, time_field='start_time', sums=None, means=(), ratios=('ctr', 'cpm', 'cpc')):
+        """
+        Groups and aggregates the rows. See the rollup function.
+
+        :rtype list: A dict per group
+
+        """
+        return rollup(self, by=by, time_bucket=time_bucket, time_field=time_field, sums=sums, means=means, ratios=ratios)
+
+    def to_numpy(self):
+        """
+        :rtype dict: NumPy arrays by field name, sharing memory with the columns. Needs NumPy installed.
+
+        """
+        if numpy is None:
+            raise ImportError("StatisticSet.to_numpy needs NumPy. Install it with: pip install numpy")
+        arrays = dict((field, numpy.frombuffer(column, dtype=column.typecode) if len(column) else numpy.array([], dtype=column.typecode))
+                      for field, column in self.columns.items())
+        arrays['id'] = numpy.array(self.ids, dtype=object)
+        return arrays
+
+
+# Derived metrics: name -> (numerator, denominator, multiplier)
+RATIOS = {
+    'ctr': ('clicks', 'impressions', 1.0),
+    'cpm': ('spent', 'impressions', 1000.0),
+    'cpc': ('spent', 'clicks', 1.0),
+}
+
+
+def ratio(numerator, denominator, multiplier):
+    return multiplier * numerator / denominator if denominator else None
+
+
+def rollup(stats, by=(), time_bucket=None, time_field='start_time', sums=None, means=(), ratios=('ctr', 'cpm', 'cpc')):
+    """
+    Groups the rows of a StatisticSet and aggregates each group. Runs vectorized on NumPy if it's installed.
+
+        rollup(stats, by=['adcampaign_id'], time_bucket=3600)
+
+    :param StatisticSet stats: The rows to aggregate
+    :param list by: The id fields to group on, e.g. adcampaign_id or account_id
+    :param int time_bucket: If set, rows are also grouped by time_field, floored to this many seconds
+    :param str time_field: start_time or end_time
+    :param list sums: The counters to sum. Defaults to every counter.
+    :param list means: The counters to average over the rows of each group
+    :param list ratios: The derived metrics to compute from the sums. See RATIOS.
+
+    :rtype list: A dict per group with its keys, a rows count, the sums, the means and the ratios, sorted by keys
+
+    """
+    by = list(by)
+    sums = list(COUNTER_FIELDS if sums is None else sums)
+    for name in ratios:
+        for field in RATIOS[name][:2]:
+            if field not in sums:
+                sums.append(field)
+    fields = sums + [field for field in means if field not in sums]
+    if numpy is not None and len(stats):
+        groups = _numpy_groups(stats, by, time_bucket, time_field, fields)
+    else:
+        groups = _python_groups(stats, by, time_bucket, time_field, fields)
+
+    results = []
+    for keys, count, totals in groups:
+        result = dict(zip(by, keys[:len(by)]))
+        if time_bucket:
+            result[time_field] = from_timestamp(keys[-1]) if keys[-1] >= 0 else None
+        result['rows'] = count
+        for field in sums:
+            result[field] = long(totals[field])
+        for field in means:
+            result['mean_' + field] = float(totals[field]) / count
+        for name in ratios:
+            result[name] = ratio(totals[RATIOS[name][0]], totals[RATIOS[name][1]], RATIOS[name][2])
+        results.append(result)
+    return results
+
+
+def _bucket(timestamp, time_bucket):
+    return -1 if math.isnan(timestamp) else int(timestamp // time_bucket * time_bucket)
+
+
+def _python_groups(stats, by, time_bucket, time_field, fields):
+    key_columns = [stats.column(field) for field in by]
+    if time_bucket:
+        key_columns.append([_bucket(value, time_bucket) for value in stats.column(time_field)])
+    value_columns = [(field, stats.column(field)) for field in fields]
+
+    groups = {}
+    for index, keys in enumerate(zip(*key_columns) if key_columns else [()] * len(stats)):
+        group = groups.get(keys)
+        if group is None:
+            group = groups[keys] = [0, dict((field, 0) for field in fields)]
+        group[0] += 1
+        totals = group[1]
+        for field, column in value_columns:
+            totals[field] += column[index]
+    return [(keys, count, totals) for keys, (count, totals) in sorted(groups.items())]
+
+
+def _numpy_groups(stats, by, time_bucket, time_field, fields):
+    key_columns = [numpy.frombuffer(stats.column(field), dtype=stats.column(field).typecode) for field in by]
+    if time_bucket:
+        times = numpy.frombuffer(stats.column(time_field), dtype='d')
+        buckets = numpy.where(numpy.isnan(times), -1, numpy.floor(numpy.nan_to_num(times) / time_bucket) * time_bucket)
+        key_columns.append(buckets.astype('q'))
+    if not key_columns:
+        key_columns = [numpy.zeros(len(stats), dtype='q')]
+
+    # sort rows by their keys, then cut the sorted rows wherever any key changes
+    order = numpy.lexsort(key_columns[::-1])
+    sorted_keys = [column[order] for column in key_columns]
+    changes = numpy.zeros(len(order), dtype=bool)
+    changes[0] = True
+    for column in sorted_keys:
+        changes[1:] |= column[1:] != column[:-1]
+    starts = numpy.flatnonzero(changes)
+    counts = numpy.diff(numpy.append(starts, len(order)))
+
+    value_columns = [(field, stats.column(field)) for field in fields]
+    totals = dict((field, numpy.add.reduceat(numpy.frombuffer(column, dtype=column.typecode)[order], starts))
+                  for field, column in value_columns)
+    groups = []
+    for group, start in enumerate(starts):
+        keys = tuple(long(column[start]) for column in sorted_keys) if (by or time_bucket) else ()
+        groups.append((keys, int(counts[group]), dict((field, long(totals[field][group])) for field in fields)))
+    return groups
@@ -0,0 +1,147 @@
+import re
+import json
+
+from pyfacebook.utils import FacebookException
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JSONStreamParser(object):
+
+    """
+    Incrementally parses a JSON object arriving in chunks, yielding (key, value) pairs for its top-level keys.
+    The items of the top-level data array are yielded one by one as ('data', item), as soon as each is complete,
+    so only one item and one chunk are buffered at a time.
+
+    """
+    STREAMED_KEY = 'data'
+
+    def __init__(self, chunks):
+        """
+        :param iterable chunks: Strings that concatenate to a JSON object, e.g. response.iter_content()
+
+        """
+        self.__chunks = iter(chunks)
+        self.__buffer = ''
+        self.__pos = 0
+        self.__eof = False
+        self.__decoder = json.JSONDecoder()
+
+    def __fill(self):
+        """
+        Reads another chunk, dropping what was already parsed.
+
+        :rtype bool: False if the stream is over
+
+        """
+        for chunk in self.__chunks:
+            if chunk:
+                self.__buffer = self.__buffer[self.__pos:] + chunk
+                self.__pos = 0
+                return True
+        self.__eof = True
+        return False
+
+    def __peek(self):
+        """
+        Skips whitespace and returns the next character, or '' at the end of the stream.
+
+        """
+        while True:
+            self.__pos = WHITESPACE.match(self.__buffer, self.__pos).end()
+            if self.__pos < len(self.__buffer):
+                return self.__buffer[self.__pos]
+            if not self.__fill():
+                return ''
+
+    def __expect(self, chars):
+        char = self.__peek()
+        if not char or char not in chars:
+            raise ValueError("Expected one of %r in JSON stream, got %r" % (chars, char))
+        self.__pos += 1
+        return char
+
+    def __value(self):
+        """
+        Decodes the next complete JSON value, reading more chunks until it's complete.
+        A value ending exactly at the end of the buffer may be a truncated number, so that also reads more.
+
+        """
+        self.__peek()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+                if end < len(self.__buffer) or self.__eof:
+                    self.__pos = end
+                    return value
+            except ValueError:
+                if self.__eof:
+                    raise
+            if not self.__fill():
+                value, self.__pos = self.__decoder.raw_decode(self.__buffer, self.__pos)
+                return value
+
+    def __iter__(self):
+        self.__expect('{')
+        if self.__peek() == '}':
+            return
+        while True:
+            key = self.__value()
+            self.__expect(':')
+            if key == self.STREAMED_KEY and self.__peek() == '[':
+                self.__expect('[')
+                if self.__peek() == ']':
+                    self.__pos += 1
+                else:
+                    while True:
+                        yield key, self.__value()
+                        if self.__expect(',]') == ']':
+                            break
+            else:
+                yield key, self.__value()
+            if self.__expect(',}') == '}':
+                return
+
+
+class StreamedResponse(object):
+
+    """
+    A Graph API response whose data is read from the network as it's iterated over.
+
+    Iterate over it to get the objects of data one at a time. Other top-level keys, like paging,
+    are set as attributes when they're reached; Facebook sends paging after data, so read it once iteration is over.
+    An error response raises a FacebookException during iteration.
+
+    """
+
+    def __init__(self, chunks, model=None, return_json=False, close=None):
+        """
+        :param iterable chunks: The body of the response, in chunks
+        :param tinymodel.TinyModel model: The class the objects are translated to
+        :param bool return_json: If True, objects are yielded as dicts
+        :param function close: Called to release the connection once the response is read
+
+        """
+        self.__events = JSONStreamParser(chunks)
+        self.__model = model
+        self.__return_json = return_json
+        self.__close = close
+        self.paging = None
+        self.extra = {}
+
+    def __iter__(self):
+        try:
+            for key, value in self.__events:
+                if key == JSONStreamParser.STREAMED_KEY:
+                    if self.__model is not None and not self.__return_json:
+                        value = self.__model(from_json=value, preprocessed=True)
+                    yield value
+                elif key == 'error':
+                    raise FacebookException(message=value['message'], code=value.get('code'))
+                elif key == 'paging':
+                    self.paging = value
+                else:
+                    self.extra[key] = value
+        finally:
+            if self.__close:
+                self.__close()
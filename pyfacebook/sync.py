@@ -0,0 +1,196 @@
+import math
+import shelve
+import threading
+
+from pyfacebook import models
+from pyfacebook.profiles import get_request_profile
+from pyfacebook.stats import to_timestamp
+from pyfacebook.utils import json_to_objects
+
+# The status field of each model, and the statuses meaning an object is gone
+STATUS_FIELDS = {
+    models.AdGroup: 'adgroup_status',
+    models.AdSet: 'campaign_status',
+    models.AdCampaignGroup: 'campaign_group_status',
+}
+DELETED_STATUSES = ('DELETED', 'ARCHIVED')
+
+
+class MemoryStore(object):
+
+    """
+    Keeps synced objects and watermarks in memory, as the dicts Facebook returned, by account and connection.
+    Pass a filename to keep them in a shelf file between runs.
+
+    This is the interface IncrementalSync merges changes through; implement the same methods to sync into another store.
+
+    """
+
+    def __init__(self, filename=None):
+        self.__data = shelve.open(filename) if filename else {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __key(account_id, connection):
+        return str(account_id) + '/' + connection
+
+    def __section(self, account_id, connection):
+        return self.__data.get(self.__key(account_id, connection)) or {'watermark': None, 'objects': {}}
+
+    def __save(self, account_id, connection, section):
+        self.__data[self.__key(account_id, connection)] = section
+        if hasattr(self.__data, 'sync'):
+            self.__data.sync()
+
+    def get_watermark(self, account_id, connection):
+        """
+        :rtype float: The newest updated_time synced, as a unix timestamp, or None before the first sync
+
+        """
+        return self.__section(account_id, connection)['watermark']
+
+    def set_watermark(self, account_id, connection, watermark):
+        with self.__lock:
+            section = self.__section(account_id, connection)
+            section['watermark'] = watermark
+            self.__save(account_id, connection, section)
+
+    def objects(self, account_id, connection):
+        """
+        :rtype dict: The synced objects of a connection, as dicts by id
+
+        """
+        return self.__section(account_id, connection)['objects']
+
+    def upsert(self, account_id, connection, objects):
+        """
+        Adds or replaces objects, given as dicts.
+
+        """
+        with self.__lock:
+            section = self.__section(account_id, connection)
+            for obj in objects:
+                section['objects'][str(obj['id'])] = obj
+            self.__save(account_id, connection, section)
+
+    def remove(self, account_id, connection, ids):
+        with self.__lock:
+            section = self.__section(account_id, connection)
+            for id in ids:
+                section['objects'].pop(str(id), None)
+            self.__save(account_id, connection, section)
+
+
+class SyncResult(object):
+
+    """
+    What one incremental sync of a connection changed.
+
+    """
+
+    def __init__(self, account_id, connection):
+        self.account_id = account_id
+        self.connection = connection
+        self.added = []
+        self.changed = []
+        self.deleted = []
+        self.watermark = None
+        self.fetched = 0
+
+    def __repr__(self):
+        return '<SyncResult %s/%s: %d added, %d changed, %d deleted>' % (
+            self.account_id, self.connection, len(self.added), len(self.changed), len(self.deleted))
+
+
+class IncrementalSync(object):
+
+    """
+    Mirrors connections of ad accounts into a store, fetching only what changed since the last run.
+
+    Each account and connection has a watermark: the newest updated_time synced. A run asks Facebook only for
+    objects updated after it, through the filtering param, and merges them into the store. Objects are reported
+    deleted when their status says so, or, with scan_deletions, when they're no longer listed at all.
+    A scan lists every id of the connection, so it costs as much as a full sync: turn it on for an occasional run.
+
+    """
+    # The field the filtering param compares against the watermark
+    FILTER_FIELD = 'updated_time'
+
+    def __init__(self, pyfb, store=None, scan_deletions=False, overlap=1):
+        """
+        :param PyFacebook pyfb: The PyFacebook instance to fetch with
+        :param MemoryStore store: Where objects and watermarks are kept. Defaults to a MemoryStore.
+        :param bool scan_deletions: If True, also list the ids of the whole connection to find objects that disappeared.
+                                    Facebook usually keeps deleted objects listed with a DELETED status, so it's off by default.
+        :param int overlap: Seconds before the watermark to fetch from, so objects updated in the same second aren't missed.
+
+        """
+        self.pyfb = pyfb
+        self.store = store if store is not None else MemoryStore()
+        self.scan_deletions = scan_deletions
+        self.overlap = overlap
+
+    def sync(self, account_id, connection, scan_deletions=None):
+        """
+        Fetches the objects of a connection updated since the last sync and merges them into the store.
+
+        :param str account_id: An ad account id, like act_123
+        :param str connection: A connection of AdAccount whose model has updated_time, e.g. adgroups or adcampaigns
+        :param bool scan_deletions: Overrides the scan_deletions of the instance for this run
+        :rtype SyncResult: The ids added, changed and deleted
+
+        """
+        model = get_request_profile(models.AdAccount).connection_models.get(connection)
+        if model is None or 'updated_time' not in get_request_profile(model).default_fields:
+            raise Exception("Can't sync " + connection + ": its objects have no updated_time")
+        status_field = STATUS_FIELDS.get(model)
+
+        result = SyncResult(account_id, connection)
+        watermark = self.store.get_watermark(account_id, connection)
+        existing = self.store.objects(account_id, connection)
+        params = {}
+        if watermark is not None:
+            params['filtering'] = [{'field': self.FILTER_FIELD, 'operator': 'GREATER_THAN',
+                                    'value': int(watermark) - self.overlap}]
+
+        upserts = []
+        newest = watermark
+        for obj in self.pyfb.iter_connection(model, account_id, connection, return_json=True, **params):
+            result.fetched += 1
+            id = str(obj['id'])
+            updated_time = to_timestamp(obj.get('updated_time'))
+            if not math.isnan(updated_time) and (newest is None or updated_time > newest):
+                newest = updated_time
+            if status_field and obj.get(status_field) in DELETED_STATUSES:
+                if id in existing:
+                    result.deleted.append(id)
+                continue
+            if id not in existing:
+                result.added.append(id)
+                upserts.append(obj)
+            elif existing[id] != obj:
+                result.changed.append(id)
+                upserts.append(obj)
+
+        if scan_deletions is None:
+            scan_deletions = self.scan_deletions
+        if scan_deletions and watermark is not None:
+            listed = set(str(obj['id']) for obj in
+                         self.pyfb.iter_connection(model, account_id, connection, return_json=True, fields=['id']))
+            listed.update(str(obj['id']) for obj in upserts)
+            result.deleted.extend(id for id in existing if id not in listed and id not in result.deleted)
+
+        self.store.upsert(account_id, connection, upserts)
+        self.store.remove(account_id, connection, result.deleted)
+        if newest is not None:
+            self.store.set_watermark(account_id, connection, newest)
+        result.watermark = newest
+        return result
+
+    def objects(self, account_id, connection):
+        """
+        :rtype dict: The synced objects of a connection, as TinyModels by id
+
+        """
+        model = get_request_profile(models.AdAccount).connection_models[connection]
+        return json_to_objects(dict(self.store.objects(account_id, connection)), model)
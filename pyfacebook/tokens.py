@@ -0,0 +1,167 @@
+import json
+import time
+import sqlite3
+import threading
+
+from pyfacebook import models
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    token_text TEXT NOT NULL PRIMARY KEY,
+    data TEXT NOT NULL
+)
+"""
+
+
+class TokenCache(object):
+
+    """
+    Remembers debug_token results by token text, so PyFacebook instances built with a known token
+    don't validate it against Facebook again. Entries are dropped when their token is about to expire.
+
+    Tokens are kept in memory, or in a SQLite file if a filename is given, so short-lived processes can share
+    validations. The file is opened for each read or write and closed right after, and SQLite locks it while
+    it's written, so any number of processes can use it at once. A TokenCache is safe to share between threads.
+
+    """
+
+    def __init__(self, filename=None, expiry_margin=3600, timeout=10.0):
+        """
+        :param str filename: A SQLite file to persist tokens in. Tokens are kept in memory only if not given.
+        :param int expiry_margin: Seconds before a token's expires_at at which it's no longer served from the cache.
+        :param float timeout: Seconds to wait for another process writing the file.
+
+        """
+        self.filename = filename
+        self.expiry_margin = expiry_margin
+        self.timeout = timeout
+        self.__tokens = {}
+        self.__refreshing = set()
+        self.__lock = threading.Lock()
+        if filename is not None:
+            self.__create_schema()
+
+    def __connect(self):
+        return sqlite3.connect(self.filename, timeout=self.timeout)
+
+    def __create_schema(self):
+        """
+        Creates the tokens table if it isn't there. Processes starting together all try to, so the table is
+        created in a write transaction, and the attempt is retried while another process holds the file or has
+        just changed its schema.
+
+        """
+        deadline = time.time() + self.timeout
+        while True:
+            db = self.__connect()
+            try:
+                db.isolation_level = None
+                db.execute('BEGIN IMMEDIATE')
+                db.execute(SCHEMA)
+                db.execute('COMMIT')
+                return
+            except sqlite3.OperationalError:
+                if time.time() >= deadline:
+                    raise
+            finally:
+                db.close()
+            time.sleep(0.01)
+
+    def __load(self, key):
+        if self.filename is None:
+            return self.__tokens.get(key)
+        db = self.__connect()
+        try:
+            row = db.execute('SELECT data FROM tokens WHERE token_text = ?', (key,)).fetchone()
+        finally:
+            db.close()
+        return json.loads(row[0]) if row else None
+
+    def __store(self, key, token_dict):
+        """
+        Writes a token, or deletes it if token_dict is None.
+
+        """
+        if self.filename is None:
+            if token_dict is None:
+                self.__tokens.pop(key, None)
+            else:
+                self.__tokens[key] = dict(token_dict)
+            return
+        db = self.__connect()
+        try:
+            with db:
+                if token_dict is None:
+                    db.execute('DELETE FROM tokens WHERE token_text = ?', (key,))
+                else:
+                    db.execute('INSERT OR REPLACE INTO tokens (token_text, data) VALUES (?, ?)',
+                               (key, json.dumps(token_dict)))
+        finally:
+            db.close()
+
+    def __is_fresh(self, token_dict):
+        expires_at = token_dict.get('expires_at') or 0
+        return expires_at <= 0 or expires_at - time.time() > self.expiry_margin
+
+    def get(self, token_text):
+        """
+        :param str token_text: The token text the caller has
+        :rtype models.Token: The validated token to use instead, or None if it isn't cached or is about to expire
+
+        """
+        key = str(token_text)
+        with self.__lock:
+            token_dict = self.__load(key)
+            if token_dict is None:
+                return None
+            if not self.__is_fresh(token_dict):
+                self.__store(key, None)
+                return None
+        return models.Token(from_json=dict(token_dict), preprocessed=True)
+
+    def set(self, token_text, token_dict):
+        """
+        Caches a debug_token result.
+
+        :param str token_text: The token text callers will look the token up by
+        :param dict token_dict: The data of a debug_token response, with the token itself under text
+
+        """
+        with self.__lock:
+            self.__store(str(token_text), token_dict)
+
+    def alias(self, token_text, new_token_text):
+        """
+        Serves the cached token of new_token_text to callers that look up token_text,
+        e.g. after token_text was exchanged for a long-lived token. Does nothing if new_token_text isn't cached.
+
+        """
+        with self.__lock:
+            token_dict = self.__load(str(new_token_text))
+            if token_dict is not None:
+                self.__store(str(token_text), token_dict)
+
+    def start_refresh(self, token_text):
+        """
+        Claims the refresh of a token, so only one thread exchanges it.
+
+        :rtype bool: True if the caller should refresh the token, False if another thread already is
+
+        """
+        with self.__lock:
+            if token_text in self.__refreshing:
+                return False
+            self.__refreshing.add(token_text)
+            return True
+
+    def finish_refresh(self, token_text):
+        with self.__lock:
+            self.__refreshing.discard(token_text)
+
+    def close(self):
+        """
+        Forgets the tokens kept in memory. The file, if any, is already closed between calls.
+
+        """
+        with self.__lock:
+            self.__tokens = {}
@@ -0,0 +1,240 @@
+import os
+import uuid
+import shelve
+import hashlib
+import threading
+import mimetypes
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def quote_filename(filename):
+    """
+    Quotes a filename for a Content-Disposition header. Line breaks and other control characters are dropped
+    and quotes and backslashes escaped, so the filename can't end the header or the part early.
+
+    :param < str | unicode > filename: The filename
+    :rtype str: The UTF-8 encoded filename, in quotes
+
+    """
+    if isinstance(filename, unicode):
+        filename = filename.encode('utf-8')
+    filename = ''.join(char for char in filename if char >= ' ' and char != '\x7f')
+    return '"%s"' % filename.replace('\\', '\\\\').replace('"', '\\"')
+
+
+class MultipartStream(object):
+
+    """
+    A multipart/form-data body that reads its file as it's sent, a chunk at a time, instead of all at once.
+    requests sends it with a Content-Length, without loading it into memory.
+
+    :param str field_name: The form field the file is sent as.
+    :param < str | file > source: A file path, or a file object opened in binary mode. It must be seekable.
+    :param str filename: The filename sent to Facebook. Defaults to the name of the source.
+
+    """
+
+    def __init__(self, field_name, source, filename=None, chunk_size=65536):
+        if isinstance(source, basestring):
+            self.__file = open(source, 'rb')
+            self.__owned = True
+        else:
+            self.__file = source
+            self.__owned = False
+        self.filename = filename or os.path.basename(getattr(self.__file, 'name', None) or 'image')
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary=%s' % self.boundary
+
+        content_type = mimetypes.guess_type(self.filename)[0] or 'application/octet-stream'
+        self.__head = ('--%s\r\nContent-Disposition: form-data; name="%s"; filename=%s\r\n'
+                       'Content-Type: %s\r\n\r\n' % (self.boundary, field_name, quote_filename(self.filename),
+                                                       content_type))
+        self.__tail = '\r\n--%s--\r\n' % self.boundary
+        self.__start = self.__file.tell()
+        self.__file.seek(0, os.SEEK_END)
+        self.__file_length = self.__file.tell() - self.__start
+        self.rewind()
+
+    def __len__(self):
+        return len(self.__head) + self.__file_length + len(self.__tail)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def rewind(self):
+        """
+        Starts the body over, so a retried call sends all of it again.
+
+        """
+        self.__file.seek(self.__start)
+        self.__buffer = self.__head
+        self.__file_done = False
+        self.__tail_sent = False
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self)
+        while len(self.__buffer) < size and not self.__tail_sent:
+            if not self.__file_done:
+                chunk = self.__file.read(max(self.chunk_size, size - len(self.__buffer)))
+                if chunk:
+                    self.__buffer += chunk
+                    continue
+                self.__file_done = True
+            self.__buffer += self.__tail
+            self.__tail_sent = True
+        data, self.__buffer = self.__buffer[:size], self.__buffer[size:]
+        return data
+
+    def close(self):
+        if self.__owned:
+            self.__file.close()
+
+
+def file_digest(source, chunk_size=65536):
+    """
+    Hashes the content of a file without reading it into memory at once.
+
+    :param < str | file > source: A file path, or a seekable file object, which is left where it was
+    :rtype str: The hex MD5 of the content
+
+    """
+    digest = hashlib.md5()
+    if isinstance(source, basestring):
+        with open(source, 'rb') as image_file:
+            for chunk in iter(lambda: image_file.read(chunk_size), ''):
+                digest.update(chunk)
+    else:
+        start = source.tell()
+        for chunk in iter(lambda: source.read(chunk_size), ''):
+            digest.update(chunk)
+        source.seek(start)
+    return digest.hexdigest()
+
+
+class ImageIndex(object):
+
+    """
+    Remembers the Facebook hash of every image uploaded to an account, by the MD5 of its content,
+    so an image already in an account isn't uploaded to it again.
+
+    Hashes are kept in memory, and also in a shelf file if a filename is given. An ImageIndex is safe to share between threads.
+
+    """
+
+    def __init__(self, filename=None):
+        """
+        :param str filename: A shelf file to persist hashes in. Hashes are kept in memory only if not given.
+
+        """
+        self.__hashes = {}
+        self.__lock = threading.Lock()
+        self.__shelf = shelve.open(filename) if filename else None
+
+    @staticmethod
+    def key(account_id, digest):
+        return '%s:%s' % (account_id, digest)
+
+    def get(self, account_id, digest):
+        """
+        :rtype dict: The hash and url of the image in the account, or None if it wasn't uploaded there
+
+        """
+        key = self.key(account_id, digest)
+        with self.__lock:
+            image = self.__hashes.get(key)
+            if image is None and self.__shelf is not None:
+                image = self.__shelf.get(key)
+                if image is not None:
+                    self.__hashes[key] = image
+        return dict(image) if image is not None else None
+
+    def set(self, account_id, digest, image):
+        key = self.key(account_id, digest)
+        with self.__lock:
+            self.__hashes[key] = dict(image)
+            if self.__shelf is not None:
+                self.__shelf[key] = dict(image)
+                self.__shelf.sync()
+
+    def discard(self, account_id, digest):
+        """
+        Forgets an image, e.g. after it was deleted from the account.
+
+        """
+        key = self.key(account_id, digest)
+        with self.__lock:
+            self.__hashes.pop(key, None)
+            if self.__shelf is not None and key in self.__shelf:
+                del self.__shelf[key]
+                self.__shelf.sync()
+
+    def close(self):
+        if self.__shelf is not None:
+            self.__shelf.close()
+
+
+def upload_image(pyfb, account_id, source, filename=None, index=None, chunk_size=65536):
+    """
+    Uploads an image to an account's adimages, streaming it from disk, unless the index knows it's there already.
+
+    :param PyFacebook pyfb: The client to upload with
+    :param str account_id: The ad account to upload to, e.g. act_123
+    :param < str | file > source: A file path, or a seekable file object opened in binary mode
+    :param str filename: The filename sent to Facebook. Defaults to the name of the source.
+    :param ImageIndex index: Where uploaded images are remembered, if anywhere
+    :rtype dict: The hash, url and filename of the image, and whether it was uploaded
+
+    """
+    digest = file_digest(source, chunk_size) if index is not None else None
+    if index is not None:
+        image = index.get(account_id, digest)
+        if image is not None:
+            image['uploaded'] = False
+            return image
+
+    stream = MultipartStream('file', source, filename=filename, chunk_size=chunk_size)
+    try:
+        fb_response = pyfb.call_graph_api(endpoint='%s/adimages' % account_id, http_method='POST',
+                                          params={'file': stream}, idempotent=True)
+    finally:
+        stream.close()
+    images = fb_response['data']
+    image = images.get(stream.filename) or images.values()[0]
+    image = {'hash': image['hash'], 'url': image.get('url'), 'filename': stream.filename}
+    if index is not None:
+        index.set(account_id, digest, image)
+    image['uploaded'] = True
+    return image
+
+
+def upload_images(pyfb, account_id, sources, index=None, max_workers=4, chunk_size=65536):
+    """
+    Uploads many images to an account at once, on a thread pool. A failed upload doesn't stop the others.
+
+    :param list sources: File paths or seekable file objects
+    :rtype OrderedDict: The upload_image result, or the exception raised, of each source, in order
+
+    """
+    results = OrderedDict()
+    if not sources:
+        return results
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources))))
+    try:
+        futures = [(source, executor.submit(upload_image, pyfb, account_id, source, index=index, chunk_size=chunk_size))
+                   for source in sources]
+        for source, future in futures:
+            try:
+                results[source] = future.result()
+            except Exception, e:
+                results[source] = e
+    finally:
+        executor.shutdown(wait=True)
+    return results
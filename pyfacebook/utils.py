@@ -1,5 +1,13 @@
 import os
+import re
 import json
+import math
+import requests
+
+from requests.adapters import HTTPAdapter
+
+ID_SEGMENT = re.compile(r'^(act_)?\d+(_\d+)?(?=/|$)')
+
 
 class FacebookException(Exception):
 
@@ -8,13 +16,24 @@ class FacebookException(Exception):
 
     """
 
-    def __init__(self, message, code=None):
+    def __init__(self, message, code=None, status_code=None):
+        self.code = code
+        self.status_code = status_code
         custom_message = "Facebook API Error: " + message
         if code:
             custom_message += "\nError Code: " + str(code)
 
         Exception.__init__(self, custom_message)
 
+
+class CircuitOpenException(FacebookException):
+
+    """
+    Raised instead of calling Facebook while calls to an endpoint keep failing.
+
+    """
+    pass
+
 def first_item(list_or_dict):
     """
     If passed a list, this returns the first item of the list.
@@ -31,6 +50,50 @@ def first_item(list_or_dict):
         raise Exception("Must pass a list or a dict to first_item")
 
 
+def make_session(pool_connections=10, pool_maxsize=10, pool_block=False):
+    """
+    Builds a requests Session with a keep-alive connection pool for the Graph API.
+    A Session may be shared between threads, so one can serve many PyFacebook instances.
+
+    :param int pool_connections: The number of per-host connection pools to keep.
+    :param int pool_maxsize: The maximum number of connections kept alive per host.
+    :param bool pool_block: If True, block when the pool is exhausted instead of opening extra connections.
+    :rtype requests.Session: A pooled session
+
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def utf8_params(params):
+    """
+    Encodes the unicode values of params to UTF-8, as requests does, so they can be URL-encoded.
+
+    :param dict params: Params already encoded by PyFacebook.encode_params
+    :rtype dict: A copy of params with byte string values
+
+    """
+    return dict((key, val.encode('utf-8') if isinstance(val, unicode) else val) for key, val in params.items())
+
+
+def percentile(sorted_values, pct):
+    """
+    Returns the pct-th percentile of a sorted list, by the nearest-rank method.
+
+    :param list sorted_values: Values sorted in ascending order
+    :param float pct: A percentage between 0 and 100
+    :rtype float: The percentile, or 0.0 for an empty list
+
+    """
+    if not sorted_values:
+        return 0.0
+    rank = int(math.ceil(pct / 100.0 * len(sorted_values))) - 1
+    return sorted_values[min(len(sorted_values) - 1, max(0, rank))]
+
+
 def delete_shelf_files(filename):
     """
     Delete the shelf dumbdbm files if they exist.
@@ -44,19 +107,130 @@ def delete_shelf_files(filename):
             pass
 
 
+def make_endpoint(model, id=None, connection=None):
+    """
+    Creates a properly-formatted Facebook Graph API endpoint from id and connection parameters.
+
+    :param tinymodel.TinyModel model: The class associated with the objects we're calling.
+    :param str id: The id of the parent object
+    :param str connection: The name of connection to call
+    :rtype str: The endpoint, relative to the Graph API root
+
+    """
+    endpoint = str(id or model.endpoint or model.__name__.lower())
+    if connection:
+        endpoint += ('/' + connection)
+    return endpoint
+
+
+def endpoint_name(endpoint, model=None):
+    """
+    Names an endpoint without its id, so calls to the same connection of different objects are grouped together.
+    A bare id is named after the model called, so reads of different kinds of objects aren't grouped together.
+    Endpoints that don't start with an id, like debug_token, keep their name.
+
+        endpoint_name('act_123/adgroups') == '{id}/adgroups'
+        endpoint_name('6004', models.AdGroup) == '{AdGroup}'
+
+    :param str endpoint: An endpoint, relative to the Graph API root
+    :param tinymodel.TinyModel model: The class associated with the objects called, if known
+    :rtype str: The endpoint with its leading id replaced by {id}, or by the model's name if that's all there is
+
+    """
+    name = ID_SEGMENT.sub('{id}', endpoint, count=1)
+    if name == '{id}' and model is not None:
+        return '{%s}' % model.__name__
+    return name
+
+
+def default_fields(model):
+    """
+    Lists the fields we GET for a model when the caller doesn't ask for specific ones.
+    Connections and create-only fields can't be read back, so they're left out.
+
+    :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+    :rtype list: A list of field names
+
+    """
+    return [f.title for f in model.FIELD_DEFS
+            if f.title not in getattr(model, 'CONNECTIONS', []) and
+            f.title not in getattr(model, 'CREATE_ONLY', [])]
+
+
+def standardize_response(json_response):
+    """
+    Standardizes a json-decoded Graph API response for edge cases, raising Facebook errors if they exist.
+
+    :param dict json_response: The json-decoded response from Facebook
+    :rtype dict: A dict whose data key holds the returned objects
+
+    """
+    if not isinstance(json_response, dict):
+        raise ValueError
+    elif json_response.get('error'):
+        raise FacebookException(message=json_response['error']['message'], code=json_response['error']['code'])
+    elif json_response.get('images'):
+        json_response = {'data': json_response['images']}
+    elif 'data' not in json_response:
+        json_response = {'data': [json_response]}
+    return json_response
+
+
+def request_key(endpoint, params):
+    """
+    Builds a key identifying a Graph API call, regardless of param order or the access token it was sent with.
+
+    :param str endpoint: The endpoint called
+    :param dict params: The encoded params of the call
+    :rtype str: The key
+
+    """
+    key_params = sorted((key, val) for key, val in params.items() if key != 'access_token')
+    return endpoint + '?' + json.dumps(key_params, separators=(',', ':'))
+
+
+def chunk_ids(ids, max_ids=50, max_length=2000):
+    """
+    Splits ids into comma-separated chunks of at most max_ids ids and max_length characters once URL-encoded.
+    Commas are escaped in URLs, so each one counts as three characters.
+
+    :param list ids: The ids to split
+    :param int max_ids: The most ids per chunk
+    :param int max_length: The most URL-encoded characters per chunk
+    :rtype list: A list of comma-separated strings of ids
+
+    """
+    chunks = []
+    chunk = []
+    length = 0
+    for id in ids:
+        id = str(id)
+        if chunk and (len(chunk) >= max_ids or length + 3 + len(id) > max_length):
+            chunks.append(','.join(chunk))
+            chunk = []
+            length = 0
+        length += len(id) + (3 if chunk else 0)
+        chunk.append(id)
+    if chunk:
+        chunks.append(','.join(chunk))
+    return chunks
+
+
 def json_to_objects(list_or_dict, model):
     """
     Translates a list or a dict of json objects into a list or a dict of TinyModel objects
+    The objects are already json-decoded, so they're handed to the model as-is instead of being dumped and parsed again.
+
     :param < list | dict > list_or_dict: A list or a dict of JSON objects
 
     :rtype < list | dict >: A list or a dict of TinyModel objects
     """
     if isinstance(list_or_dict, list):
         for index, obj in enumerate(list_or_dict):
-            list_or_dict[index] = model(from_json=json.dumps(obj))
+            list_or_dict[index] = model(from_json=obj, preprocessed=True)
     elif isinstance(list_or_dict, dict):
         for key, val in list_or_dict.items():
-            list_or_dict[key] = model(from_json=json.dumps(val))
+            list_or_dict[key] = model(from_json=val, preprocessed=True)
     else:
         raise Exception("Facebook data returned in an unrecognized type: " + str(type(list_or_dict)))
 
@@ -23,6 +23,7 @@ setup(
         'requests==1.2.3',
         'inflection==0.2.0',
         'simplejson',
+        'futures',
         'autopep8'
     ],
     dependency_links=[
@@ -0,0 +1,56 @@
+import time
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import models
+from pyfacebook.utils import FacebookException
+from pyfacebook.asynchronous import AsyncPyFacebook
+from benchmark.graph_server import GraphServer
+
+
+class AsyncPyFacebookTest(unittest.TestCase):
+    """ Tests the future-based client. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer(latency=0.2).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.pyfb = AsyncPyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url,
+                                    max_concurrency=10)
+
+    def tearDown(self):
+        self.pyfb.shutdown()
+
+    def test_results(self):
+        """ Calls return futures right away, run at the same time, and resolve to what the blocking calls return. """
+        started = time.time()
+        futures = [self.pyfb.get(models.AdAccount, id='act_%d' % i, return_json=True) for i in range(10)]
+        ok_(time.time() - started < 0.2)
+        eq_([future.result()['data'][0]['id'] for future in futures], ['act_%d' % i for i in range(10)])
+        ok_(time.time() - started < 1.0)
+
+        eq_(self.pyfb.delete('123').result(), True)
+        eq_(self.pyfb.post(models.AdSet, id='act_1', connection='adcampaigns', name='x',
+                           return_json=True).result()['data'][0]['id'], '6000000000001')
+        eq_(self.pyfb.call_graph_api('act_1').result()['data'][0]['id'], 'act_1')
+
+    def test_exceptions(self):
+        """ A failed call raises its exception from result, and doesn't affect other calls. """
+        failed = self.pyfb.get(models.AdAccount, id='error_1')
+        succeeded = self.pyfb.get(models.AdAccount, id='act_1', return_json=True)
+        self.assertRaises(FacebookException, failed.result)
+        eq_(failed.exception().code, 100)
+        eq_(succeeded.result()['data'][0]['id'], 'act_1')
+
+    def test_shutdown(self):
+        """ Leaving the with block waits for calls in flight, and no call is accepted after. """
+        with AsyncPyFacebook(pyfb=self.pyfb.pyfb) as pyfb:
+            future = pyfb.get(models.AdAccount, id='act_1', return_json=True)
+        ok_(future.done())
+        self.assertRaises(RuntimeError, pyfb.get, models.AdAccount, id='act_1')
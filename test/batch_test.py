@@ -0,0 +1,136 @@
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.batch import GraphBatch
+from pyfacebook.utils import FacebookException
+from benchmark.graph_server import GraphServer
+
+
+class GraphBatchTest(unittest.TestCase):
+    """ Tests how GraphBatch splits operations into Graph API calls. """
+
+    def setUp(self):
+        self.pyfb = PyFacebook(token_text='test', call_token_debug=False)
+
+    def test_chunks_respect_max_size(self):
+        """ Independent operations are sent MAX_BATCH_SIZE at a time. """
+        batch = self.pyfb.batch()
+        for id in range(120):
+            batch.delete(id=id)
+        eq_([len(chunk) for chunk in batch.chunks()], [50, 50, 20])
+
+    def test_chunks_keep_dependencies_together(self):
+        """ An operation is never sent in an earlier call than the operation it references. """
+        batch = self.pyfb.batch()
+        for id in range(49):
+            batch.delete(id=id)
+        batch.delete(id='parent', batch_name='parent')
+        batch.delete(id=GraphBatch.reference('parent'))
+        chunks = batch.chunks()
+        eq_([len(chunk) for chunk in chunks], [49, 2])
+        ok_(chunks[1][0].name == 'parent')
+
+    def test_chunks_reject_unknown_references(self):
+        """ Referencing an operation that wasn't queued before is an error. """
+        batch = self.pyfb.batch()
+        batch.delete(id=GraphBatch.reference('missing'))
+        self.assertRaises(Exception, batch.chunks)
+
+    def test_references_in_params(self):
+        """ A reference passed as a param keeps its operation in the same call, and is sent unescaped. """
+        batch = self.pyfb.batch()
+        for id in range(49):
+            batch.delete(id=id)
+        batch.post(models.AdGroup, id='act_1', connection='adgroups', batch_name='parent', name='parent')
+        batch.post(models.AdCreative, id='act_1', connection='adcreatives',
+                   object_id=GraphBatch.reference('parent'))
+        chunks = batch.chunks()
+        eq_([len(chunk) for chunk in chunks], [49, 2])
+        eq_(chunks[1][1].references, set(['parent']))
+        eq_(chunks[1][1].body, 'object_id={result=parent:$.id}')
+
+        batch = self.pyfb.batch()
+        batch.post(models.AdCreative, id='act_1', connection='adcreatives', object_id=GraphBatch.reference('missing'))
+        self.assertRaises(Exception, batch.chunks)
+
+    def test_name_is_a_param(self):
+        """ A name param is sent as a field, not taken as the operation's batch name. """
+        batch = self.pyfb.batch()
+        batch.post(models.AdGroup, id='act_1', connection='adgroups', name=u'Caf\xe9', batch_name='op')
+        eq_(batch.operations[0].body, 'name=Caf%C3%A9')
+        eq_(batch.operations[0].name, 'op')
+
+
+class GraphBatchExecuteTest(unittest.TestCase):
+    """ Tests sending batches to the stand-in server and reading their results. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+
+    def test_results(self):
+        """ Each operation gets its own result, and an error only fails its own slot. """
+        batch = self.pyfb.batch()
+        batch.get(models.AdGroup, id='6001')
+        batch.get(models.AdGroup, id='error_1')
+        batch.delete(id='6002')
+        batch.get(models.AdGroup, id='act_1', connection='adgroups', limit=3)
+        results = batch.execute()
+        eq_(len(batch), 0)
+        ok_(isinstance(results[0]['data'][0], models.AdGroup))
+        eq_(results[0]['data'][0].id, '6001')
+        ok_(isinstance(results[1], FacebookException))
+        eq_(results[2], True)
+        eq_(len(results[3]['data']), 3)
+        ok_(all(isinstance(adgroup, models.AdGroup) for adgroup in results[3]['data']))
+        eq_(self.pyfb.batch().execute(), [])
+
+    def test_return_json(self):
+        """ With return_json, data holds the dicts Facebook sent. """
+        batch = self.pyfb.batch()
+        batch.get(models.AdGroup, id='6001')
+        eq_(batch.execute(return_json=True)[0]['data'][0]['id'], '6001')
+
+    def test_dependency_never_ran(self):
+        """ An operation whose dependency failed isn't run, and its result says so. """
+        batch = self.pyfb.batch()
+        batch.update('error_1', batch_name='parent', name='parent')
+        batch.update(GraphBatch.reference('parent'), name='child')
+        batch.update('6001', name='independent')
+        results = batch.execute()
+        ok_(isinstance(results[0], FacebookException))
+        ok_(isinstance(results[1], FacebookException))
+        ok_('was not run' in str(results[1]))
+        eq_(results[2], {'data': [{'success': True}]})
+        eq_([path for method, path, params in self.server.requests if method == 'POST' and path != '/'],
+            ['/error_1', '/6001'])
+
+    def test_failed_call_keeps_the_rest_queued(self):
+        """ When a later call fails, the operations already sent leave the queue and their results are kept. """
+        server = GraphServer(call_limit=1, window=60).start()
+        try:
+            pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=server.url)
+            batch = pyfb.batch()
+            for id in range(60):
+                batch.delete(id=str(6000 + id))
+            try:
+                batch.execute()
+            except FacebookException, e:
+                eq_(e.results, [True] * 50)
+            else:
+                ok_(False, 'the second call should have been throttled')
+            eq_(len(batch), 10)
+            eq_(batch.operations[0].relative_url, '6050')
+            eq_(len(server.requests_to('DELETE', '/6000')), 1)
+            eq_(server.requests_to('DELETE', '/6050'), [])
+        finally:
+            server.stop()
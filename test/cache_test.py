@@ -0,0 +1,158 @@
+import json
+import time
+import unittest
+import threading
+
+from nose.tools import ok_, eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.cache import CacheBackend, MemoryBackend, ResponseCache
+from benchmark.graph_server import GraphServer
+
+
+class DictBackend(CacheBackend):
+    """ A backend with nothing but get, set and delete, like memcached. """
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries[key] = value
+
+    def delete(self, key):
+        self.entries.pop(key, None)
+
+
+class ResponseCacheTest(unittest.TestCase):
+    """ Tests the GET response cache and its in-memory backend. """
+
+    def test_access_token_is_not_part_of_the_key(self):
+        """ The same call made with different tokens is served from the same entry. """
+        cache = ResponseCache()
+        cache.set('act_1', {'fields': 'name', 'access_token': 'a'}, {'data': [{'name': 'x'}]})
+        eq_(cache.get('act_1', {'access_token': 'b', 'fields': 'name'}), {'data': [{'name': 'x'}]})
+        eq_(cache.stats()['hits'], 1)
+
+    def test_responses_are_copied(self):
+        """ Callers mutating a cached response don't change the cache. """
+        cache = ResponseCache()
+        cache.set('act_1', {}, {'data': [1]})
+        cache.get('act_1', {})['data'].append(2)
+        eq_(cache.get('act_1', {}), {'data': [1]})
+
+    def test_ttl(self):
+        """ Expired responses are misses, and models can have their own TTL. """
+        cache = ResponseCache(ttl=-1, model_ttls={int: 60})
+        cache.set('1', {}, {'data': []})
+        cache.set('2', {}, {'data': []}, model=int)
+        ok_(cache.get('1', {}) is None)
+        ok_(cache.get('2', {}) is not None)
+
+    def test_invalidate(self):
+        """ Invalidating an id drops the id and its connections, but not ids that merely start the same way. """
+        cache = ResponseCache()
+        for endpoint in ('123', '123/adcreatives', '1234'):
+            cache.set(endpoint, {}, {'data': []})
+        cache.invalidate('123')
+        ok_(cache.get('123', {}) is None)
+        ok_(cache.get('123/adcreatives', {}) is None)
+        ok_(cache.get('1234', {}) is not None)
+
+    def test_shared_backend(self):
+        """ A write through one cache drops the responses under its id that another cache put in a shared backend. """
+        backend = DictBackend()
+        first, second = ResponseCache(backend=backend), ResponseCache(backend=backend)
+        first.set('123', {}, {'data': [1]})
+        first.set('123/adcreatives', {}, {'data': [2]})
+        first.set('456', {}, {'data': [3]})
+        eq_(second.get('123/adcreatives', {}), {'data': [2]})
+        second.invalidate('123')
+        ok_(first.get('123', {}) is None)
+        ok_(first.get('123/adcreatives', {}) is None)
+        eq_(first.get('456', {}), {'data': [3]})
+
+    def test_evicted_generation(self):
+        """ Responses aren't served again when the generation of their id is evicted. """
+        backend = MemoryBackend(max_entries=3)
+        cache = ResponseCache(backend=backend)
+        cache.set('1', {}, {'data': [1]})
+        eq_(len(backend), 2)
+        cache.set('2', {}, {'data': [2]})
+        ok_(cache.get('1', {}) is None)
+
+    def test_counters_are_thread_safe(self):
+        """ Hits and misses counted from many threads at once add up. """
+        cache = ResponseCache()
+        cache.set('1', {}, {'data': []})
+
+        def read():
+            for _ in range(500):
+                cache.get('1', {})
+                cache.get('2', {})
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        eq_(cache.stats()['hits'], 4000)
+        eq_(cache.stats()['misses'], 4000)
+
+    def test_lru_eviction(self):
+        """ The least recently used entry is evicted first. """
+        backend = MemoryBackend(max_entries=2)
+        backend.set('a', (time.time() + 60, 1))
+        backend.set('b', (time.time() + 60, 2))
+        backend.get('a')
+        backend.set('c', (time.time() + 60, 3))
+        ok_(backend.get('b') is None)
+        ok_(backend.get('a') is not None)
+        eq_(backend.evictions, 1)
+
+    def test_invalidate_mentions(self):
+        """ Writing an id drops the ids= lookups that asked for it and the listings it was returned in. """
+        cache = ResponseCache()
+        cache.set('', {'ids': '1,2'}, {'data': [{'1': {'id': '1'}, '2': {'id': '2'}}]})
+        cache.set('', {'ids': '3'}, {'data': [{'3': {'id': '3'}}]})
+        cache.set('act_1/adgroups', {}, {'data': [{'id': '2'}, {'id': '4'}]})
+        cache.invalidate('2')
+        ok_(cache.get('', {'ids': '1,2'}) is None)
+        ok_(cache.get('act_1/adgroups', {}) is None)
+        ok_(cache.get('', {'ids': '3'}) is not None)
+        eq_(cache.stats()['invalidations'], 2)
+
+    def test_invalidate_batch(self):
+        """ A batch call drops what each of its POST and DELETE operations writes, and nothing for its GETs. """
+        cache = ResponseCache()
+        for endpoint in ('1', '2', '3', '4/adcreatives'):
+            cache.set(endpoint, {}, {'data': []})
+        batch = json.dumps([{'method': 'DELETE', 'relative_url': '1'},
+                            {'method': 'POST', 'relative_url': '2', 'body': 'name=x'},
+                            {'method': 'GET', 'relative_url': '3?fields=name'},
+                            {'method': 'POST', 'relative_url': '4/adcreatives?x=1'}])
+        cache.invalidate('', {'batch': batch, 'access_token': 'a'})
+        for endpoint in ('1', '2', '4/adcreatives'):
+            ok_(cache.get(endpoint, {}) is None, endpoint)
+        ok_(cache.get('3', {}) is not None)
+
+    def test_batch_writes_through_pyfacebook(self):
+        """ Deleting an object through a batch call drops the listings it was in, but not other objects. """
+        server = GraphServer(connections={'adgroups': [{'id': '11'}, {'id': '12'}]}).start()
+        try:
+            pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=server.url,
+                              response_cache=ResponseCache())
+            for _ in range(2):
+                pyfb.get(models.AdGroup, id='11', return_json=True)
+                pyfb.get(models.AdGroup, id='act_1', connection='adgroups', return_json=True)
+            eq_(server.request_count, 2)
+
+            batch = pyfb.batch()
+            batch.delete('12')
+            batch.execute()
+            pyfb.get(models.AdGroup, id='11', return_json=True)
+            pyfb.get(models.AdGroup, id='act_1', connection='adgroups', return_json=True)
+            eq_(len(server.requests_to('GET', '/11')), 1)
+            eq_(len(server.requests_to('GET', '/act_1/adgroups')), 2)
+        finally:
+            server.stop()
@@ -0,0 +1,67 @@
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.changes import changed_fields, is_tracked
+from benchmark.graph_server import GraphServer
+
+
+class ChangesTest(unittest.TestCase):
+    """ Tests sending only the fields changed since objects were loaded. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer(total_rows=120).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url,
+                               track_changes=True)
+        self.adgroups = list(self.pyfb.iter_connection(models.AdGroup, 'act_1', 'adgroups', limit=60))
+        del self.server.requests[:]
+
+    def test_changed_fields(self):
+        """ Only changed fields are reported, and nested values are compared whole. """
+        adgroup = self.adgroups[0]
+        ok_(is_tracked(adgroup))
+        eq_(changed_fields(adgroup), {})
+        adgroup.name = 'renamed'
+        adgroup.bid_info['CLICKS'] += 1
+        changes = changed_fields(adgroup)
+        eq_(sorted(changes), ['bid_info', 'name'])
+        eq_(changes['name'], 'renamed')
+
+    def test_untracked_objects_skip_read_only_fields(self):
+        """ An object that wasn't loaded with tracking sends every field it can update, and none Facebook sets itself. """
+        pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+        adgroup = pyfb.get(model=models.AdGroup, id='act_1', connection='adgroups', limit=1)['data'][0]
+        ok_(not is_tracked(adgroup))
+        changes = changed_fields(adgroup)
+        ok_('name' in changes)
+        ok_('targeting' in changes)
+        for field in ['id'] + models.AdGroup.READ_ONLY + models.AdGroup.CREATE_ONLY + models.AdGroup.CONNECTIONS:
+            ok_(field not in changes, field)
+
+    def test_update_many_sends_names(self):
+        """ A changed name is sent as a field, not taken as the name of the batch operation. """
+        self.adgroups[0].name = u'Caf\xe9'
+        results = self.pyfb.update_many(self.adgroups[:1])
+        eq_(len(results), 1)
+        eq_(self.server.requests_to('POST', '/' + self.adgroups[0].id), [{'name': 'Caf\xc3\xa9'}])
+        eq_(changed_fields(self.adgroups[0]), {})
+
+    def test_update_many_skips_unchanged(self):
+        """ Unchanged objects aren't sent, changed ones are batched, and updated objects are unchanged afterwards. """
+        for adgroup in self.adgroups[::2]:
+            adgroup.adgroup_status = 'PAUSED' if adgroup.adgroup_status != 'PAUSED' else 'ACTIVE'
+
+        results = self.pyfb.update_many(self.adgroups, max_workers=2)
+        eq_(len(results), 60)
+        eq_(len(self.server.requests_to('POST', '/')), 2)
+        eq_(self.server.requests_to('POST', '/' + self.adgroups[0].id),
+            [{'adgroup_status': self.adgroups[0].adgroup_status}])
+        eq_(self.server.requests_to('POST', '/' + self.adgroups[1].id), [])
+        eq_(self.pyfb.update_many(self.adgroups), {})
@@ -0,0 +1,49 @@
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import PyFacebook
+from pyfacebook.utils import FacebookException
+from benchmark.graph_server import GraphServer
+
+
+class BulkDeleteTest(unittest.TestCase):
+    """ Tests deleting every object of an account. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer(connections={
+            'adgroups': [{'id': 'g%d' % i, 'adgroup_status': 'ACTIVE'} for i in range(60)] +
+                        [{'id': 'gone', 'adgroup_status': 'DELETED'}],
+            'adcreatives': [{'id': 'error_c1'}],
+            'adcampaigns': [{'id': 's1', 'campaign_status': 'PAUSED'}],
+        }).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+
+    def deleted(self):
+        return [path.lstrip('/') for method, path, params in self.server.requests if method == 'DELETE']
+
+    def test_dry_run(self):
+        """ A dry run lists what would be deleted, leaving out deleted objects, and deletes nothing. """
+        result = self.pyfb.bulk_delete('act_1', dry_run=True)
+        eq_(len(result.found['adgroups']), 60)
+        eq_(result.found['adcreatives'], ['error_c1'])
+        eq_(self.deleted(), [])
+        eq_(len(result.outcomes), 0)
+
+    def test_deletes_dependents_first(self):
+        """ Adgroups are deleted in batches of 50 before campaigns, and each id gets an outcome. """
+        result = self.pyfb.bulk_delete('act_1', max_workers=2)
+        eq_(len(self.server.requests_to('POST', '/')), 3)
+        deleted = self.deleted()
+        eq_(set(deleted[:60]), set('g%d' % i for i in range(60)))
+        eq_(sorted(deleted[60:]), ['error_c1', 's1'])
+        eq_(len(result.deleted), 61)
+        ok_(isinstance(result.failed['error_c1'], FacebookException))
+        eq_(result.stats['adcreatives'], {'found': 1, 'deleted': 0, 'failed': 1})
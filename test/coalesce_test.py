@@ -0,0 +1,89 @@
+import threading
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.utils import FacebookException
+from pyfacebook.instrumentation import Hook, Instrumentation
+from benchmark.graph_server import GraphServer
+
+THREADS = 8
+
+
+class Recorder(Hook):
+    """ Keeps the CallInfo of every call. """
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def after(self, info):
+        with self.lock:
+            self.calls.append(info)
+
+    def error(self, info, exception):
+        self.after(info)
+
+
+class SingleFlightTest(unittest.TestCase):
+    """ Tests identical concurrent GETs sharing one call. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer(latency=0.3).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.recorder = Recorder()
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url,
+                               coalesce_requests=True, instrumentation=Instrumentation([self.recorder]),
+                               pool_maxsize=THREADS)
+
+    def get_at_once(self, id):
+        """
+        :rtype list: What each of THREADS threads, released together, got back or raised
+        """
+        start = threading.Event()
+        outcomes = []
+        lock = threading.Lock()
+
+        def get():
+            start.wait()
+            try:
+                outcome = self.pyfb.get(models.AdAccount, id=id, return_json=True)
+            except Exception, e:
+                outcome = e
+            with lock:
+                outcomes.append(outcome)
+
+        threads = [threading.Thread(target=get) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_one_call(self):
+        """ Identical GETs made at once make one HTTP call, and every caller records its status and size. """
+        outcomes = self.get_at_once('act_1')
+        eq_(len(self.server.requests_to('GET', '/act_1')), 1)
+        eq_(outcomes, [{'data': [{'id': 'act_1', 'name': 'benchmark object'}]}] * THREADS)
+        eq_(self.pyfb.single_flight.coalesced, THREADS - 1)
+        eq_(len(self.recorder.calls), THREADS)
+        for info in self.recorder.calls:
+            eq_(info.status, 200)
+            ok_(info.bytes > 0)
+
+    def test_errors_reach_every_caller(self):
+        """ When the shared call fails, every caller gets the error, and records its status. """
+        outcomes = self.get_at_once('unavailable_1')
+        eq_(len(self.server.requests_to('GET', '/unavailable_1')), 1)
+        eq_(len(outcomes), THREADS)
+        for outcome in outcomes:
+            ok_(isinstance(outcome, FacebookException))
+        eq_([info.status for info in self.recorder.calls], [500] * THREADS)
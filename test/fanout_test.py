@@ -0,0 +1,63 @@
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.utils import FacebookException
+from benchmark.graph_server import GraphServer
+
+
+class FanOutTest(unittest.TestCase):
+    """ Tests getting many ids at once on a thread pool. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer(latency=0.01).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+        self.ids = ['%d' % i for i in range(20, 0, -1)]
+
+    def test_ordered(self):
+        """ Results are in the order of ids, and each id is called once even if it's repeated. """
+        fan_out = self.pyfb.get_many(models.AdGroup, self.ids + self.ids[:5], max_workers=8, return_json=True)
+        eq_(list(fan_out.results), self.ids)
+        eq_(fan_out.results['7']['data'][0]['id'], '7')
+        eq_(len(self.server.requests), 20)
+        eq_(fan_out.stats['calls'], 20)
+        eq_(fan_out.stats['succeeded'], 20)
+        ok_(fan_out.stats['latency_p95'] >= fan_out.stats['latency_p50'] > 0)
+
+    def test_generator_of_ids(self):
+        """ Ids can be given as a generator, which is only iterated once. """
+        for ordered in (True, False):
+            fan_out = self.pyfb.get_many(models.AdGroup, (str(i) for i in range(5)), ordered=ordered, return_json=True)
+            eq_(sorted(fan_out.results), ['0', '1', '2', '3', '4'])
+            eq_(fan_out.stats['calls'], 5)
+
+    def test_unordered(self):
+        """ Unordered results hold every id, in completion order. """
+        fan_out = self.pyfb.get_many(models.AdGroup, self.ids, max_workers=8, ordered=False)
+        eq_(sorted(fan_out.results), sorted(self.ids))
+        ok_(isinstance(fan_out.results['3']['data'][0], models.AdGroup))
+
+    def test_errors(self):
+        """ A failed id is recorded in errors, in order, and doesn't stop the others. """
+        ids = ['1', 'error_1', '2', 'error_2', '3']
+        fan_out = self.pyfb.get_many(models.AdGroup, ids, max_workers=2)
+        eq_(list(fan_out.results), ['1', '2', '3'])
+        eq_(list(fan_out.errors), ['error_1', 'error_2'])
+        ok_(isinstance(fan_out.errors['error_1'], FacebookException))
+        eq_(fan_out.stats['failed'], 2)
+
+    def test_iter_many(self):
+        """ Every id is yielded once, with its result or exception and its latency. """
+        yielded = dict((id, (result, latency)) for id, result, latency in
+                       self.pyfb.iter_many(models.AdGroup, ['1', 'error_1', '1'], return_json=True))
+        eq_(sorted(yielded), ['1', 'error_1'])
+        ok_(isinstance(yielded['error_1'][0], FacebookException))
+        ok_(yielded['1'][1] > 0)
@@ -0,0 +1,80 @@
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import models
+from pyfacebook.utils import endpoint_name
+from pyfacebook.instrumentation import CallInfo, Hook, Instrumentation, LatencyHistogram, MetricsCollector
+
+
+def finished_call(endpoint, latency, http_method='GET', status=200, nbytes=100, attempts=1, error=None):
+    """ Returns the CallInfo of a call that took latency seconds. """
+    info = CallInfo(endpoint, http_method)
+    info.status = status
+    info.bytes = nbytes
+    info.attempts = attempts
+    info.finish(error=error)
+    info.latency = latency
+    return info
+
+
+class BrokenHook(Hook):
+    """ A hook that fails every time it's called. """
+
+    def after(self, info):
+        raise ValueError('broken')
+
+
+class InstrumentationTest(unittest.TestCase):
+    """ Tests the latency histograms and metrics kept by the built-in collectors. """
+
+    def test_endpoint_name_drops_id(self):
+        """ Calls to the same connection of different objects are grouped together. """
+        eq_(endpoint_name('act_123/adgroups'), '{id}/adgroups')
+        eq_(endpoint_name('6004_123/comments'), '{id}/comments')
+        eq_(endpoint_name('6004'), '{id}')
+
+    def test_endpoint_name_of_bare_ids(self):
+        """ A bare id is named after its model, and endpoints that aren't ids keep their name. """
+        eq_(endpoint_name('6004', models.AdGroup), '{AdGroup}')
+        eq_(endpoint_name('act_123', models.AdAccount), '{AdAccount}')
+        eq_(endpoint_name('act_123/adgroups', models.AdGroup), '{id}/adgroups')
+        eq_(endpoint_name('debug_token', models.Token), 'debug_token')
+        eq_(endpoint_name('oauth/access_token'), 'oauth/access_token')
+        eq_(endpoint_name(''), '')
+        eq_(CallInfo('6004', 'GET', models.AdCreative).endpoint_name, '{AdCreative}')
+
+    def test_histogram_is_cumulative(self):
+        """ Each bucket counts every observation at or under its bound. """
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+        for latency in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(latency)
+        eq_(histogram.cumulative(), [(0.1, 2), (1.0, 3), (float('inf'), 4)])
+        eq_(histogram.count, 4)
+
+    def test_metrics_per_endpoint(self):
+        """ Calls are counted per endpoint and method, with their errors, retries and bytes. """
+        metrics = MetricsCollector(buckets=(0.1, 1.0))
+        metrics.after(finished_call('act_1/adgroups', 0.05))
+        metrics.after(finished_call('act_2/adgroups', 0.5, attempts=3))
+        metrics.error(finished_call('act_2/adgroups', 0.5, status=400, error=Exception('bad')), None)
+        metrics.after(finished_call('act_1/adgroups', 0.05, http_method='POST'))
+
+        stats = metrics.stats[('{id}/adgroups', 'GET')]
+        eq_(stats.calls, 3)
+        eq_(stats.errors, 1)
+        eq_(stats.retries, 2)
+        eq_(stats.bytes, 300)
+        eq_(metrics.stats[('{id}/adgroups', 'POST')].calls, 1)
+
+        text = metrics.to_prometheus()
+        ok_('pyfacebook_graph_call_duration_seconds_bucket{endpoint="{id}/adgroups",method="GET",le="0.1"} 1' in text)
+        ok_('pyfacebook_graph_call_duration_seconds_bucket{endpoint="{id}/adgroups",method="GET",le="+Inf"} 3' in text)
+        ok_('pyfacebook_graph_errors_total{endpoint="{id}/adgroups",method="GET"} 1' in text)
+
+    def test_broken_hook_is_ignored(self):
+        """ A hook raising doesn't stop the other hooks from being called. """
+        metrics = MetricsCollector()
+        instrumentation = Instrumentation([BrokenHook(), metrics])
+        instrumentation.after(finished_call('act_1', 0.05))
+        eq_(metrics.stats[('{id}', 'GET')].calls, 1)
+        ok_(not Instrumentation())
@@ -0,0 +1,60 @@
+import copy
+import pickle
+import datetime
+import unittest
+
+from tinymodel import FieldDef
+from nose.tools import ok_, eq_
+from pyfacebook import models
+from pyfacebook.lazy import LazyModel, json_to_lazy_objects, model_decoders
+from benchmark import payloads
+
+
+class LazyModelTest(unittest.TestCase):
+    """ Tests decoding fields the first time they're read. """
+
+    def setUp(self):
+        self.rows = payloads.adgroups(3)
+        self.adgroups = json_to_lazy_objects(self.rows, models.AdGroup)
+
+    def test_fields_decode_on_access(self):
+        """ Fields are decoded when read and kept, and unread fields stay raw. """
+        adgroup = self.adgroups[0]
+        eq_(adgroup._values, {})
+        eq_(adgroup.name, self.rows[0]['name'])
+        ok_(isinstance(adgroup.updated_time, datetime.datetime))
+        eq_(adgroup.updated_time.date(), datetime.date(2014, 3, 1))
+        ok_(adgroup.updated_time is adgroup.updated_time)
+        eq_(sorted(adgroup._values), ['name', 'updated_time'])
+
+    def test_missing_attributes(self):
+        """ Fields missing from the response, unknown fields and internal names raise AttributeError. """
+        adgroup = self.adgroups[0]
+        self.assertRaises(AttributeError, getattr, adgroup, 'adgroup_review_feedback')
+        self.assertRaises(AttributeError, getattr, adgroup, 'no_such_field')
+        self.assertRaises(AttributeError, getattr, adgroup, '__deepcopy__x')
+        self.assertRaises(AttributeError, getattr, LazyModel.__new__(LazyModel), 'name')
+
+    def test_copy_and_pickle(self):
+        """ Copies and unpickled LazyModels read the same fields, without recursing before they're set up. """
+        adgroup = self.adgroups[1]
+        adgroup.name
+        for other in (copy.copy(adgroup), copy.deepcopy(adgroup), pickle.loads(pickle.dumps(adgroup)),
+                      pickle.loads(pickle.dumps(adgroup, 2))):
+            eq_(other.name, self.rows[1]['name'])
+            eq_(other.model, models.AdGroup)
+
+    def test_decoders_follow_field_changes(self):
+        """ Decoders are rebuilt when a model's FIELD_DEFS are replaced. """
+        class Model(models.FacebookModel):
+            FIELD_DEFS = [FieldDef(title='count', allowed_types=[unicode])]
+
+        eq_(LazyModel(Model, {'count': '7'}).count, '7')
+        Model.FIELD_DEFS = [FieldDef(title='count', allowed_types=[int])]
+        eq_(LazyModel(Model, {'count': '7'}).count, 7)
+        ok_(model_decoders(Model) is model_decoders(Model))
+
+    def test_materialize(self):
+        """ A materialized LazyModel is the TinyModel its dict decodes to. """
+        eq_(self.adgroups[2].materialize().to_json(return_dict=True),
+            models.AdGroup(from_json=self.rows[2], preprocessed=True).to_json(return_dict=True))
@@ -0,0 +1,70 @@
+import unittest
+
+from nose.tools import eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.mirror import ObjectMirror
+from benchmark.graph_server import GraphServer
+
+
+class ObjectMirrorTest(unittest.TestCase):
+    """ Tests the local SQLite copy of Facebook objects. """
+
+    def setUp(self):
+        self.mirror = ObjectMirror()
+        self.mirror.put(models.AdGroup, [{'id': '1', 'name': 'first', 'campaign_id': 10, 'adgroup_status': 'ACTIVE'},
+                                         {'id': '2', 'name': 'second', 'campaign_id': 20, 'adgroup_status': 'PAUSED'}],
+                        account_id='act_5')
+
+    def tearDown(self):
+        self.mirror.close()
+
+    def test_query_indexed_columns(self):
+        """ Objects are found by indexed columns, and account ids match with or without act_. """
+        eq_([obj['id'] for obj in self.mirror.query(models.AdGroup, return_json=True, campaign_id=10)], ['1'])
+        eq_(len(self.mirror.query(models.AdGroup, return_json=True, account_id='act_5')), 2)
+        eq_(len(self.mirror.query(models.AdGroup, return_json=True, status=['ACTIVE', 'PAUSED'])), 2)
+        self.assertRaises(Exception, self.mirror.query, models.AdGroup, name='first')
+
+    def test_partial_objects_are_merged(self):
+        """ Putting an object with a few fields updates those fields and keeps the others. """
+        self.mirror.put(models.AdGroup, [{'id': '1', 'adgroup_status': 'PAUSED'}])
+        eq_(self.mirror.get(models.AdGroup, '1', return_json=True),
+            {'id': '1', 'name': 'first', 'campaign_id': 10, 'adgroup_status': 'PAUSED'})
+        eq_([obj['id'] for obj in self.mirror.query(models.AdGroup, return_json=True, campaign_id=10,
+                                                     status='PAUSED', account_id=5)], ['1'])
+
+    def test_nulls_are_stored(self):
+        """ A field Facebook set to null is stored as null, not left with its old value. """
+        self.mirror.put(models.AdGroup, [{'id': '1', 'campaign_id': None}])
+        eq_(self.mirror.get(models.AdGroup, '1', return_json=True),
+            {'id': '1', 'name': 'first', 'campaign_id': None, 'adgroup_status': 'ACTIVE'})
+        eq_(self.mirror.query(models.AdGroup, return_json=True, campaign_id=10), [])
+
+    def test_batch_gets_are_mirrored(self):
+        """ Objects read by a batch GET are mirrored, with the account they were read from. """
+        server = GraphServer(connections={'adcreatives': [{'id': '11', 'name': 'creative'}]}).start()
+        try:
+            pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=server.url,
+                              mirror=self.mirror)
+            batch = pyfb.batch()
+            batch.get(models.AdCreative, id='act_7', connection='adcreatives')
+            batch.get(models.AdGroup, id='6001')
+            batch.delete(id='6002')
+            batch.execute()
+            eq_(self.mirror.query(models.AdCreative, return_json=True, account_id='act_7'),
+                [{'id': '11', 'name': 'creative'}])
+            eq_(self.mirror.get(models.AdGroup, '6001', return_json=True)['id'], '6001')
+        finally:
+            server.stop()
+
+    def test_get_with_few_fields(self):
+        """ A GET asking for a few fields doesn't wipe out fields mirrored by an earlier GET. """
+        server = GraphServer(total_rows=3).start()
+        try:
+            pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=server.url,
+                              mirror=self.mirror)
+            full = pyfb.get(models.AdGroup, id='act_1', connection='adgroups', return_json=True)['data'][0]
+            pyfb.get(models.AdGroup, id='act_1', connection='adgroups', return_json=True, fields='id,name')
+            eq_(self.mirror.get(models.AdGroup, full['id'], return_json=True), full)
+        finally:
+            server.stop()
@@ -0,0 +1,78 @@
+import time
+import unittest
+
+from nose.tools import eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.paging import PageFetch, next_page_params
+from benchmark.graph_server import GraphServer
+
+
+class ConnectionIteratorTest(unittest.TestCase):
+    """ Tests iterating over connection pages, prefetching and resuming. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer(total_rows=230).start()
+        cls.ids = [row['id'] for row in cls.server.rows('adgroups', 230)]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+
+    def iterate(self, **kwargs):
+        return self.pyfb.iter_connection(models.AdGroup, 'act_1', 'adgroups', return_json=True, limit=50, **kwargs)
+
+    def pages_requested(self):
+        return len(self.server.requests_to('GET', '/act_1/adgroups'))
+
+    def test_next_page_params(self):
+        """ Only the paging params of the next URL are kept, and the last page has none. """
+        eq_(next_page_params({'data': [1], 'paging': {'next': 'https://graph/1/adgroups?limit=5&after=MTA%3D&access_token=t'}}),
+            {'after': 'MTA='})
+        eq_(next_page_params({'data': [1], 'paging': {}}), None)
+        eq_(next_page_params({'data': [], 'paging': {'next': 'https://graph/1/adgroups?after=x'}}), None)
+
+    def test_every_row_in_order(self):
+        """ Every row is read once and in order, with or without prefetching. """
+        for prefetch in (True, False):
+            iterator = self.iterate(prefetch=prefetch)
+            eq_([row['id'] for row in iterator], self.ids)
+            eq_(iterator.pages, 5)
+
+    def test_prefetch(self):
+        """ The next page is requested while the current one is read, and only when prefetching. """
+        iterator = iter(self.iterate(prefetch=False))
+        next(iterator)
+        time.sleep(0.1)
+        eq_(self.pages_requested(), 1)
+
+        del self.server.requests[:]
+        iterator = iter(self.iterate())
+        next(iterator)
+        deadline = time.time() + 5
+        while self.pages_requested() < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        eq_(self.pages_requested(), 2)
+
+    def test_resume(self):
+        """ A new iterator given a saved cursor starts over at the page the old one was reading. """
+        iterator = self.iterate()
+        read = []
+        for row in iterator:
+            read.append(row['id'])
+            if len(read) == 120:
+                break
+        resumed = [row['id'] for row in self.iterate(cursor=iterator.cursor)]
+        eq_(resumed, self.ids[100:])
+
+    def test_prefetch_errors(self):
+        """ An error raised while prefetching is raised when the page is asked for. """
+        def fail(params):
+            raise ValueError(params['after'])
+        fetch = PageFetch(fail, {'after': 'x'})
+        fetch.start()
+        self.assertRaises(ValueError, fetch.result)
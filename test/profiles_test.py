@@ -0,0 +1,67 @@
+import json
+import unittest
+
+from tinymodel import FieldDef
+from nose.tools import ok_, eq_
+from pyfacebook import models
+from pyfacebook.profiles import get_request_profile, model_signature
+from pyfacebook.utils import default_fields
+
+
+class RequestProfileTest(unittest.TestCase):
+    """ Tests the request profile cached per model. """
+
+    def model(self):
+        class Model(models.FacebookModel):
+            FIELD_DEFS = [FieldDef(title='id', allowed_types=[long]),
+                          FieldDef(title='name', allowed_types=[unicode]),
+                          FieldDef(title='adgroups', allowed_types=[[models.AdGroup]])]
+            CONNECTIONS = ['adgroups']
+        return Model
+
+    def test_profile(self):
+        """ A profile holds the default fields, encoded once, and the model of each connection. """
+        profile = get_request_profile(models.AdAccount)
+        ok_(get_request_profile(models.AdAccount) is profile)
+        eq_(profile.default_fields, default_fields(models.AdAccount))
+        eq_(json.loads(profile.encoded_fields), profile.default_fields)
+        eq_(profile.connection_models['adgroups'], models.AdGroup)
+        eq_(profile.connection_models['adimages'], models.AdImage)
+
+    def test_signature_changes(self):
+        """ Changing the fields, connections or create-only fields changes the signature, and copying them doesn't. """
+        model = self.model()
+        signature = model_signature(model)
+        model.FIELD_DEFS = list(model.FIELD_DEFS)
+        model.CONNECTIONS = list(model.CONNECTIONS)
+        eq_(model_signature(model), signature)
+        eq_(model_signature(self.model()), signature)
+
+        model.FIELD_DEFS[1] = FieldDef(title='name', allowed_types=[str])
+        ok_(model_signature(model) != signature)
+        signature = model_signature(model)
+        model.FIELD_DEFS[1] = FieldDef(title='title', allowed_types=[str])
+        ok_(model_signature(model) != signature)
+        signature = model_signature(model)
+        model.CONNECTIONS[0] = 'adcreatives'
+        ok_(model_signature(model) != signature)
+        signature = model_signature(model)
+        model.FIELD_DEFS.append(FieldDef(title='status', allowed_types=[unicode]))
+        ok_(model_signature(model) != signature)
+        signature = model_signature(model)
+        model.CREATE_ONLY = ['name']
+        ok_(model_signature(model) != signature)
+
+    def test_profile_rebuilt(self):
+        """ The profile of a model is rebuilt when its signature changes, and kept otherwise. """
+        model = self.model()
+        profile = get_request_profile(model)
+        eq_(profile.default_fields, ['id', 'name'])
+        ok_(get_request_profile(model) is profile)
+
+        model.FIELD_DEFS.append(FieldDef(title='status', allowed_types=[unicode]))
+        eq_(get_request_profile(model).default_fields, ['id', 'name', 'status'])
+        model.CONNECTIONS = []
+        eq_(get_request_profile(model).default_fields, ['id', 'name', 'adgroups', 'status'])
+        model.FIELD_DEFS[1] = FieldDef(title='title', allowed_types=[unicode])
+        eq_(get_request_profile(model).default_fields, ['id', 'title', 'adgroups', 'status'])
@@ -0,0 +1,75 @@
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import PyFacebook
+from pyfacebook.utils import FacebookException
+from pyfacebook.ratelimit import RateLimiter, TokenBucket
+from benchmark.graph_server import GraphServer
+
+
+class FakeClock(object):
+    """ A clock that only moves when something sleeps on it. """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTest(unittest.TestCase):
+    """ Tests the token bucket pacing on a fake clock. """
+
+    def test_paces_after_burst(self):
+        """ A burst goes through at once, later calls are spaced 1/rate apart. """
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=5, clock=clock, sleep=clock.sleep)
+        for _ in range(5):
+            eq_(bucket.acquire(), 0)
+        for _ in range(10):
+            bucket.acquire()
+        ok_(abs(clock.now - 1.0) < 1e-6)
+
+    def test_pause(self):
+        """ A paused bucket holds callers back until the pause is over. """
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=5, clock=clock, sleep=clock.sleep)
+        bucket.pause(3)
+        bucket.acquire()
+        eq_(clock.now, 3)
+
+
+class RateLimiterSimulationTest(unittest.TestCase):
+    """ Runs bursts of calls against a local Graph API stand-in that throttles over 20 calls a second. """
+
+    CALLS = 50
+
+    def setUp(self):
+        self.server = GraphServer(call_limit=20, window=1.0).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def pyfb(self, rate_limiter=None):
+        return PyFacebook(token_text='test', call_token_debug=False, facebook_graph_url=self.server.url,
+                          rate_limiter=rate_limiter)
+
+    def test_without_limiter_calls_are_throttled(self):
+        """ Without a rate limiter the burst runs into error code 4. """
+        pyfb = self.pyfb()
+        with self.assertRaises(FacebookException) as raised:
+            for _ in range(self.CALLS):
+                pyfb.call_graph_api('act_1', params={})
+        eq_(raised.exception.code, 4)
+
+    def test_limiter_completes_every_call(self):
+        """ With a rate limiter every call succeeds, slowed by the usage header and retried after throttling. """
+        limiter = RateLimiter(rate=100, burst=10, base_backoff=0.2, max_backoff=1.0, max_retries=10)
+        pyfb = self.pyfb(rate_limiter=limiter)
+        for _ in range(self.CALLS):
+            ok_(pyfb.call_graph_api('act_1', params={})['data'])
+        eq_(self.server.throttled_count, limiter.throttled)
+        ok_(limiter.throttled < self.CALLS / 2)
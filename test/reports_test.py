@@ -0,0 +1,86 @@
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import PyFacebook
+from pyfacebook.cache import ResponseCache
+from pyfacebook.utils import FacebookException
+from pyfacebook.reports import COMPLETED, ReportScheduler
+from benchmark.graph_server import GraphServer
+
+
+class ReportSchedulerTest(unittest.TestCase):
+    """ Tests submitting, polling and reading report jobs. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer(report_polls=3).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.scheduler = ReportScheduler(min_interval=0.05, max_interval=0.2)
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_jobs_share_polls(self):
+        """ Jobs submitted together are polled in the same call, and read from reportstats once done. """
+        jobs = [self.scheduler.submit(self.pyfb, 'act_%d' % i, data_columns=['impressions'], return_json=True)
+                for i in range(3)]
+        for job in jobs:
+            ok_(job.wait(5))
+            eq_(job.status, COMPLETED)
+        polls = self.server.requests_to('GET', '/')
+        eq_(len(polls), 3)
+        eq_(sorted(polls[0]['ids'].split(',')), sorted(job.id for job in jobs))
+        eq_(len(list(jobs[0].results())), 10)
+        eq_(self.server.requests_to('GET', '/act_0/reportstats')[0]['report_run_id'], jobs[0].id)
+
+    def test_failed_job(self):
+        """ A job Facebook fails raises from results. """
+        job = self.scheduler.submit(self.pyfb, 'failing_1')
+        ok_(job.wait(5))
+        self.assertRaises(FacebookException, job.results)
+
+    def test_expired_job_fails_alone(self):
+        """ A report id Facebook doesn't know fails its own job, and the jobs polled with it carry on. """
+        jobs = [self.scheduler.submit(self.pyfb, account_id) for account_id in ('act_1', 'expiring_1', 'act_2')]
+        for job in jobs:
+            ok_(job.wait(5))
+        eq_([job.status for job in jobs], [COMPLETED, None, COMPLETED])
+        ok_(isinstance(jobs[1].error, FacebookException))
+        ok_(jobs[0].error is None)
+
+    def test_unexpected_errors_fail_jobs(self):
+        """ An unexpected error while polling fails the jobs being polled, and the scheduler keeps polling others. """
+        next_interval = self.scheduler.next_interval
+        self.scheduler.next_interval = lambda *args: 1 / 0
+        job = self.scheduler.submit(self.pyfb, 'act_1')
+        ok_(job.wait(5))
+        ok_(isinstance(job.error, ZeroDivisionError))
+        self.assertRaises(ZeroDivisionError, job.results)
+
+        self.scheduler.next_interval = next_interval
+        job = self.scheduler.submit(self.pyfb, 'act_1')
+        ok_(job.wait(5))
+        eq_(job.status, COMPLETED)
+
+    def test_polls_skip_the_response_cache(self):
+        """ Polls aren't answered from the response cache, so jobs don't look stuck. """
+        self.pyfb.response_cache = ResponseCache()
+        job = self.scheduler.submit(self.pyfb, 'act_1')
+        ok_(job.wait(5))
+        eq_(job.status, COMPLETED)
+        eq_(len(self.server.requests_to('GET', '/')), 3)
+        eq_(self.pyfb.response_cache.stats()['hits'], 0)
+
+    def test_next_interval(self):
+        """ Jobs making progress are polled about halfway to their expected end, stalled ones less and less. """
+        self.assertAlmostEqual(self.scheduler.next_interval(0.1, 10, 50, 0.16), 0.1)
+        self.assertAlmostEqual(self.scheduler.next_interval(0.1, 10, 50, 0.1), 0.0625)
+        self.assertAlmostEqual(self.scheduler.next_interval(0.1, 50, 50, 0.1), 0.15)
+        self.assertAlmostEqual(self.scheduler.next_interval(0.15, 50, 50, 0.1), 0.2)
@@ -0,0 +1,92 @@
+import unittest
+
+from nose.tools import ok_, eq_
+from requests.exceptions import Timeout
+from pyfacebook import models
+from pyfacebook.utils import CircuitOpenException, FacebookException
+from pyfacebook.retry import CircuitBreaker, RetryPolicy
+
+
+class FakeClock(object):
+    """ A clock that only moves when something sleeps on it. """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def failing(errors, result='ok'):
+    """ Returns a call raising each of errors in turn, then returning result. """
+    errors = list(errors)
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return call
+
+
+class RetryPolicyTest(unittest.TestCase):
+    """ Tests which failures are retried, and how often. """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.policy = RetryPolicy(max_attempts=3, sleep=self.clock.sleep, clock=self.clock)
+
+    def test_retries_transient_gets(self):
+        """ Timeouts, 5xx and error codes 1 and 2 are retried. """
+        errors = [Timeout(), FacebookException('Unknown error', code=1)]
+        eq_(self.policy.call('act_1', 'GET', failing(errors)), ('ok', 2))
+        eq_(self.policy.call('act_1', 'DELETE', failing([FacebookException('Bad gateway', status_code=502)])), ('ok', 1))
+
+    def test_does_not_retry_other_errors(self):
+        """ Errors Facebook meant, like invalid params, are raised right away. """
+        self.assertRaises(FacebookException, self.policy.call, 'act_1', 'GET',
+                          failing([FacebookException('Invalid parameter', code=100)]))
+
+    def test_posts_need_idempotency(self):
+        """ A POST is only retried when it is marked idempotent. """
+        self.assertRaises(Timeout, self.policy.call, 'act_1/adgroups', 'POST', failing([Timeout()]))
+        eq_(self.policy.call('act_1/adgroups', 'POST', failing([Timeout()]), idempotent=True), ('ok', 1))
+
+    def test_budget(self):
+        """ Once the retry budget is spent, failures are raised without retrying. """
+        policy = RetryPolicy(max_attempts=3, budget_burst=1, budget_ratio=0, sleep=self.clock.sleep, clock=self.clock)
+        eq_(policy.call('1', 'GET', failing([Timeout()])), ('ok', 1))
+        self.assertRaises(Timeout, policy.call, '1', 'GET', failing([Timeout()]))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    """ Tests the open, half-open and closed states. """
+
+    def test_opens_and_recovers(self):
+        """ Enough failures open the circuit, and a successful trial after the timeout closes it. """
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        breaker.record_failure()
+        eq_(breaker.state, 'open')
+        self.assertRaises(CircuitOpenException, breaker.before_call, 'act_1')
+        clock.sleep(10)
+        breaker.before_call('act_1')
+        self.assertRaises(CircuitOpenException, breaker.before_call, 'act_1')
+        breaker.record_success()
+        eq_(breaker.state, 'closed')
+
+    def test_endpoints_share_breakers_across_ids(self):
+        """ Breakers are per endpoint, not per id. """
+        policy = RetryPolicy()
+        ok_(policy.breaker('act_1/adgroups') is policy.breaker('act_2/adgroups'))
+        ok_(policy.breaker('act_1/adgroups') is not policy.breaker('act_1/adcreatives'))
+
+    def test_bare_ids_have_breakers_per_model(self):
+        """ Reads of single objects share a breaker per model, apart from calls like debug_token. """
+        policy = RetryPolicy()
+        ok_(policy.breaker('6001', models.AdGroup) is policy.breaker('6002', models.AdGroup))
+        ok_(policy.breaker('6001', models.AdGroup) is not policy.breaker('6001', models.AdCreative))
+        ok_(policy.breaker('6001', models.AdGroup) is not policy.breaker('debug_token', models.Token))
@@ -0,0 +1,71 @@
+import unittest
+
+import requests
+from nose.tools import ok_, eq_
+from pyfacebook import models, PyFacebook
+from benchmark.graph_server import GraphServer
+
+
+class RecordingSession(requests.Session):
+    """ A session that records the method and timeout of every request it sends. """
+
+    def __init__(self):
+        requests.Session.__init__(self)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, kwargs.get('timeout')))
+        return requests.Session.request(self, method, url, **kwargs)
+
+
+class SessionTest(unittest.TestCase):
+    """ Tests the pooled session and timeout Graph API calls are sent with. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_injected_session(self):
+        """ A session passed in is used for every call, and can be shared by several instances. """
+        session = RecordingSession()
+        first = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url,
+                           session=session, pool_maxsize=1)
+        second = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url,
+                            session=session)
+        ok_(first.session is session and second.session is session)
+        first.get(models.AdGroup, id='6001')
+        second.delete(id='6002')
+        eq_([method for method, timeout in session.calls], ['GET', 'DELETE'])
+
+    def test_default_session(self):
+        """ Each instance gets its own session, with a connection pool configured by the pool settings. """
+        pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url,
+                          pool_connections=3, pool_maxsize=7, pool_block=True)
+        ok_(isinstance(pyfb.session, requests.Session))
+        adapter = pyfb.session.get_adapter('https://graph.facebook.com')
+        ok_(adapter is pyfb.session.get_adapter(self.server.url))
+        eq_((adapter._pool_connections, adapter._pool_maxsize, adapter._pool_block), (3, 7, True))
+        ok_(PyFacebook(token_text='token', call_token_debug=False).session is not pyfb.session)
+        ok_(PyFacebook(token_text='token', call_token_debug=False, use_session=False).session is None)
+
+    def test_timeout(self):
+        """ The timeout is passed to every call, and a call answered too slowly raises. """
+        session = RecordingSession()
+        pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url,
+                          session=session, timeout=2.5)
+        pyfb.get(models.AdGroup, id='6001')
+        pyfb.post(models.AdGroup, id='6001', name='renamed')
+        pyfb.delete(id='6001')
+        eq_(session.calls, [('GET', 2.5), ('POST', 2.5), ('DELETE', 2.5)])
+
+        slow_server = GraphServer(latency=0.5).start()
+        try:
+            pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=slow_server.url,
+                              timeout=0.05)
+            self.assertRaises(requests.exceptions.Timeout, pyfb.get, models.AdGroup, id='6001')
+        finally:
+            slow_server.stop()
@@ -0,0 +1,97 @@
+import unittest
+
+from nose.plugins.skip import SkipTest
+from nose.tools import ok_, eq_
+from pyfacebook import stats as stats_module
+from pyfacebook.stats import StatisticSet
+from benchmark import payloads
+
+
+class StatisticSetTest(unittest.TestCase):
+    """ Tests the columnar AdStatistic container. """
+
+    def setUp(self):
+        self.rows = payloads.adgroupstats(200)
+        self.stats = StatisticSet.from_rows(self.rows)
+
+    def test_columns_match_rows(self):
+        """ Every counter and id column holds the values of the rows it was built from. """
+        eq_(len(self.stats), 200)
+        eq_(list(self.stats.column('clicks')), [row['clicks'] for row in self.rows])
+        eq_(self.stats[5]['adgroup_id'], self.rows[5]['adgroup_id'])
+        eq_(self.stats[5]['start_time'].hour, 5)
+
+    def test_slice(self):
+        """ Slicing returns a StatisticSet over the same rows. """
+        stats = self.stats[10:20]
+        ok_(isinstance(stats, StatisticSet))
+        eq_(stats.ids, [row['id'] for row in self.rows[10:20]])
+
+    def test_filter_and_sum(self):
+        """ Filtering by column value and by mask keeps the matching rows only. """
+        campaign_id = self.rows[0]['adcampaign_id']
+        by_campaign = self.stats.filter(adcampaign_id=campaign_id)
+        eq_(by_campaign.sum('impressions'), sum(r['impressions'] for r in self.rows if r['adcampaign_id'] == campaign_id))
+        clicked = self.stats.filter([clicks > 0 for clicks in self.stats.column('clicks')])
+        eq_(len(clicked), len([r for r in self.rows if r['clicks'] > 0]))
+        eq_(self.stats.totals()['spent'], sum(r['spent'] for r in self.rows))
+
+    def test_large_integers(self):
+        """ Ids and counters past 32 bits are kept exactly, in 64-bit columns or in the double fallback. """
+        rows = [dict(row, impressions=5000000000 + i, adgroup_id=6000000000000 + i)
+                for i, row in enumerate(self.rows[:3])]
+        for typecode in (stats_module.INTEGER_TYPECODE, 'd'):
+            integer_typecode, stats_module.INTEGER_TYPECODE = stats_module.INTEGER_TYPECODE, typecode
+            try:
+                stats = StatisticSet.from_rows(rows)
+            finally:
+                stats_module.INTEGER_TYPECODE = integer_typecode
+            eq_(stats.column('impressions').itemsize, 8)
+            eq_([row['impressions'] for row in stats.rows()], [5000000000, 5000000001, 5000000002])
+            ok_(all(isinstance(row['impressions'], (int, long)) for row in stats.rows()))
+            eq_(stats[2]['adgroup_id'], 6000000000002)
+            eq_(stats.sum('impressions'), 15000000003)
+            eq_(stats.rollup(ratios=())[0]['impressions'], 15000000003)
+
+    def rollup(self, use_numpy):
+        """
+        :rtype list: The rollup by campaign and hour, made with NumPy or with the pure Python fallback
+        """
+        saved = stats_module.numpy
+        if not use_numpy:
+            stats_module.numpy = None
+        try:
+            return self.stats.rollup(by=['adcampaign_id'], time_bucket=3600, means=['clicks'])
+        finally:
+            stats_module.numpy = saved
+
+    def check_rollup(self, results):
+        eq_(sum(result['rows'] for result in results), 200)
+        eq_(sum(result['impressions'] for result in results), sum(r['impressions'] for r in self.rows))
+        first = results[0]
+        group = [r for r in self.rows if r['adcampaign_id'] == first['adcampaign_id'] and
+                 r['start_time'].startswith(first['start_time'].strftime('%Y-%m-%dT%H'))]
+        eq_(first['rows'], len(group))
+        eq_(first['clicks'], sum(r['clicks'] for r in group))
+        self.assertAlmostEqual(first['mean_clicks'], float(first['clicks']) / len(group))
+        self.assertAlmostEqual(first['ctr'], float(first['clicks']) / first['impressions'])
+
+    def test_rollup(self):
+        """ A rollup by campaign and hour sums each group and derives its ratios from the sums. """
+        self.check_rollup(self.rollup(use_numpy=False))
+        if stats_module.numpy is not None:
+            self.check_rollup(self.rollup(use_numpy=True))
+
+    def test_rollup_paths_agree(self):
+        """ The NumPy and pure Python rollups find the same groups with the same values. """
+        if stats_module.numpy is None:
+            raise SkipTest('NumPy is not installed')
+        vectorized, fallback = self.rollup(use_numpy=True), self.rollup(use_numpy=False)
+        eq_(len(vectorized), len(fallback))
+        for numpy_result, python_result in zip(vectorized, fallback):
+            eq_(sorted(numpy_result), sorted(python_result))
+            for key, value in python_result.items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(numpy_result[key], value)
+                else:
+                    eq_(numpy_result[key], value)
@@ -0,0 +1,105 @@
+import json
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.retry import RetryPolicy
+from pyfacebook.utils import FacebookException
+from pyfacebook.streaming import JSONStreamParser, StreamedResponse
+from pyfacebook.instrumentation import Hook, Instrumentation
+from benchmark import payloads
+from benchmark.graph_server import GraphServer
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class JSONStreamParserTest(unittest.TestCase):
+    """ Tests incremental parsing of Graph API responses. """
+
+    def test_any_chunk_size(self):
+        """ Rows and other keys come out the same however the body is split. """
+        response = {'data': payloads.adgroups(50), 'paging': {'cursors': {'after': 'MTA='}}, 'count': 12345}
+        body = json.dumps(response)
+        for size in (1, 3, 64, len(body)):
+            events = list(JSONStreamParser(chunked(body, size)))
+            eq_([value for key, value in events if key == 'data'], response['data'])
+            eq_(dict((key, value) for key, value in events if key != 'data'),
+                {'paging': response['paging'], 'count': 12345})
+
+    def test_empty(self):
+        """ Empty objects and data arrays yield nothing. """
+        eq_(list(JSONStreamParser(['{ }'])), [])
+        eq_(list(JSONStreamParser(chunked('{"data": [ ]}', 1))), [])
+
+
+class StreamedResponseTest(unittest.TestCase):
+    """ Tests the response wrapper around the parser. """
+
+    def test_paging_is_set_after_data(self):
+        """ paging is read after the data that precedes it. """
+        response = StreamedResponse(chunked(json.dumps({'data': [{'id': '1'}], 'paging': {'next': 'x'}}), 5), return_json=True)
+        eq_(list(response), [{'id': '1'}])
+        eq_(response.paging, {'next': 'x'})
+
+    def test_error(self):
+        """ An error response raises a FacebookException with its code. """
+        response = StreamedResponse([json.dumps({'error': {'message': 'Too many calls', 'code': 17}})])
+        with self.assertRaises(FacebookException) as raised:
+            list(response)
+        eq_(raised.exception.code, 17)
+
+
+class Recorder(Hook):
+    """ Keeps the CallInfo of every call. """
+
+    def __init__(self):
+        self.calls = []
+
+    def after(self, info):
+        self.calls.append(info)
+
+    def error(self, info, exception):
+        self.calls.append(info)
+
+
+class StreamTest(unittest.TestCase):
+    """ Tests streaming GETs through PyFacebook. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer(stats_rows=200).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.recorder = Recorder()
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url,
+                               retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001),
+                               instrumentation=Instrumentation([self.recorder]))
+
+    def test_stream(self):
+        """ Rows are streamed, and the call is instrumented. """
+        rows = list(self.pyfb.stream(models.AdStatistic, 'act_1', 'adgroupstats', return_json=True))
+        eq_(len(rows), 200)
+        eq_(len(self.recorder.calls), 1)
+        eq_(self.recorder.calls[0].status, 200)
+        ok_(self.recorder.calls[0].bytes > 0)
+
+    def test_errors_raise_before_streaming(self):
+        """ Facebook errors raise with their code, and unavailability is retried, then raised with its status. """
+        try:
+            self.pyfb.stream(models.AdAccount, 'error_1')
+            raise AssertionError('Expected a FacebookException')
+        except FacebookException, e:
+            eq_(e.code, 100)
+            eq_(e.status_code, 400)
+
+        self.assertRaises(FacebookException, self.pyfb.stream, models.AdAccount, 'unavailable_1')
+        eq_(len(self.server.requests_to('GET', '/unavailable_1')), 3)
+        eq_(self.recorder.calls[-1].status, 500)
+        eq_(self.recorder.calls[-1].retries, 2)
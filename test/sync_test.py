@@ -0,0 +1,68 @@
+import json
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import PyFacebook
+from pyfacebook.sync import IncrementalSync
+from pyfacebook.stats import to_timestamp
+from benchmark.graph_server import GraphServer
+
+
+def adgroup(id, day, status='ACTIVE', name='adgroup'):
+    return {'id': id, 'name': name, 'adgroup_status': status, 'updated_time': '2014-03-%02dT00:00:00+0000' % day}
+
+
+class IncrementalSyncTest(unittest.TestCase):
+    """ Tests syncing only what changed since the last run. """
+
+    def setUp(self):
+        self.adgroups = [adgroup('1', 1), adgroup('2', 2), adgroup('3', 3, status='DELETED')]
+        self.server = GraphServer(connections={'adgroups': self.adgroups}).start()
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+        self.sync = IncrementalSync(self.pyfb)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def listings(self):
+        return self.server.requests_to('GET', '/act_1/adgroups')
+
+    def test_first_sync(self):
+        """ The first run fetches everything, skips deleted objects and sets the watermark to the newest update. """
+        result = self.sync.sync('act_1', 'adgroups')
+        eq_(sorted(result.added), ['1', '2'])
+        eq_(result.deleted, [])
+        eq_(result.watermark, to_timestamp('2014-03-03T00:00:00+0000'))
+        ok_('filtering' not in self.listings()[0])
+        eq_(sorted(self.sync.objects('act_1', 'adgroups')), ['1', '2'])
+
+    def test_watermark_and_overlap(self):
+        """ Later runs only fetch objects updated after the watermark, less the overlap. """
+        watermark = self.sync.sync('act_1', 'adgroups').watermark
+        self.adgroups[1]['name'] = 'renamed'
+        self.adgroups[2].update(adgroup('3', 3, name='same second'))
+        result = self.sync.sync('act_1', 'adgroups')
+
+        eq_(json.loads(self.listings()[-1]['filtering']),
+            [{'field': 'updated_time', 'operator': 'GREATER_THAN', 'value': int(watermark) - 1}])
+        eq_(result.fetched, 1)
+        eq_(result.added, ['3'])
+        eq_(result.changed, [])
+        eq_(result.watermark, watermark)
+
+    def test_deletions(self):
+        """ Objects updated to a deleted status are removed, and vanished ones only when scanning for them. """
+        self.sync.sync('act_1', 'adgroups')
+        self.adgroups[0].update(adgroup('1', 4, status='DELETED'))
+        self.adgroups.append(adgroup('4', 4))
+        self.adgroups.pop(1)
+
+        result = self.sync.sync('act_1', 'adgroups')
+        eq_(result.deleted, ['1'])
+        eq_(result.added, ['4'])
+        eq_(len(self.listings()), 2)
+        eq_(sorted(self.sync.objects('act_1', 'adgroups')), ['2', '4'])
+
+        result = self.sync.sync('act_1', 'adgroups', scan_deletions=True)
+        eq_(result.deleted, ['2'])
+        eq_(sorted(self.sync.objects('act_1', 'adgroups')), ['4'])
@@ -0,0 +1,109 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import warnings
+import multiprocessing
+
+from nose.tools import ok_, eq_
+from pyfacebook import PyFacebook
+from pyfacebook.tokens import TokenCache
+from benchmark.graph_server import GraphServer
+
+
+def set_tokens(filename, process, start):
+    start.wait()
+    cache = TokenCache(filename)
+    for index in range(20):
+        cache.set('token_%d_%d' % (process, index), {'text': 'token_%d_%d' % (process, index), 'expires_at': 0})
+
+
+def open_cache(filename, start):
+    start.wait()
+    TokenCache(filename).set('token', {'text': 'token', 'expires_at': 0})
+
+
+class TokenCacheTest(unittest.TestCase):
+    """ Tests caching debug_token results in memory and on disk. """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'tokens.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_expiry_margin(self):
+        """ Tokens expiring within the margin are dropped, and tokens that never expire are kept. """
+        cache = TokenCache(expiry_margin=3600)
+        cache.set('soon', {'text': 'soon', 'expires_at': time.time() + 600})
+        cache.set('later', {'text': 'later', 'expires_at': time.time() + 7200})
+        cache.set('never', {'text': 'never', 'expires_at': 0})
+        ok_(cache.get('soon') is None)
+        eq_(cache.get('later').text, 'later')
+        eq_(cache.get('never').text, 'never')
+        ok_(TokenCache(expiry_margin=60).get('soon') is None)
+
+    def test_persistence(self):
+        """ Tokens, aliases and expiries written by one cache are seen by another on the same file. """
+        first, second = TokenCache(self.filename), TokenCache(self.filename)
+        first.set('a', {'text': 'a', 'expires_at': 0})
+        first.set('b', {'text': 'b', 'expires_at': time.time() + 60})
+        second.alias('old', 'a')
+        eq_(first.get('old').text, 'a')
+        ok_(second.get('b') is None)
+        ok_(TokenCache(self.filename, expiry_margin=0).get('b') is None)
+
+    def test_concurrent_processes(self):
+        """ Processes writing the same file at once don't lose each other's tokens. """
+        TokenCache(self.filename)
+        start = multiprocessing.Event()
+        processes = [multiprocessing.Process(target=set_tokens, args=(self.filename, process, start))
+                     for process in range(4)]
+        for process in processes:
+            process.start()
+        start.set()
+        for process in processes:
+            process.join()
+            eq_(process.exitcode, 0)
+        cache = TokenCache(self.filename)
+        for process in range(4):
+            for index in range(20):
+                ok_(cache.get('token_%d_%d' % (process, index)) is not None)
+
+    def test_concurrent_schema_creation(self):
+        """ Processes creating the same new file at once all open it. """
+        start = multiprocessing.Event()
+        processes = [multiprocessing.Process(target=open_cache, args=(self.filename, start)) for process in range(8)]
+        for process in processes:
+            process.start()
+        start.set()
+        for process in processes:
+            process.join()
+            eq_(process.exitcode, 0)
+
+    def test_refresh(self):
+        """ One thread claims a refresh at a time, and a refreshed token is served under the old text. """
+        cache = TokenCache(self.filename)
+        ok_(cache.start_refresh('old'))
+        ok_(not cache.start_refresh('old'))
+        cache.finish_refresh('old')
+
+        cache.set('old', {'text': 'old', 'expires_at': time.time() + 3 * 3600})
+        server = GraphServer().start()
+        try:
+            warnings.simplefilter('ignore')
+            pyfb = PyFacebook(app_id='1', app_secret='secret', token_text='old', token_cache=cache,
+                              facebook_graph_url=server.url)
+            eq_(pyfb.access_token.text, 'old')
+            deadline = time.time() + 5
+            while pyfb.access_token.text == 'old' and time.time() < deadline:
+                time.sleep(0.01)
+            eq_(pyfb.access_token.text, 'long_lived_old')
+            eq_(cache.get('old').text, 'long_lived_old')
+            eq_(len(server.requests_to('GET', '/oauth/access_token')), 1)
+            ok_(cache.start_refresh('old'))
+        finally:
+            warnings.resetwarnings()
+            server.stop()
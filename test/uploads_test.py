@@ -0,0 +1,83 @@
+import os
+import unittest
+
+from hashlib import md5
+from StringIO import StringIO
+from nose.tools import ok_, eq_
+from pyfacebook import PyFacebook
+from pyfacebook.uploads import ImageIndex, MultipartStream, file_digest, quote_filename, upload_image, upload_images
+from benchmark.graph_server import GraphServer
+
+TEST_IMAGE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'test_image.png')
+
+
+class UploadsTest(unittest.TestCase):
+    """ Tests streamed image uploads and skipping images already in an account. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        with open(TEST_IMAGE, 'rb') as image_file:
+            self.image = image_file.read()
+        del self.server.requests[:]
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+
+    def uploads(self, account_id):
+        return [params['file'] for params in self.server.requests_to('POST', '/%s/adimages' % account_id)]
+
+    def test_stream_reads_in_chunks(self):
+        """ The multipart body is as long as it says, and can be sent again after a rewind. """
+        stream = MultipartStream('file', TEST_IMAGE, chunk_size=100)
+        body = ''.join(iter(stream))
+        eq_(len(body), len(stream))
+        ok_(self.image in body)
+        stream.rewind()
+        eq_(stream.read(), body)
+        stream.close()
+
+    def test_filenames_are_quoted(self):
+        """ Quotes, backslashes and line breaks in a filename can't break the multipart body. """
+        eq_(quote_filename('a "b"\\c.png'), '"a \\"b\\"\\\\c.png"')
+        eq_(quote_filename('a.png\r\nX-Injected: 1'), '"a.pngX-Injected: 1"')
+        eq_(quote_filename(u'caf\xe9.png'), '"caf\xc3\xa9.png"')
+
+        result = upload_image(self.pyfb, 'act_1', StringIO(self.image), filename=u'my "caf\xe9"\r\n.png')
+        eq_(self.uploads('act_1'), [('my "caf\xc3\xa9".png', self.image)])
+        eq_(result['hash'], md5(self.image).hexdigest())
+        eq_(result['filename'], u'my "caf\xe9"\r\n.png')
+
+    def test_digest_leaves_file_in_place(self):
+        """ Hashing a file object reads from its position and puts it back there. """
+        image_file = StringIO('skip' + self.image)
+        image_file.seek(4)
+        eq_(file_digest(image_file), file_digest(TEST_IMAGE))
+        eq_(image_file.tell(), 4)
+
+    def test_known_images_are_not_uploaded(self):
+        """ An image is uploaded once per account; identical images in the same account reuse its hash. """
+        index = ImageIndex()
+        first = upload_image(self.pyfb, 'act_1', TEST_IMAGE, index=index)
+        again = upload_image(self.pyfb, 'act_1', StringIO(self.image), filename='copy.png', index=index)
+        other_account = upload_image(self.pyfb, 'act_2', TEST_IMAGE, index=index)
+
+        eq_(self.uploads('act_1'), [('test_image.png', self.image)])
+        eq_(self.uploads('act_2'), [('test_image.png', self.image)])
+        eq_(first['hash'], md5(self.image).hexdigest())
+        ok_(first['uploaded'])
+        ok_(not again['uploaded'])
+        eq_(again['hash'], first['hash'])
+        ok_(other_account['uploaded'])
+
+    def test_parallel_uploads(self):
+        """ Uploads of many images return a result per image, in order. """
+        results = upload_images(self.pyfb, 'act_1', [TEST_IMAGE, StringIO('other')], max_workers=2)
+        eq_(len(results), 2)
+        eq_(len(self.uploads('act_1')), 2)
+        eq_(results.values()[0]['filename'], 'test_image.png')
+        eq_(results.values()[1]['hash'], md5('other').hexdigest())
@@ -0,0 +1,91 @@
+import copy
+import json
+import urllib
+import unittest
+
+from nose.tools import ok_, eq_
+from pyfacebook import models, PyFacebook
+from pyfacebook.profiles import get_request_profile
+from pyfacebook.utils import chunk_ids, json_to_objects
+from benchmark import payloads
+from benchmark.graph_server import GraphServer
+
+
+class JsonToObjectsTest(unittest.TestCase):
+    """ Tests building models from decoded dicts. """
+
+    def test_same_as_parsing_dumped_json(self):
+        """ Models built from dicts are the same as models parsed from their dumped JSON. """
+        for model, rows in ((models.AdGroup, payloads.adgroups(50)), (models.AdStatistic, payloads.adgroupstats(50)),
+                            (models.AdImage, payloads.adimages(10))):
+            objects = json_to_objects(copy.deepcopy(rows), model)
+            for obj, row in zip(objects, rows):
+                ok_(isinstance(obj, model))
+                eq_(obj.to_json(return_dict=True), model(from_json=json.dumps(row)).to_json(return_dict=True))
+
+    def test_dicts_by_id(self):
+        """ A dict of objects keeps its keys, and each value is built like a list item. """
+        rows = dict((row['id'], row) for row in payloads.adgroups(5))
+        objects = json_to_objects(copy.deepcopy(rows), models.AdGroup)
+        eq_(sorted(objects), sorted(rows))
+        for id, obj in objects.items():
+            eq_(obj.to_json(return_dict=True), models.AdGroup(from_json=json.dumps(rows[id])).to_json(return_dict=True))
+        self.assertRaises(Exception, json_to_objects, 'data', models.AdGroup)
+
+
+class ChunkIdsTest(unittest.TestCase):
+    """ Tests splitting ids into ids params. """
+
+    def test_by_count(self):
+        """ Chunks hold at most max_ids ids, in order. """
+        chunks = chunk_ids(range(120), max_ids=50)
+        eq_([len(chunk.split(',')) for chunk in chunks], [50, 50, 20])
+        eq_(','.join(chunks), ','.join(str(i) for i in range(120)))
+
+    def test_by_length(self):
+        """ Chunks stay under max_length once URL-encoded, each comma counting as three characters. """
+        ids = ['1234567890'] * 10
+        eq_(chunk_ids(ids, max_length=36), [','.join(ids[:3])] * 3 + [ids[0]])
+        eq_(chunk_ids(ids, max_length=35), [','.join(ids[:2])] * 5)
+        for chunk in chunk_ids(ids, max_length=50):
+            ok_(len(urllib.quote(chunk)) <= 50)
+        eq_(chunk_ids(['12345678901234567890'], max_length=5), ['12345678901234567890'])
+        eq_(chunk_ids([]), [])
+
+
+class GetByIdsTest(unittest.TestCase):
+    """ Tests getting many objects with the ids param. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = GraphServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        del self.server.requests[:]
+        self.pyfb = PyFacebook(token_text='token', call_token_debug=False, facebook_graph_url=self.server.url)
+
+    def test_chunks(self):
+        """ Ids are sent in as few calls as max_ids allows, and every object comes back by id. """
+        ids = [str(6000000000000 + i) for i in range(120)]
+        objects = self.pyfb.get_by_ids(models.AdGroup, ids)
+        eq_(sorted(objects), sorted(ids))
+        ok_(isinstance(objects[ids[0]], models.AdGroup))
+        calls = self.server.requests_to('GET', '/')
+        eq_([len(params['ids'].split(',')) for params in calls], [50, 50, 20])
+        eq_(json.loads(calls[0]['fields']), get_request_profile(models.AdGroup).default_fields)
+
+    def test_url_length(self):
+        """ Calls are split further to keep URLs under max_url_length, counting UTF-8 encoded params. """
+        ids = [str(6000000000000 + i) for i in range(20)]
+        objects = self.pyfb.get_by_ids(models.AdGroup, ids, return_json=True, fields='id,name',
+                                       locale=u'caf\xe9', max_url_length=len(self.server.url) + 200)
+        eq_(sorted(objects), sorted(ids))
+        calls = self.server.requests_to('GET', '/')
+        ok_(len(calls) > 1)
+        for params in calls:
+            eq_(params['locale'], 'caf\xc3\xa9')
+            ok_(len(self.server.url) + 1 + len(urllib.urlencode(params)) <= len(self.server.url) + 200)